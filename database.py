@@ -1,11 +1,66 @@
 # database.py
+import atexit
+import os
+import queue
+import random
+import signal
 import sqlite3
-from typing import List, Dict, Optional
+import sys
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Mapping
+from contextlib import contextmanager
+from typing import Callable, Iterator, List, Dict, Optional, Union
 from datetime import datetime
 from colorama import Fore, Style
+from dotenv import load_dotenv
+
+from migraciones import aplicar_migraciones, COLUMNAS_FECHA_VENCIMIENTO, INDICES_BUSQUEDA, TABLAS_VERSIONADAS
 
 # --- MODELOS DE DATOS ---
-class Equipo:
+class ModeloFila(Mapping):
+    """
+    Base de los modelos. Los atributos van en __slots__ (sin __dict__ por instancia) en el mismo
+    orden que los parámetros del constructor y que las columnas que se seleccionan, así que
+    desde_fila sirve de row_factory y crea el modelo directamente de la tupla del cursor.
+    Se comportan además como un diccionario de solo lectura (m['placa'], m.get(), dict(m),
+    Modelo(**m)) para el código que trabajaba con las filas como diccionarios.
+    """
+    __slots__ = ()
+
+    @classmethod
+    def desde_fila(cls, cursor: sqlite3.Cursor, fila: tuple):
+        return cls(*fila)
+
+    def __getitem__(self, campo: str):
+        if campo in self.__slots__:
+            return getattr(self, campo)
+        raise KeyError(campo)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.__slots__)
+
+    def __len__(self) -> int:
+        return len(self.__slots__)
+
+    # Igualdad por identidad, como antes de tener la vista de diccionario (los modelos son mutables).
+    __eq__ = object.__eq__
+    __hash__ = object.__hash__
+
+    def to_dict(self) -> Dict:
+        return {campo: getattr(self, campo) for campo in self.__slots__}
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({', '.join(f'{c}={getattr(self, c)!r}' for c in self.__slots__)})"
+
+class Equipo(ModeloFila):
+    __slots__ = (
+        "placa", "tipo", "marca", "modelo", "serial", "estado", "asignado_a", "email_asignado",
+        "observaciones", "fecha_registro", "fecha_devolucion_prestamo", "fecha_devolucion_proveedor",
+        "motivo_devolucion", "estado_anterior", "renovacion_placa_asociada", "fecha_entrega_renovacion", "version",
+    )
+
     # MODIFICADO: Añadidos campos para renovación
     def __init__(self, placa: str, tipo: str, marca: str, modelo: str, serial: str,
                  estado: str = "Disponible", asignado_a: Optional[str] = None,
@@ -16,7 +71,8 @@ class Equipo:
                  motivo_devolucion: Optional[str] = None,
                  estado_anterior: Optional[str] = None,
                  renovacion_placa_asociada: Optional[str] = None,
-                 fecha_entrega_renovacion: Optional[str] = None):
+                 fecha_entrega_renovacion: Optional[str] = None,
+                 version: int = 1):
         self.placa = placa
         self.tipo = tipo
         self.marca = marca
@@ -33,26 +89,40 @@ class Equipo:
         self.estado_anterior = estado_anterior
         self.renovacion_placa_asociada = renovacion_placa_asociada
         self.fecha_entrega_renovacion = fecha_entrega_renovacion
+        self.version = version
 
-    def to_dict(self) -> Dict:
-        return self.__dict__
+class ConflictoEdicion(Exception):
+    """El equipo cambió en la base de datos desde que se leyó; `actual` es el equipo vigente (None si se eliminó)."""
+    def __init__(self, equipo: Equipo, actual: Optional[Equipo]):
+        super().__init__(f"El equipo {equipo.placa} fue modificado por otro usuario.")
+        self.equipo = equipo
+        self.actual = actual
+
+class LogInventario(ModeloFila):
+    __slots__ = ("equipo_placa", "accion", "detalles", "usuario", "fecha", "id")
 
-class LogInventario:
-    def __init__(self, equipo_placa: str, accion: str, detalles: str, usuario: str, fecha: Optional[str] = None):
+    def __init__(self, equipo_placa: str, accion: str, detalles: str, usuario: str, fecha: Optional[str] = None,
+                 id: Optional[int] = None):
         self.equipo_placa = equipo_placa
         self.accion = accion
         self.detalles = detalles
         self.usuario = usuario
         self.fecha = fecha if fecha else datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self.id = id
 
-class LogSistema:
-    def __init__(self, accion: str, detalles: str, usuario: str, fecha: Optional[str] = None):
+class LogSistema(ModeloFila):
+    __slots__ = ("accion", "detalles", "usuario", "fecha", "id")
+
+    def __init__(self, accion: str, detalles: str, usuario: str, fecha: Optional[str] = None, id: Optional[int] = None):
         self.accion = accion
         self.detalles = detalles
         self.usuario = usuario
         self.fecha = fecha if fecha else datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self.id = id
+
+class Usuario(ModeloFila):
+    __slots__ = ("nombre_usuario", "contrasena_hash", "rol", "nombre_completo", "cambio_clave_requerido", "is_active")
 
-class Usuario:
     def __init__(self, nombre_usuario: str, contrasena_hash: str, rol: str, nombre_completo: Optional[str] = None, cambio_clave_requerido: bool = True, is_active: bool = True):
         self.nombre_usuario = nombre_usuario
         self.contrasena_hash = contrasena_hash
@@ -61,112 +131,716 @@ class Usuario:
         self.cambio_clave_requerido = cambio_clave_requerido
         self.is_active = is_active
 
-    def to_dict(self) -> Dict:
-        return self.__dict__
+EQUIPO_COLUMNAS = list(Equipo.__slots__)
+# Columnas de los modelos para los SELECT que los construyen con desde_fila; la tabla de equipos
+# puede tener columnas heredadas que el modelo no usa, por eso no se selecciona con *.
+SQL_COLUMNAS_EQUIPO = ", ".join(EQUIPO_COLUMNAS)
+SQL_COLUMNAS_USUARIO = ", ".join(Usuario.__slots__)
+
+# Vistas con nombre para los listados: solo las columnas que muestra cada pantalla. Las de
+# "lista" y "asignacion" están en idx_equipos_estado_lista, así que se leen sin tocar la tabla.
+VISTAS_EQUIPO = {
+    "lista": ["placa", "tipo", "marca", "estado"],
+    "asignacion": ["placa", "tipo", "estado", "asignado_a"],
+    "devueltos": ["placa", "tipo", "marca", "modelo", "serial", "fecha_devolucion_proveedor",
+                  "motivo_devolucion", "observaciones"],
+    # Sin la columna con la fecha límite, que depende de la regla de vencimiento.
+    "vencidos": ["placa", "tipo", "marca", "modelo", "asignado_a", "email_asignado"],
+}
+
+# --- FECHAS ---
+# Las fechas de vencimiento se guardan como AAAA-MM-DD para poder compararlas y ordenarlas en SQL.
+# El formato DD/MM/AAAA solo se usa al pedirlas al usuario y al mostrarlas.
+FORMATO_FECHA = "%Y-%m-%d"
+FORMATO_FECHA_PANTALLA = "%d/%m/%Y"
+
+def fecha_a_pantalla(fecha: Optional[str]) -> str:
+    """Convierte una fecha guardada (AAAA-MM-DD) al formato DD/MM/AAAA para mostrarla."""
+    if not fecha:
+        return ""
+    try:
+        return datetime.strptime(fecha, FORMATO_FECHA).strftime(FORMATO_FECHA_PANTALLA)
+    except ValueError:
+        return fecha
+
+# --- PERFILES DE CONEXIÓN ---
+# Se elige con DB_PERFIL en el .env; cada pragma puede sobrescribirse con su variable DB_<PRAGMA>.
+PERFILES_CONEXION = {
+    "durable": {
+        "journal_mode": "WAL",
+        "synchronous": "FULL",
+        "mmap_size": 0,
+        "cache_size": -16000,
+        "temp_store": "DEFAULT",
+        "busy_timeout": 5000,
+    },
+    "fast": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "mmap_size": 268435456,
+        "cache_size": -65536,
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,
+    },
+}
+
+def cargar_perfil_conexion() -> Dict:
+    """Lee el perfil de conexión y sus sobrescrituras desde el .env."""
+    load_dotenv()
+    nombre_perfil = os.getenv("DB_PERFIL", "durable").strip().lower()
+    if nombre_perfil not in PERFILES_CONEXION:
+        print(Fore.YELLOW + f"⚠️ Perfil de conexión '{nombre_perfil}' desconocido. Se usará 'durable'." + Style.RESET_ALL)
+        nombre_perfil = "durable"
+
+    perfil = dict(PERFILES_CONEXION[nombre_perfil])
+    for pragma, valor_defecto in perfil.items():
+        valor_env = os.getenv(f"DB_{pragma.upper()}")
+        if not valor_env:
+            continue
+        if isinstance(valor_defecto, int):
+            try:
+                perfil[pragma] = int(valor_env)
+            except ValueError:
+                print(Fore.YELLOW + f"⚠️ Valor inválido para DB_{pragma.upper()}: '{valor_env}'. Se ignora." + Style.RESET_ALL)
+        elif valor_env.strip().replace("_", "").isalnum():
+            perfil[pragma] = valor_env.strip().upper()
+        else:
+            print(Fore.YELLOW + f"⚠️ Valor inválido para DB_{pragma.upper()}: '{valor_env}'. Se ignora." + Style.RESET_ALL)
+    perfil["nombre"] = nombre_perfil
+    return perfil
+
+TAMANO_BLOQUE_DEFECTO = 500
+
+def cargar_tamano_bloque() -> int:
+    """Lee de DB_BATCH_SIZE cuántas filas se traen por bloque en las lecturas por streaming."""
+    load_dotenv()
+    valor_env = os.getenv("DB_BATCH_SIZE")
+    if not valor_env:
+        return TAMANO_BLOQUE_DEFECTO
+    try:
+        tamano = int(valor_env)
+        if tamano <= 0:
+            raise ValueError
+        return tamano
+    except ValueError:
+        print(Fore.YELLOW + f"⚠️ Valor inválido para DB_BATCH_SIZE: '{valor_env}'. Se usará {TAMANO_BLOQUE_DEFECTO}." + Style.RESET_ALL)
+        return TAMANO_BLOQUE_DEFECTO
+
+# Reintentos al abrir una transacción de escritura si la base sigue ocupada tras el busy_timeout.
+REINTENTOS_OCUPADA = 4
+ESPERA_INICIAL_OCUPADA = 0.1
+
+# Equipos que se mantienen en la caché de get_equipo_by_placa (por hilo).
+TAMANO_CACHE_EQUIPOS = 256
+
+# Sentencias que modifican la base de datos y por tanto deben pasar por el bloqueo de escritura.
+SENTENCIAS_ESCRITURA = {"INSERT", "UPDATE", "DELETE", "REPLACE", "CREATE", "DROP", "ALTER"}
+
+# --- ARCHIVO ANUAL DE LOGS ---
+# Columnas que se copian a los archivos; las consultas que unen archivos y base usan esta lista.
+# Mismo orden que los __slots__ de LogInventario y LogSistema, para construirlos con desde_fila.
+COLUMNAS_LOG = {
+    "log_inventario": ", ".join(LogInventario.__slots__),
+    "log_sistema": ", ".join(LogSistema.__slots__),
+}
+MODELOS_LOG = {"log_inventario": LogInventario, "log_sistema": LogSistema}
+ESQUEMA_ARCHIVO_LOG = [
+    "CREATE TABLE IF NOT EXISTS {esquema}.log_inventario (id INTEGER PRIMARY KEY, equipo_placa TEXT NOT NULL, "
+    "accion TEXT NOT NULL, detalles TEXT NOT NULL, usuario TEXT NOT NULL, fecha TEXT NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS {esquema}.idx_log_inventario_fecha ON log_inventario (fecha)",
+    "CREATE INDEX IF NOT EXISTS {esquema}.idx_log_inventario_placa_fecha ON log_inventario (equipo_placa, fecha)",
+    "CREATE TABLE IF NOT EXISTS {esquema}.log_sistema (id INTEGER PRIMARY KEY, accion TEXT NOT NULL, "
+    "detalles TEXT NOT NULL, usuario TEXT NOT NULL, fecha TEXT NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS {esquema}.idx_log_sistema_fecha ON log_sistema (fecha)",
+]
+# Filas que se mueven por transacción al archivar.
+TAMANO_LOTE_ARCHIVO = 500
+# Bases adjuntas a la vez por conexión (límite SQLITE_MAX_ATTACHED por defecto).
+MAX_ARCHIVOS_ADJUNTOS = 10
+
+# --- CONSULTAS INDEXADAS ---
+# Texto de las consultas que dependen de un índice. Los métodos de DatabaseManager las construyen
+# con estas constantes y funciones, y la verificación de planes también, así que se comprueba
+# exactamente el SQL que se ejecuta.
+JOIN_LOG_RESUMEN = " JOIN log_resumen r ON r.equipo_placa = e.placa"
+CONDICION_EQUIPOS_NUEVOS = "e.estado = 'Disponible' AND r.num_movimientos = 1"
+CONDICION_EQUIPOS_USADOS = "e.estado = 'Disponible' AND r.num_movimientos > 1"
+CONDICION_EQUIPOS_DEVUELTOS = "e.estado = ?"
+
+SQL_ULTIMO_LOG_PLACA = (f"SELECT {COLUMNAS_LOG['log_inventario']} FROM log_inventario "
+                        "WHERE equipo_placa = ? ORDER BY fecha DESC LIMIT 1")
+SQL_ULTIMO_LOG_PLACA_ACCION = (f"SELECT {COLUMNAS_LOG['log_inventario']} FROM log_inventario "
+                               "WHERE equipo_placa = ? AND accion = ? ORDER BY fecha DESC LIMIT 1")
+SQL_ULTIMOS_MOVIMIENTOS_USUARIO = """
+    SELECT
+        li.fecha,
+        li.equipo_placa,
+        e.marca,
+        li.accion,
+        li.detalles
+    FROM
+        log_inventario li
+    LEFT JOIN
+        equipos e ON li.equipo_placa = e.placa
+    WHERE
+        li.usuario = ?
+    ORDER BY
+        li.fecha DESC
+    LIMIT ?
+"""
+
+def sql_equipos(columnas: List[str], condicion: str = "", join: str = "") -> str:
+    """SELECT de las columnas indicadas sobre equipos (alias 'e'), con JOIN y condición opcionales."""
+    query = f"SELECT {', '.join('e.' + c for c in columnas)} FROM equipos e{join}"
+    if condicion:
+        query += f" WHERE {condicion}"
+    return query
+
+def sql_equipos_por_vencimiento(columna_fecha: str, columnas: List[str], con_estado: bool = True) -> str:
+    condiciones = (["estado = ?"] if con_estado else []) + [f"{columna_fecha} < ?"]
+    return f"SELECT {', '.join(columnas)} FROM equipos WHERE {' AND '.join(condiciones)} ORDER BY {columna_fecha}"
+
+def sql_conteo_por_vencimiento(columna_fecha: str) -> str:
+    return f"SELECT COUNT(*) FROM equipos WHERE estado = ? AND {columna_fecha} < ?"
+
+def sql_conteo_agrupado(columna: str, num_estados: int = 0) -> str:
+    query = f"SELECT {columna}, COUNT(*) FROM equipos"
+    if num_estados:
+        query += f" WHERE estado IN ({', '.join('?' for _ in range(num_estados))})"
+    return query + f" GROUP BY {columna}"
+
+def sql_equipos_activos_seek(con_clave: bool, incluir_clave: bool = True, descendente: bool = False) -> str:
+    """Un tramo de la paginación por clave: los equipos de un estado a partir de una placa."""
+    query = f"SELECT {', '.join(VISTAS_EQUIPO['asignacion'])} FROM equipos WHERE estado = ?"
+    if con_clave:
+        operador = ('<' if descendente else '>') + ('=' if incluir_clave else '')
+        query += f" AND placa {operador} ?"
+    return query + " ORDER BY placa" + (" DESC" if descendente else "") + " LIMIT ?"
+
+def sql_log_con_archivos(tabla: str, filtro: str, esquemas: List[str], limite: Optional[int] = None) -> str:
+    """Un log por fecha descendente, uniendo (UNION ALL) la tabla de cada esquema indicado."""
+    partes = [f"SELECT {COLUMNAS_LOG[tabla]} FROM {esquema}.{tabla} {filtro}" for esquema in esquemas]
+    query = " UNION ALL ".join(partes) + " ORDER BY fecha DESC"
+    if limite:
+        query += f" LIMIT {int(limite)}"
+    return query
+
+def sql_lote_archivado(tabla: str) -> str:
+    return f"SELECT id, fecha FROM main.{tabla} WHERE fecha >= ? AND fecha < ? ORDER BY fecha, id LIMIT ?"
+
+# Consultas que deben resolverse con un índice: (descripción, consulta, índice esperado).
+# "COVERING INDEX" exige además que la consulta no lea la tabla.
+CONSULTAS_INDEXADAS = [
+    ("get_log_by_placa",
+     sql_log_con_archivos("log_inventario", "WHERE equipo_placa = ?", ["main"]),
+     "idx_log_inventario_placa_fecha"),
+    ("get_last_movimiento_by_placa", SQL_ULTIMO_LOG_PLACA, "idx_log_inventario_placa_fecha"),
+    ("get_last_log_by_action", SQL_ULTIMO_LOG_PLACA_ACCION, "idx_log_inventario_placa_accion_fecha"),
+    ("get_last_movimientos_by_user", SQL_ULTIMOS_MOVIMIENTOS_USUARIO, "idx_log_inventario_usuario_fecha"),
+    ("get_movimientos_en_rango_de_fechas",
+     sql_log_con_archivos("log_inventario", "WHERE fecha BETWEEN ? AND ?", ["main"]),
+     "idx_log_inventario_fecha"),
+    ("get_new_equipos",
+     sql_equipos(EQUIPO_COLUMNAS, CONDICION_EQUIPOS_NUEVOS, JOIN_LOG_RESUMEN),
+     "idx_equipos_estado_lista"),
+    ("get_new_equipos (vista 'lista')",
+     sql_equipos(VISTAS_EQUIPO["lista"], CONDICION_EQUIPOS_NUEVOS, JOIN_LOG_RESUMEN),
+     "COVERING INDEX idx_equipos_estado_lista"),
+    ("get_available_not_new_equipos (vista 'lista')",
+     sql_equipos(VISTAS_EQUIPO["lista"], CONDICION_EQUIPOS_USADOS, JOIN_LOG_RESUMEN),
+     "COVERING INDEX idx_equipos_estado_lista"),
+    ("get_equipos_activos_seek",
+     sql_equipos_activos_seek(con_clave=True),
+     "COVERING INDEX idx_equipos_estado_lista"),
+    ("get_equipos_activos_seek (hacia atrás)",
+     sql_equipos_activos_seek(con_clave=True, incluir_clave=False, descendente=True),
+     "COVERING INDEX idx_equipos_estado_lista"),
+    # Recorre el índice ancho de los listados: con 200.000 equipos tarda unos 26 ms frente a 15 ms
+    # con un índice solo por estado, que no compensa mantener en cada escritura de equipos.
+    ("count_by_estado", sql_conteo_agrupado("estado"), "COVERING INDEX idx_equipos_estado_lista"),
+    ("count_by_tipo", sql_conteo_agrupado("tipo"), "idx_equipos_tipo_estado"),
+    ("count_by_marca", sql_conteo_agrupado("marca"), "idx_equipos_marca_estado"),
+    ("get_equipos_devueltos",
+     sql_equipos(EQUIPO_COLUMNAS, CONDICION_EQUIPOS_DEVUELTOS),
+     "idx_equipos_estado_lista"),
+] + [
+    (f"find_equipos_por_vencimiento ({columna})",
+     sql_equipos_por_vencimiento(columna, VISTAS_EQUIPO["vencidos"] + [columna]),
+     "idx_equipos_estado_" + columna.replace("fecha_", "", 1))
+    for columna in COLUMNAS_FECHA_VENCIMIENTO
+] + [
+    (f"count_equipos_por_vencimiento ({columna})",
+     sql_conteo_por_vencimiento(columna),
+     "idx_equipos_estado_" + columna.replace("fecha_", "", 1))
+    for columna in COLUMNAS_FECHA_VENCIMIENTO
+] + [
+    (f"archivar_logs ({tabla})", sql_lote_archivado(tabla), f"idx_{tabla}_fecha")
+    for tabla in COLUMNAS_LOG
+]
+
+# --- ESCRITURA DE LOGS EN SEGUNDO PLANO ---
+MODOS_ESCRITURA_LOGS = ("sincrono", "asincrono")
+LOG_LOTE_FILAS_DEFECTO = 200
+LOG_LOTE_MS_DEFECTO = 200
+
+def cargar_config_escritor_logs() -> Dict:
+    """
+    Lee del .env cómo se escriben los logs sueltos: LOG_MODO_ESCRITURA ('sincrono', un commit por
+    registro, o 'asincrono', agrupados en segundo plano) y el tamaño del grupo en filas
+    (LOG_LOTE_FILAS) y milisegundos (LOG_LOTE_MS).
+    """
+    load_dotenv()
+    modo = os.getenv("LOG_MODO_ESCRITURA", "sincrono").strip().lower() or "sincrono"
+    if modo not in MODOS_ESCRITURA_LOGS:
+        print(Fore.YELLOW + f"⚠️ Valor inválido para LOG_MODO_ESCRITURA: '{modo}'. Se usará 'sincrono'." + Style.RESET_ALL)
+        modo = "sincrono"
+    config = {"modo": modo}
+    for clave, variable, defecto in (("filas", "LOG_LOTE_FILAS", LOG_LOTE_FILAS_DEFECTO), ("ms", "LOG_LOTE_MS", LOG_LOTE_MS_DEFECTO)):
+        valor_env = os.getenv(variable, str(defecto)).strip() or str(defecto)
+        try:
+            config[clave] = max(1, int(valor_env))
+        except ValueError:
+            print(Fore.YELLOW + f"⚠️ Valor inválido para {variable}: '{valor_env}'. Se usará {defecto}." + Style.RESET_ALL)
+            config[clave] = defecto
+    return config
+
+# Marcas de la cola: _VACIAR escribe ya lo acumulado, _DETENER termina el hilo.
+_VACIAR = object()
+_DETENER = object()
+
+class EscritorLogs:
+    """
+    Hilo que guarda los logs sueltos agrupándolos en una transacción cada N filas o M milisegundos,
+    para que el registro de auditoría no haga esperar un fsync a cada paso de la interfaz.
+    Los logs escritos dentro de una transacción no pasan por aquí: van en esa misma transacción.
+    Al salir (close, atexit, SIGTERM) se vacía la cola; en modo síncrono no se arranca el hilo.
+    Un registro rechazado por la base queda anotado en log_sistema; si no se pudo guardar el lote
+    entero, sus logs se devuelven a quien llama a esperar_logs.
+    """
+
+    def __init__(self, db: "DatabaseManager", filas_lote: int, espera_ms: int):
+        self.db = db
+        self.filas_lote = filas_lote
+        self.espera_ms = espera_ms
+        self._cola: queue.Queue = queue.Queue()
+        self._condicion = threading.Condition()
+        self._hilo: Optional[threading.Thread] = None
+        self.pendientes = 0
+        self.fallidos: List[Union[LogInventario, LogSistema]] = []
+        self._atexit_registrado = False
+
+    def en_hilo_escritor(self) -> bool:
+        return threading.current_thread() is self._hilo
+
+    def encolar(self, log: Union[LogInventario, LogSistema]):
+        with self._condicion:
+            if self._hilo is None:
+                self._iniciar()
+            self.pendientes += 1
+        self._cola.put(log)
+
+    def _iniciar(self):
+        self._hilo = threading.Thread(target=self._ejecutar, name="escritor-logs", daemon=True)
+        self._hilo.start()
+        if not self._atexit_registrado:
+            atexit.register(self.detener)
+            self._atexit_registrado = True
+        # Ante SIGTERM se sale ordenadamente para que el cierre de la base vacíe la cola.
+        if threading.current_thread() is threading.main_thread():
+            for nombre in ("SIGTERM", "SIGHUP"):
+                senal = getattr(signal, nombre, None)
+                if senal is not None and signal.getsignal(senal) == signal.SIG_DFL:
+                    signal.signal(senal, self._salir_por_senal)
+
+    @staticmethod
+    def _salir_por_senal(signum, frame):
+        raise SystemExit(128 + signum)
+
+    def _ejecutar(self):
+        detener = False
+        while not detener:
+            primero = self._cola.get()
+            lote = [] if primero is _VACIAR or primero is _DETENER else [primero]
+            detener = primero is _DETENER
+            limite = time.monotonic() + self.espera_ms / 1000
+            while lote and len(lote) < self.filas_lote:
+                restante = limite - time.monotonic()
+                if restante <= 0:
+                    break
+                try:
+                    siguiente = self._cola.get(timeout=restante)
+                except queue.Empty:
+                    break
+                if siguiente is _VACIAR or siguiente is _DETENER:
+                    detener = siguiente is _DETENER
+                    break
+                lote.append(siguiente)
+            if lote:
+                self._escribir(lote)
+        self.db.cerrar_conexion_hilo()
+
+    def guardar_lote(self, lote: List[Union[LogInventario, LogSistema]]):
+        """
+        Guarda el lote en una transacción (o en la ya abierta por el hilo). Cada intento va en su
+        propio punto de guardado, así un fallo nunca deja filas a medias que el reintento duplique.
+        """
+        with self.db.transaction(), self.db.savepoint():
+            try:
+                with self.db.savepoint():
+                    for log in lote:
+                        self.db._insertar_log(log)
+                return
+            except sqlite3.Error:
+                pass
+            # Un registro que falla (p. ej. su equipo ya se eliminó) no debe arrastrar al resto del lote.
+            for log in lote:
+                try:
+                    with self.db.savepoint():
+                        self.db._insertar_log(log)
+                except sqlite3.Error as e:
+                    self.db._insertar_log(LogSistema("Log no guardado", self.describir(log, e), log.usuario))
+
+    @staticmethod
+    def describir(log: Union[LogInventario, LogSistema], error: Exception) -> str:
+        origen = f"log_inventario (placa {log.equipo_placa})" if isinstance(log, LogInventario) else "log_sistema"
+        return f"{origen}, {log.fecha}, '{log.accion}': {log.detalles} | Error: {error}"
+
+    def _escribir(self, lote: List[Union[LogInventario, LogSistema]]):
+        try:
+            self.guardar_lote(lote)
+        except sqlite3.Error as e:
+            with self._condicion:
+                self.fallidos.extend(lote)
+            print(Fore.RED + f"❌ No se pudieron guardar {len(lote)} logs: {e}. Se reintentará." + Style.RESET_ALL)
+        finally:
+            with self._condicion:
+                self.pendientes -= len(lote)
+                self._condicion.notify_all()
+
+    def recuperar_fallidos(self) -> List[Union[LogInventario, LogSistema]]:
+        with self._condicion:
+            fallidos, self.fallidos = self.fallidos, []
+        return fallidos
+
+    def devolver_fallidos(self, logs: List[Union[LogInventario, LogSistema]]):
+        with self._condicion:
+            self.fallidos[:0] = logs
+
+    def escribir_pendientes_aqui(self):
+        """
+        Escribe en el hilo actual lo que sigue en la cola. Se usa dentro de una transacción, donde
+        no se puede esperar al hilo escritor porque necesita el mismo bloqueo de escritura.
+        """
+        lote = []
+        while True:
+            try:
+                log = self._cola.get_nowait()
+            except queue.Empty:
+                break
+            if log is _DETENER:
+                self._cola.put(log)
+                break
+            if log is not _VACIAR:
+                lote.append(log)
+        if lote:
+            self._escribir(lote)
+
+    def vaciar(self):
+        """Espera a que se hayan guardado todos los logs encolados, también los del lote en curso."""
+        if self.en_hilo_escritor():
+            return
+        with self._condicion:
+            if not self.pendientes or self._hilo is None:
+                return
+        self._cola.put(_VACIAR)
+        with self._condicion:
+            self._condicion.wait_for(lambda: self.pendientes == 0)
+
+    def detener(self):
+        """Vacía la cola, termina el hilo y hace un último intento con los logs que fallaron."""
+        with self._condicion:
+            hilo, self._hilo = self._hilo, None
+        if hilo is None or threading.current_thread() is hilo:
+            return
+        self._cola.put(_DETENER)
+        hilo.join()
+        fallidos = self.recuperar_fallidos()
+        if fallidos:
+            try:
+                self.guardar_lote(fallidos)
+            except sqlite3.Error as e:
+                # Ya no hay a quién devolverlos: se dejan completos en la salida de error.
+                for log in fallidos:
+                    print(f"Log no guardado: {self.describir(log, e)}", file=sys.stderr)
 
 # --- GESTOR DE BASE DE DATOS SQLITE ---
 class DatabaseManager:
+    """
+    Cada hilo trabaja con su propia conexión (sqlite3 no permite compartirlas), abierta con los
+    mismos pragmas. Con WAL los lectores avanzan en paralelo; las escrituras de todos los hilos
+    se serializan con un único bloqueo para que no compitan por el bloqueo de SQLite.
+    """
+
     def __init__(self, db_name: str):
         self.db_name = db_name
-        self.conn = None
+        self._local = threading.local()
+        self._write_lock = threading.RLock()
+        self._conexiones: List[sqlite3.Connection] = []
+        self._conexiones_lock = threading.Lock()
+        self.perfil = cargar_perfil_conexion()
+        self.batch_size = cargar_tamano_bloque()
+        self.cache_equipos_aciertos = 0
+        self.cache_equipos_fallos = 0
+        self._cache_parametros = None
+        self._cache_parametros_clave = None
+        config_logs = cargar_config_escritor_logs()
+        self.logs_asincronos = config_logs["modo"] == "asincrono"
+        self.escritor_logs = EscritorLogs(self, config_logs["filas"], config_logs["ms"])
         self.connect()
-        self.create_tables()
-        self.add_missing_columns()
+        # Tras cambiar el esquema; el mantenimiento vuelve a comprobarlo después de cada ANALYZE.
+        if aplicar_migraciones(self.conn):
+            self.verificar_indices()
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """Conexión del hilo actual; se abre la primera vez que el hilo la necesita."""
+        conn = getattr(self._local, "conn", None)
+        return conn if conn is not None else self.connect()
+
+    @property
+    def _transaction_depth(self) -> int:
+        return getattr(self._local, "transaction_depth", 0)
+
+    @_transaction_depth.setter
+    def _transaction_depth(self, valor: int):
+        self._local.transaction_depth = valor
 
-    def connect(self):
+    def connect(self) -> sqlite3.Connection:
         try:
-            self.conn = sqlite3.connect(self.db_name)
-            self.conn.row_factory = sqlite3.Row
-            self.conn.execute("PRAGMA foreign_keys = ON")
+            # check_same_thread=False solo para poder cerrarlas todas al salir; cada una se usa en un único hilo.
+            conn = sqlite3.connect(self.db_name, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA foreign_keys = ON")
+            self._local.conn = conn
+            with self._conexiones_lock:
+                primera = not self._conexiones
+                self._conexiones.append(conn)
+            self.aplicar_perfil(mostrar=primera)
+            return conn
         except sqlite3.Error as e:
             print(Fore.RED + f"❌ Error al conectar a la base de datos: {e}" + Style.RESET_ALL)
             exit()
 
+    def aplicar_perfil(self, mostrar: bool = True):
+        """Aplica los pragmas del perfil de conexión y muestra los valores en vigor."""
+        for pragma in ("busy_timeout", "journal_mode", "synchronous", "mmap_size", "cache_size", "temp_store"):
+            self.conn.execute(f"PRAGMA {pragma} = {self.perfil[pragma]}")
+        if mostrar:
+            print(Style.DIM + f"Base de datos '{self.db_name}' (perfil {self.perfil['nombre']}): {self.describir_pragmas()}" + Style.RESET_ALL)
+
+    def describir_pragmas(self) -> str:
+        """Devuelve los pragmas de la conexión en vigor como texto."""
+        nombres_synchronous = {0: "OFF", 1: "NORMAL", 2: "FULL", 3: "EXTRA"}
+        nombres_temp_store = {0: "DEFAULT", 1: "FILE", 2: "MEMORY"}
+        valores = {}
+        for pragma in ("journal_mode", "synchronous", "mmap_size", "cache_size", "temp_store", "busy_timeout"):
+            row = self.conn.execute(f"PRAGMA {pragma}").fetchone()
+            valores[pragma] = row[0] if row else "N/A"
+        valores["synchronous"] = nombres_synchronous.get(valores["synchronous"], valores["synchronous"])
+        valores["temp_store"] = nombres_temp_store.get(valores["temp_store"], valores["temp_store"])
+        return ", ".join(f"{k}={v}" for k, v in valores.items())
+
     def close(self):
-        if self.conn:
-            self.conn.close()
+        """Guarda los logs pendientes y cierra las conexiones de todos los hilos."""
+        self.escritor_logs.detener()
+        with self._conexiones_lock:
+            for conn in self._conexiones:
+                conn.close()
+            self._conexiones.clear()
+        self._local = threading.local()
 
-    def create_tables(self):
-        cursor = self.conn.cursor()
-        # MODIFICADO: Añadidos campos para renovación en la tabla equipos
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS equipos (
-                placa TEXT PRIMARY KEY, tipo TEXT NOT NULL, marca TEXT NOT NULL,
-                modelo TEXT NOT NULL, serial TEXT NOT NULL, estado TEXT NOT NULL,
-                asignado_a TEXT, email_asignado TEXT, observaciones TEXT,
-                fecha_registro TEXT, fecha_devolucion_prestamo TEXT, 
-                fecha_devolucion_proveedor TEXT, motivo_devolucion TEXT,
-                estado_anterior TEXT, renovacion_placa_asociada TEXT,
-                fecha_entrega_renovacion TEXT
-            )
-        ''')
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS log_inventario (
-                id INTEGER PRIMARY KEY AUTOINCREMENT, equipo_placa TEXT NOT NULL,
-                accion TEXT NOT NULL, detalles TEXT NOT NULL, usuario TEXT NOT NULL, fecha TEXT NOT NULL,
-                FOREIGN KEY (equipo_placa) REFERENCES equipos (placa) ON DELETE CASCADE
-            )
-        ''')
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS log_sistema (
-                id INTEGER PRIMARY KEY AUTOINCREMENT, accion TEXT NOT NULL, 
-                detalles TEXT NOT NULL, usuario TEXT NOT NULL, fecha TEXT NOT NULL
-            )
-        ''')
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS usuarios (
-                nombre_usuario TEXT PRIMARY KEY, contrasena_hash TEXT NOT NULL,
-                rol TEXT NOT NULL, nombre_completo TEXT, 
-                cambio_clave_requerido INTEGER NOT NULL DEFAULT 1,
-                is_active INTEGER NOT NULL DEFAULT 1
-            )
-        ''')
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS parametros (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                tipo TEXT NOT NULL,
-                valor TEXT NOT NULL,
-                is_active INTEGER NOT NULL DEFAULT 1,
-                UNIQUE(tipo, valor)
-            )
-        ''')
-        self.conn.commit()
-
-    def add_missing_columns(self):
-        columns_to_add = {
-            'equipos': [
-                ('fecha_devolucion_prestamo', 'TEXT'),
-                ('fecha_devolucion_proveedor', 'TEXT'),
-                ('motivo_devolucion', 'TEXT'),
-                ('estado_anterior', 'TEXT'),
-                ('renovacion_placa_asociada', 'TEXT'),
-                ('fecha_entrega_renovacion', 'TEXT')
-            ],
-            'usuarios': [
-                ('nombre_completo', 'TEXT'),
-                ('cambio_clave_requerido', 'INTEGER NOT NULL DEFAULT 1'),
-                ('is_active', 'INTEGER NOT NULL DEFAULT 1')
-            ],
-            'parametros': [
-                ('is_active', 'INTEGER NOT NULL DEFAULT 1')
-            ]
-        }
-        cursor = self.conn.cursor()
-        for table, cols in columns_to_add.items():
-            for col_name, col_type in cols:
-                try:
-                    cursor.execute(f"ALTER TABLE {table} ADD COLUMN {col_name} {col_type}")
-                    self.conn.commit()
-                except sqlite3.OperationalError:
-                    pass
+    def cerrar_conexion_hilo(self):
+        """Cierra la conexión del hilo actual; los hilos de trabajo la llaman al terminar."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            return
+        with self._conexiones_lock:
+            if conn in self._conexiones:
+                self._conexiones.remove(conn)
+        conn.close()
+        self._local.conn = None
+
+    def verificar_indices(self):
+        """Avisa si alguna consulta indexada no utiliza su índice."""
+        for descripcion, indice in self.verificar_planes_consulta():
+            print(Fore.YELLOW + f"⚠️ La consulta '{descripcion}' no utiliza el índice '{indice}'." + Style.RESET_ALL)
+
+    def verificar_planes_consulta(self) -> List[tuple]:
+        """Ejecuta EXPLAIN QUERY PLAN sobre las consultas indexadas y devuelve las que no usan su índice."""
+        # Conexión aparte y sin caché de sentencias: un EXPLAIN ya preparado no se vuelve a preparar
+        # tras un cambio de esquema o un ANALYZE, y devolvería el plan antiguo.
+        conn = sqlite3.connect(self.db_name, cached_statements=0)
+        try:
+            consultas_sin_indice = []
+            for descripcion, query, indice in CONSULTAS_INDEXADAS:
+                params = (None,) * query.count('?')
+                plan = conn.execute(f"EXPLAIN QUERY PLAN {query}", params).fetchall()
+                if not any(indice in row[3] for row in plan):
+                    consultas_sin_indice.append((descripcion, indice))
+            return consultas_sin_indice
+        finally:
+            conn.close()
+
+    @staticmethod
+    def es_escritura(query: str) -> bool:
+        palabras = query.split(None, 1)
+        return bool(palabras) and palabras[0].upper() in SENTENCIAS_ESCRITURA
 
     def execute_query(self, query: str, params: tuple = ()) -> sqlite3.Cursor:
         cursor = self.conn.cursor()
-        cursor.execute(query, params)
+        if self._transaction_depth == 0 and self.es_escritura(query):
+            # Una escritura suelta es su propia transacción, tomada con el bloqueo de escritura.
+            with self.transaction():
+                cursor.execute(query, params)
+        else:
+            cursor.execute(query, params)
         return cursor
 
+    def iter_query(self, query: str, params: tuple = (), batch_size: Optional[int] = None,
+                   modelo: Optional[type] = None) -> Iterator[Dict]:
+        """
+        Ejecuta una consulta y devuelve sus filas como diccionarios, leyéndolas por bloques con fetchmany.
+        Con 'modelo', el cursor usa su row_factory y devuelve directamente instancias del modelo.
+        """
+        cursor = self.execute_query(query, params)
+        if modelo is not None:
+            cursor.row_factory = modelo.desde_fila
+        tamano = batch_size or self.batch_size
+        while True:
+            rows = cursor.fetchmany(tamano)
+            if not rows:
+                break
+            if modelo is not None:
+                yield from rows
+            else:
+                for row in rows:
+                    yield dict(row)
+
     def commit(self):
-        self.conn.commit()
+        # Dentro de transaction() el commit se difiere hasta que termina el bloque.
+        if self._transaction_depth == 0:
+            self.conn.commit()
+
+    @contextmanager
+    def transaction(self):
+        """
+        Agrupa varias escrituras en una única transacción con un solo commit.
+        Si ocurre cualquier error dentro del bloque se revierten todos los cambios.
+        Los bloques anidados se integran en la transacción exterior.
+        Mientras dura el bloque, el hilo tiene el bloqueo de escritura.
+        """
+        if self._transaction_depth > 0:
+            self._transaction_depth += 1
+            try:
+                yield self
+            finally:
+                self._transaction_depth -= 1
+            return
+
+        # Una vez tomado el bloqueo ya no se puede esperar al hilo escritor (lo necesita para guardar
+        # el lote que tenga en curso), así que antes se vacía: la transacción ve todos los logs previos.
+        self.escritor_logs.vaciar()
+        conn = self.conn
+        with self._write_lock:
+            self._begin_immediate(conn)
+            self._transaction_depth = 1
+            self._local.al_revertir = []
+            self._local.al_confirmar = []
+            try:
+                yield self
+            except BaseException:
+                self._transaction_depth = 0
+                conn.rollback()
+                # Las cachés pudieron leer filas de la transacción revertida.
+                self.limpiar_cache_equipos()
+                self.invalidar_parametros()
+                self._deshacer_en_memoria(0, 0)
+                raise
+            self._transaction_depth = 0
+            self._local.al_revertir = []
+            conn.commit()
+        acciones, self._local.al_confirmar = self._local.al_confirmar, []
+        for accion in acciones:
+            accion()
+
+    @contextmanager
+    def savepoint(self):
+        """
+        Punto de guardado dentro de la transacción del hilo (que debe estar abierta): si el bloque
+        falla se deshace solo lo hecho en él y la transacción sigue en pie.
+        """
+        conn = self.conn
+        conn.execute("SAVEPOINT punto_guardado")
+        pendientes_antes = (len(self._local.al_revertir), len(self._local.al_confirmar))
+        try:
+            yield self
+        except BaseException:
+            conn.execute("ROLLBACK TO punto_guardado")
+            conn.execute("RELEASE punto_guardado")
+            self.limpiar_cache_equipos()
+            self.invalidar_parametros()
+            self._deshacer_en_memoria(*pendientes_antes)
+            raise
+        conn.execute("RELEASE punto_guardado")
+
+    def al_revertir(self, accion: Callable[[], None]):
+        """
+        Registra cómo deshacer un cambio hecho en memoria junto a una escritura (p. ej. la versión
+        de un Equipo) por si la transacción en curso se revierte. Fuera de una transacción la
+        escritura ya está confirmada y no hay nada que registrar.
+        """
+        if self._transaction_depth > 0:
+            self._local.al_revertir.append(accion)
+
+    def al_confirmar(self, accion: Callable[[], None]):
+        """
+        Ejecuta la acción cuando se confirma la transacción en curso (o ya, si no hay ninguna); si
+        se revierte, no se ejecuta. Sirve para lo que no puede ir dentro de ella, como un ATTACH.
+        """
+        if self._transaction_depth > 0:
+            self._local.al_confirmar.append(accion)
+        else:
+            accion()
+
+    def _deshacer_en_memoria(self, desde_revertir: int, desde_confirmar: int):
+        acciones = self._local.al_revertir[desde_revertir:]
+        del self._local.al_revertir[desde_revertir:]
+        del self._local.al_confirmar[desde_confirmar:]
+        for accion in reversed(acciones):
+            accion()
+
+    @staticmethod
+    def es_base_ocupada(error: sqlite3.OperationalError) -> bool:
+        codigo = getattr(error, "sqlite_errorcode", None)
+        if codigo is not None:
+            return codigo & 0xFF in (sqlite3.SQLITE_BUSY, sqlite3.SQLITE_LOCKED)
+        mensaje = str(error).lower()
+        return "locked" in mensaje or "busy" in mensaje
+
+    def _begin_immediate(self, conn: sqlite3.Connection):
+        """
+        Abre la transacción de escritura. SQLite ya espera hasta busy_timeout; si otro proceso
+        sigue escribiendo se reintenta con espera exponencial (con algo de azar para no coincidir).
+        Solo se reintenta el BEGIN, antes de que el bloque haya hecho ningún cambio.
+        """
+        for intento in range(REINTENTOS_OCUPADA + 1):
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                return
+            except sqlite3.OperationalError as e:
+                if not self.es_base_ocupada(e) or intento == REINTENTOS_OCUPADA:
+                    raise
+                time.sleep(ESPERA_INICIAL_OCUPADA * (2 ** intento) * random.uniform(0.5, 1.5))
 
     # --- Métodos para Equipos ---
     def insert_equipo(self, equipo: Equipo):
@@ -174,15 +848,121 @@ class DatabaseManager:
             INSERT INTO equipos (placa, tipo, marca, modelo, serial, estado, asignado_a, email_asignado, observaciones, fecha_registro, fecha_devolucion_prestamo, fecha_devolucion_proveedor, motivo_devolucion, estado_anterior, renovacion_placa_asociada, fecha_entrega_renovacion)
             VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
         ''', (equipo.placa, equipo.tipo, equipo.marca, equipo.modelo, equipo.serial, equipo.estado, equipo.asignado_a, equipo.email_asignado, equipo.observaciones, equipo.fecha_registro, equipo.fecha_devolucion_prestamo, equipo.fecha_devolucion_proveedor, equipo.motivo_devolucion, equipo.estado_anterior, equipo.renovacion_placa_asociada, equipo.fecha_entrega_renovacion))
+        self.invalidar_equipo(equipo.placa)
         self.commit()
 
-    def get_all_equipos(self) -> List[Dict]:
-        cursor = self.execute_query('SELECT * FROM equipos')
-        return [dict(row) for row in cursor.fetchall()]
+    def insert_equipos_lote(self, equipos: List[Equipo], logs: List[LogInventario]):
+        """Inserta un lote de equipos y sus registros de log con executemany."""
+        with self.transaction():
+            cursor = self.conn.cursor()
+            cursor.executemany('''
+                INSERT INTO equipos (placa, tipo, marca, modelo, serial, estado, asignado_a, email_asignado, observaciones, fecha_registro, fecha_devolucion_prestamo, fecha_devolucion_proveedor, motivo_devolucion, estado_anterior, renovacion_placa_asociada, fecha_entrega_renovacion)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', [(e.placa, e.tipo, e.marca, e.modelo, e.serial, e.estado, e.asignado_a, e.email_asignado, e.observaciones, e.fecha_registro, e.fecha_devolucion_prestamo, e.fecha_devolucion_proveedor, e.motivo_devolucion, e.estado_anterior, e.renovacion_placa_asociada, e.fecha_entrega_renovacion) for e in equipos])
+            cursor.executemany('''
+                INSERT INTO log_inventario (equipo_placa, accion, detalles, usuario, fecha) VALUES (?, ?, ?, ?, ?)
+            ''', [(log.equipo_placa, log.accion, log.detalles, log.usuario, log.fecha) for log in logs])
+        for equipo in equipos:
+            self.invalidar_equipo(equipo.placa)
 
-    def get_equipos_activos(self) -> List[Dict]:
-        cursor = self.execute_query("SELECT * FROM equipos WHERE estado != 'Devuelto a Proveedor'")
-        return [dict(row) for row in cursor.fetchall()]
+    def get_all_placas(self) -> set:
+        """Devuelve el conjunto de placas registradas, leído solo del índice de la clave primaria."""
+        cursor = self.execute_query('SELECT placa FROM equipos')
+        return {row[0] for row in cursor}
+
+    @staticmethod
+    def _columnas_proyeccion(columns: Union[str, List[str]]) -> List[str]:
+        """Resuelve el nombre de una vista de VISTAS_EQUIPO o valida una lista de columnas."""
+        columnas = VISTAS_EQUIPO.get(columns) if isinstance(columns, str) else columns
+        if not columnas:
+            raise ValueError(f"Vista no válida: '{columns}'")
+        for columna in columnas:
+            if columna not in EQUIPO_COLUMNAS:
+                raise ValueError(f"Columna no válida: '{columna}'")
+        return list(columnas)
+
+    def _iter_equipos(self, condicion: str = "", params: tuple = (), columns: Union[str, List[str], None] = None,
+                      batch_size: Optional[int] = None, join: str = "") -> Iterator[Union[Equipo, Dict]]:
+        """
+        Recorre los equipos (alias 'e') que cumplen la condición. Sin 'columns' devuelve objetos Equipo
+        completos; con una lista de columnas o una vista de VISTAS_EQUIPO, diccionarios solo con esas columnas.
+        """
+        columnas = EQUIPO_COLUMNAS if columns is None else self._columnas_proyeccion(columns)
+        query = sql_equipos(columnas, condicion, join)
+        return self.iter_query(query, params, batch_size, modelo=Equipo if columns is None else None)
+
+    def iter_all_equipos(self, batch_size: Optional[int] = None,
+                         columns: Union[str, List[str], None] = None) -> Iterator[Union[Equipo, Dict]]:
+        return self._iter_equipos(columns=columns, batch_size=batch_size)
+
+    def get_all_equipos(self, columns: Union[str, List[str], None] = None) -> List[Union[Equipo, Dict]]:
+        return list(self.iter_all_equipos(columns=columns))
+
+    def find_equipos(self, estado=None, tipo=None, marca=None, asignado_a=None,
+                     columns: Optional[List[str]] = None, no_nulos: Optional[List[str]] = None,
+                     order_by: Optional[str] = None, batch_size: Optional[int] = None) -> Iterator[Dict]:
+        """
+        Busca equipos filtrando y proyectando columnas en SQL ('columns' admite el nombre de una
+        vista de VISTAS_EQUIPO). Cada filtro acepta un valor o una lista de valores; 'no_nulos' exige que las columnas indicadas tengan valor.
+        Los resultados se devuelven como un generador que lee por bloques.
+        """
+        columnas = self._columnas_proyeccion(columns or EQUIPO_COLUMNAS)
+        for columna in list(no_nulos or []) + ([order_by] if order_by else []):
+            if columna not in EQUIPO_COLUMNAS:
+                raise ValueError(f"Columna no válida: '{columna}'")
+
+        condiciones, params = [], []
+        for columna, valor in (("estado", estado), ("tipo", tipo), ("marca", marca), ("asignado_a", asignado_a)):
+            if valor is None:
+                continue
+            if isinstance(valor, (list, tuple, set)):
+                condiciones.append(f"{columna} IN ({', '.join('?' for _ in valor)})")
+                params.extend(valor)
+            else:
+                condiciones.append(f"{columna} = ?")
+                params.append(valor)
+        for columna in no_nulos or []:
+            condiciones.append(f"{columna} IS NOT NULL AND {columna} != ''")
+
+        query = f"SELECT {', '.join(columnas)} FROM equipos"
+        if condiciones:
+            query += " WHERE " + " AND ".join(condiciones)
+        if order_by:
+            query += f" ORDER BY {order_by}"
+
+        yield from self.iter_query(query, tuple(params), batch_size)
+
+    def find_equipos_por_vencimiento(self, columna_fecha: str, antes_de: str, estado: Optional[str] = None,
+                                     columns: Optional[List[str]] = None, batch_size: Optional[int] = None) -> Iterator[Dict]:
+        """
+        Recorre los equipos cuya fecha de vencimiento (AAAA-MM-DD) es anterior a 'antes_de',
+        ordenados de la más antigua a la más reciente. Con 'estado' la consulta es un rango
+        sobre el índice (estado, fecha).
+        """
+        columnas = columns or EQUIPO_COLUMNAS
+        if columna_fecha not in COLUMNAS_FECHA_VENCIMIENTO:
+            raise ValueError(f"Columna de vencimiento no válida: '{columna_fecha}'")
+        for columna in columnas:
+            if columna not in EQUIPO_COLUMNAS:
+                raise ValueError(f"Columna no válida: '{columna}'")
+
+        params = (antes_de,) if estado is None else (estado, antes_de)
+        query = sql_equipos_por_vencimiento(columna_fecha, columnas, con_estado=estado is not None)
+        yield from self.iter_query(query, params, batch_size)
+
+    def count_equipos_por_vencimiento(self, columna_fecha: str, antes_de: str, estado: str) -> int:
+        """Cuenta los equipos en 'estado' con fecha de vencimiento anterior a 'antes_de', solo con el índice parcial."""
+        if columna_fecha not in COLUMNAS_FECHA_VENCIMIENTO:
+            raise ValueError(f"Columna de vencimiento no válida: '{columna_fecha}'")
+        result = self.execute_query(sql_conteo_por_vencimiento(columna_fecha), (estado, antes_de)).fetchone()
+        return result[0] if result else 0
+
+    def iter_equipos_activos(self, batch_size: Optional[int] = None,
+                             columns: Union[str, List[str], None] = None) -> Iterator[Union[Equipo, Dict]]:
+        return self._iter_equipos("e.estado != 'Devuelto a Proveedor'", columns=columns, batch_size=batch_size)
+
+    def get_equipos_activos(self, columns: Union[str, List[str], None] = None) -> List[Union[Equipo, Dict]]:
+        return list(self.iter_equipos_activos(columns=columns))
 
     def count_equipos_activos(self) -> int:
         """Cuenta el número total de equipos activos."""
@@ -191,154 +971,631 @@ class DatabaseManager:
         result = cursor.fetchone()
         return result[0] if result else 0
 
-    def get_equipos_activos_paginated(self, page: int = 1, page_size: int = 20) -> List[Dict]:
-        """Obtiene equipos activos de forma paginada y ordenada."""
-        offset = (page - 1) * page_size
+    def _count_grouped(self, columna: str, estados: Optional[List[str]] = None) -> Dict[str, int]:
+        cursor = self.execute_query(sql_conteo_agrupado(columna, len(estados or [])), tuple(estados or []))
+        return {row[0]: row[1] for row in cursor.fetchall()}
+
+    def count_by_estado(self) -> Dict[str, int]:
+        """Cuenta los equipos agrupados por estado."""
+        return self._count_grouped("estado")
+
+    def count_by_tipo(self, estados: Optional[List[str]] = None) -> Dict[str, int]:
+        """Cuenta los equipos agrupados por tipo, opcionalmente solo en los estados indicados."""
+        return self._count_grouped("tipo", estados)
+
+    def count_by_marca(self, estados: Optional[List[str]] = None) -> Dict[str, int]:
+        """Cuenta los equipos agrupados por marca, opcionalmente solo en los estados indicados."""
+        return self._count_grouped("marca", estados)
+
+    def count_renovaciones_pendientes(self) -> int:
+        """Cuenta las renovaciones pendientes (solo el equipo a devolver tiene fecha de entrega)."""
+        query = "SELECT COUNT(*) FROM equipos WHERE estado = 'Renovación' AND fecha_entrega_renovacion IS NOT NULL AND fecha_entrega_renovacion != ''"
+        cursor = self.execute_query(query)
+        result = cursor.fetchone()
+        return result[0] if result else 0
+
+    # --- Paginación por clave (estado, placa) de los equipos activos ---
+    # El orden de listado muestra primero los estados distintos de "Asignado" (alfabéticamente)
+    # y al final los asignados; dentro de cada estado se ordena por placa.
+    @staticmethod
+    def _rango_estado(estado: str) -> tuple:
+        return (estado == 'Asignado', estado)
+
+    def get_orden_estados_activos(self, conteo_estados: Dict[str, int]) -> List[str]:
+        """Devuelve los estados activos presentes en el orden de listado."""
+        return sorted((e for e, n in conteo_estados.items() if e != 'Devuelto a Proveedor' and n > 0), key=self._rango_estado)
+
+    def get_equipos_activos_seek(self, orden_estados: List[str], clave: Optional[tuple] = None, limit: int = 20,
+                                 incluir_clave: bool = True, descendente: bool = False) -> List[Dict]:
+        """
+        Obtiene hasta 'limit' equipos activos a partir de la clave (estado, placa), hacia delante
+        o hacia atrás. Cada tramo es una búsqueda sobre el índice (estado, placa), sin OFFSET.
+        """
+        estados = list(reversed(orden_estados)) if descendente else list(orden_estados)
+        if clave:
+            rango_clave = self._rango_estado(clave[0])
+            if descendente:
+                estados = [e for e in estados if self._rango_estado(e) <= rango_clave]
+            else:
+                estados = [e for e in estados if self._rango_estado(e) >= rango_clave]
+
+        filas = []
+        for estado in estados:
+            con_clave = bool(clave) and estado == clave[0]
+            query = sql_equipos_activos_seek(con_clave, incluir_clave, descendente)
+            params = (estado,) + ((clave[1],) if con_clave else ()) + (limit - len(filas),)
+            filas.extend(dict(row) for row in self.execute_query(query, params).fetchall())
+            if len(filas) >= limit:
+                break
+        return filas
+
+    def get_posicion_equipo_activo(self, conteo_estados: Dict[str, int], clave: tuple) -> int:
+        """Cuenta los equipos activos que preceden a la clave (estado, placa) en el orden de listado."""
+        rango_clave = self._rango_estado(clave[0])
+        anteriores = sum(conteo_estados[e] for e in self.get_orden_estados_activos(conteo_estados) if self._rango_estado(e) < rango_clave)
+        cursor = self.execute_query("SELECT COUNT(*) FROM equipos WHERE estado = ? AND placa < ?", clave)
+        return anteriores + cursor.fetchone()[0]
+
+    def get_clave_equipo_activo_en_posicion(self, conteo_estados: Dict[str, int], posicion: int) -> Optional[tuple]:
+        """Devuelve la clave (estado, placa) del equipo activo en la posición indicada (base 0)."""
+        for estado in self.get_orden_estados_activos(conteo_estados):
+            if posicion < conteo_estados[estado]:
+                cursor = self.execute_query("SELECT placa FROM equipos WHERE estado = ? ORDER BY placa LIMIT 1 OFFSET ?", (estado, posicion))
+                row = cursor.fetchone()
+                return (estado, row[0]) if row else None
+            posicion -= conteo_estados[estado]
+        return None
+
+    def version_datos(self, *tablas: str) -> tuple:
+        """
+        Versión de las tablas indicadas (todas las de TABLAS_VERSIONADAS si no se indica ninguna).
+        La incrementan los triggers con cualquier cambio, propio o de otro proceso, pero no con los
+        logs. La tabla de versiones solo se vuelve a leer si PRAGMA data_version o los cambios de la
+        propia conexión se han movido, así que sin escrituras cuesta un PRAGMA.
+        """
+        conn = self.conn
+        marca = (conn.execute("PRAGMA data_version").fetchone()[0], conn.total_changes)
+        if getattr(self._local, "versiones_marca", None) != marca:
+            self._local.versiones = dict(conn.execute("SELECT tabla, version FROM versiones_datos").fetchall())
+            self._local.versiones_marca = marca
+        return tuple(self._local.versiones.get(tabla, 0) for tabla in tablas or TABLAS_VERSIONADAS)
+
+    def iter_equipos_activos_con_resumen(self, batch_size: Optional[int] = None) -> Iterator[Dict]:
+        """Recorre los equipos activos junto con los datos de su último movimiento."""
+        self.esperar_logs()
         query = """
-            SELECT placa, tipo, estado, asignado_a
-            FROM equipos
-            WHERE estado != 'Devuelto a Proveedor'
-            ORDER BY
-                CASE
-                    WHEN estado = 'Asignado' THEN 1
-                    ELSE 0
-                END,
-                estado
-            LIMIT ? OFFSET ?
-        """
-        cursor = self.execute_query(query, (page_size, offset))
-        return [dict(row) for row in cursor.fetchall()]
+            SELECT e.*, r.num_movimientos, r.ultima_fecha, r.ultimo_usuario, r.ultima_accion, r.ultimos_detalles
+            FROM equipos e
+            LEFT JOIN log_resumen r ON r.equipo_placa = e.placa
+            WHERE e.estado != 'Devuelto a Proveedor'
+        """
+        return self.iter_query(query, batch_size=batch_size)
 
-    def get_equipos_devueltos(self) -> List[Dict]:
-        cursor = self.execute_query("SELECT * FROM equipos WHERE estado = 'Devuelto a Proveedor'")
-        return [dict(row) for row in cursor.fetchall()]
+    def get_equipos_activos_con_resumen(self) -> List[Dict]:
+        """Obtiene los equipos activos junto con los datos de su último movimiento."""
+        return list(self.iter_equipos_activos_con_resumen())
+
+    def iter_equipos_devueltos(self, batch_size: Optional[int] = None,
+                               columns: Union[str, List[str], None] = None) -> Iterator[Union[Equipo, Dict]]:
+        return self._iter_equipos(CONDICION_EQUIPOS_DEVUELTOS, ('Devuelto a Proveedor',), columns, batch_size)
+
+    def get_equipos_devueltos(self, columns: Union[str, List[str], None] = None) -> List[Union[Equipo, Dict]]:
+        return list(self.iter_equipos_devueltos(columns=columns))
         
-    def get_new_equipos(self) -> List[Dict]:
+    def get_new_equipos(self, columns: Union[str, List[str], None] = None) -> List[Union[Equipo, Dict]]:
         """Obtiene equipos que solo tienen un movimiento en el log (su registro)."""
-        query = """
-            SELECT e.* FROM equipos e
-            JOIN (
-                SELECT equipo_placa, COUNT(id) as count
-                FROM log_inventario
-                GROUP BY equipo_placa
-            ) AS log_counts ON e.placa = log_counts.equipo_placa
-            WHERE log_counts.count = 1 AND e.estado = 'Disponible'
-        """
-        cursor = self.execute_query(query)
-        return [dict(row) for row in cursor.fetchall()]
+        self.esperar_logs()
+        return list(self._iter_equipos(CONDICION_EQUIPOS_NUEVOS, columns=columns, join=JOIN_LOG_RESUMEN))
 
-    def get_available_not_new_equipos(self) -> List[Dict]:
+    def get_available_not_new_equipos(self, columns: Union[str, List[str], None] = None) -> List[Union[Equipo, Dict]]:
         """Obtiene equipos disponibles que ya han tenido movimientos."""
-        query = """
-            SELECT e.* FROM equipos e
-            JOIN (
-                SELECT equipo_placa, COUNT(id) as count
-                FROM log_inventario
-                GROUP BY equipo_placa
-            ) AS log_counts ON e.placa = log_counts.equipo_placa
-            WHERE log_counts.count > 1 AND e.estado = 'Disponible'
+        self.esperar_logs()
+        return list(self._iter_equipos(CONDICION_EQUIPOS_USADOS, columns=columns, join=JOIN_LOG_RESUMEN))
+
+    # --- Caché de equipos por placa ---
+    def _cache_equipos(self) -> OrderedDict:
         """
-        cursor = self.execute_query(query)
-        return [dict(row) for row in cursor.fetchall()]
+        Caché LRU del hilo actual. Las escrituras propias la invalidan explícitamente. Cuando otra
+        conexión (otro proceso, otro hilo o el escritor de logs) confirma cambios, PRAGMA data_version
+        se mueve y se comprueba la versión de equipos: solo se vacía si cambió esa tabla.
+        """
+        data_version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+        cache = getattr(self._local, "cache_equipos", None)
+        if cache is not None and self._local.cache_data_version == data_version:
+            return cache
+        version = self.version_datos("equipos")
+        if cache is None or self._local.cache_version != version:
+            cache = self._local.cache_equipos = OrderedDict()
+        self._local.cache_data_version = data_version
+        self._local.cache_version = version
+        return cache
 
-    def get_equipo_by_placa(self, placa: str) -> Optional[Dict]:
-        cursor = self.execute_query('SELECT * FROM equipos WHERE placa = ?', (placa,))
-        row = cursor.fetchone()
-        return dict(row) if row else None
+    def invalidar_equipo(self, placa: str):
+        cache = getattr(self._local, "cache_equipos", None)
+        if cache is not None:
+            cache.pop(placa, None)
+
+    def limpiar_cache_equipos(self):
+        self._local.cache_equipos = None
+
+    def estadisticas_cache_equipos(self) -> Dict:
+        consultas = self.cache_equipos_aciertos + self.cache_equipos_fallos
+        cache = getattr(self._local, "cache_equipos", None)
+        return {
+            "aciertos": self.cache_equipos_aciertos,
+            "fallos": self.cache_equipos_fallos,
+            "tasa_aciertos": self.cache_equipos_aciertos / consultas if consultas else 0.0,
+            "en_cache": len(cache) if cache else 0,
+            "capacidad": TAMANO_CACHE_EQUIPOS,
+        }
+
+    def get_equipo_by_placa(self, placa: str) -> Optional[Equipo]:
+        """
+        Devuelve el equipo (o None). La caché guarda la tupla de la fila y cada llamada recibe
+        su propio Equipo, que puede modificar sin afectar a la caché.
+        """
+        cache = self._cache_equipos()
+        if placa in cache:
+            cache.move_to_end(placa)
+            self.cache_equipos_aciertos += 1
+            fila = cache[placa]
+        else:
+            self.cache_equipos_fallos += 1
+            cursor = self.execute_query(f'SELECT {SQL_COLUMNAS_EQUIPO} FROM equipos WHERE placa = ?', (placa,))
+            row = cursor.fetchone()
+            fila = tuple(row) if row else None
+            cache[placa] = fila
+            if len(cache) > TAMANO_CACHE_EQUIPOS:
+                cache.popitem(last=False)
+        return Equipo(*fila) if fila else None
 
     def update_equipo(self, equipo: Equipo):
-        self.execute_query('''
+        """
+        Guarda el equipo solo si nadie lo modificó desde que se leyó (misma versión).
+        Si otro usuario se adelantó, lanza ConflictoEdicion con la fila vigente y no cambia nada.
+        """
+        cursor = self.execute_query('''
             UPDATE equipos SET tipo = ?, marca = ?, modelo = ?, serial = ?, estado = ?, asignado_a = ?,
             email_asignado = ?, observaciones = ?, fecha_devolucion_prestamo = ?, fecha_devolucion_proveedor = ?,
-            motivo_devolucion = ?, estado_anterior = ?, renovacion_placa_asociada = ?, fecha_entrega_renovacion = ?
-            WHERE placa = ?
+            motivo_devolucion = ?, estado_anterior = ?, renovacion_placa_asociada = ?, fecha_entrega_renovacion = ?,
+            version = version + 1
+            WHERE placa = ? AND version = ?
         ''', (equipo.tipo, equipo.marca, equipo.modelo, equipo.serial, equipo.estado, equipo.asignado_a,
               equipo.email_asignado, equipo.observaciones, equipo.fecha_devolucion_prestamo,
               equipo.fecha_devolucion_proveedor, equipo.motivo_devolucion, equipo.estado_anterior, 
-              equipo.renovacion_placa_asociada, equipo.fecha_entrega_renovacion, equipo.placa))
+              equipo.renovacion_placa_asociada, equipo.fecha_entrega_renovacion, equipo.placa, equipo.version))
+        self.invalidar_equipo(equipo.placa)
+        if cursor.rowcount == 0:
+            raise ConflictoEdicion(equipo, self.get_equipo_by_placa(equipo.placa))
+        # Si la transacción que contiene el UPDATE se revierte, el objeto vuelve a la versión
+        # guardada; si no, un reintento con él chocaría siempre con su propia versión.
+        version_leida = equipo.version
+        equipo.version += 1
+        self.al_revertir(lambda: setattr(equipo, "version", version_leida))
         self.commit()
 
     def delete_equipo(self, placa: str):
-        self.execute_query('DELETE FROM equipos WHERE placa = ?', (placa,))
-        self.commit()
+        """
+        Elimina el equipo con todo su historial, como hacía el borrado en cascada antes del archivo
+        anual: los movimientos vivos caen en cascada, el resumen se borra (seguía contando los
+        archivados) y, al confirmarse, se borran también sus movimientos archivados. Así una placa
+        registrada de nuevo empieza sin historial.
+        """
+        with self.transaction():
+            anios = self._anios_archivados_placa(placa)
+            self.execute_query('DELETE FROM equipos WHERE placa = ?', (placa,))
+            self.execute_query('DELETE FROM log_resumen WHERE equipo_placa = ?', (placa,))
+            if anios:
+                self.al_confirmar(lambda: self._borrar_archivados_placa(placa, anios))
+        self.invalidar_equipo(placa)
+
+    def _borrar_archivados_placa(self, placa: str, anios: List[int]):
+        """Borra de los archivos anuales los movimientos de una placa eliminada."""
+        try:
+            for inicio in range(0, len(anios), MAX_ARCHIVOS_ADJUNTOS):
+                grupo = anios[inicio:inicio + MAX_ARCHIVOS_ADJUNTOS]
+                esquemas = self._adjuntar_archivos(grupo)
+                with self.transaction():
+                    for anio, esquema in zip(grupo, esquemas):
+                        borradas = self.execute_query(
+                            f"DELETE FROM {esquema}.log_inventario WHERE equipo_placa = ?", (placa,)).rowcount
+                        if borradas > 0:
+                            self.execute_query(
+                                "UPDATE archivos_log SET filas_log_inventario = filas_log_inventario - ? WHERE anio = ?",
+                                (borradas, anio))
+        except sqlite3.Error as e:
+            print(Fore.YELLOW + f"⚠️ No se pudo borrar el historial archivado del equipo {placa}: {e}" + Style.RESET_ALL)
 
     # --- Métodos para Logs ---
-    def insert_log_inventario(self, log: LogInventario):
-        self.execute_query('''
-            INSERT INTO log_inventario (equipo_placa, accion, detalles, usuario, fecha) VALUES (?, ?, ?, ?, ?)
-        ''', (log.equipo_placa, log.accion, log.detalles, log.usuario, log.fecha))
+    def _insertar_log(self, log: Union[LogInventario, LogSistema]):
+        if isinstance(log, LogInventario):
+            self.execute_query('''
+                INSERT INTO log_inventario (equipo_placa, accion, detalles, usuario, fecha) VALUES (?, ?, ?, ?, ?)
+            ''', (log.equipo_placa, log.accion, log.detalles, log.usuario, log.fecha))
+        else:
+            self.execute_query('''
+                INSERT INTO log_sistema (accion, detalles, usuario, fecha) VALUES (?, ?, ?, ?)
+            ''', (log.accion, log.detalles, log.usuario, log.fecha))
+
+    def _guardar_log(self, log: Union[LogInventario, LogSistema]):
+        """
+        Dentro de una transacción el log forma parte de ella. Fuera de una transacción, en modo
+        asíncrono se encola para el hilo escritor; en modo síncrono se guarda con su propio commit.
+        """
+        if self.logs_asincronos and self._transaction_depth == 0 and not self.escritor_logs.en_hilo_escritor():
+            self.escritor_logs.encolar(log)
+            return
+        self._insertar_log(log)
         self.commit()
 
+    def esperar_logs(self):
+        """
+        Antes de leer logs: se asegura de que los encolados ya estén guardados, incluido el lote que
+        el hilo escritor tenga en curso. Dentro de una transacción eso ya se hizo al abrirla y aquí
+        solo se escribe lo encolado después. Los que el hilo escritor no pudo guardar se reintentan
+        aquí; si vuelven a fallar, el error llega al llamador y los logs siguen pendientes.
+        """
+        if self.escritor_logs.pendientes:
+            if self._transaction_depth > 0:
+                self.escritor_logs.escribir_pendientes_aqui()
+            else:
+                self.escritor_logs.vaciar()
+        fallidos = self.escritor_logs.recuperar_fallidos()
+        if fallidos:
+            try:
+                self.escritor_logs.guardar_lote(fallidos)
+            except sqlite3.Error:
+                self.escritor_logs.devolver_fallidos(fallidos)
+                raise
+
+    def insert_log_inventario(self, log: LogInventario):
+        self._guardar_log(log)
+
     def count_movimientos_by_placa(self, placa: str) -> int:
-        cursor = self.execute_query('SELECT COUNT(id) FROM log_inventario WHERE equipo_placa = ?', (placa,))
+        self.esperar_logs()
+        cursor = self.execute_query('SELECT num_movimientos FROM log_resumen WHERE equipo_placa = ?', (placa,))
         result = cursor.fetchone()
         return result[0] if result else 0
         
-    def get_log_by_placa(self, placa: str, limit: Optional[int] = None) -> List[Dict]:
+    def iter_log_by_placa(self, placa: str, limit: Optional[int] = None, batch_size: Optional[int] = None) -> Iterator[LogInventario]:
+        """
+        Recorre el historial de movimientos de una placa, del más reciente al más antiguo.
+        Los archivos solo se consultan si la placa tiene movimientos archivados y los vivos no bastan.
+        """
+        self.esperar_logs()
+        anios = self._anios_archivados_placa(placa, limit)
+        return self._iter_log_con_archivos("log_inventario", "WHERE equipo_placa = ?", (placa,), anios, limit, batch_size)
+
+    def get_log_by_placa(self, placa: str, limit: Optional[int] = None) -> List[LogInventario]:
         """Obtiene el historial de movimientos para una placa, con un límite opcional."""
-        query = 'SELECT * FROM log_inventario WHERE equipo_placa = ? ORDER BY fecha DESC'
-        if limit:
-            query += f' LIMIT {limit}'
-        cursor = self.execute_query(query, (placa,))
-        return [dict(row) for row in cursor.fetchall()]
+        return list(self.iter_log_by_placa(placa, limit))
 
     def insert_log_sistema(self, log: LogSistema):
-        self.execute_query('''
-            INSERT INTO log_sistema (accion, detalles, usuario, fecha) VALUES (?, ?, ?, ?)
-        ''', (log.accion, log.detalles, log.usuario, log.fecha))
-        self.commit()
+        self._guardar_log(log)
 
-    def get_all_log_inventario(self) -> List[Dict]:
-        cursor = self.execute_query('SELECT * FROM log_inventario ORDER BY fecha DESC')
-        return [dict(row) for row in cursor.fetchall()]
+    def iter_all_log_inventario(self, limit: Optional[int] = None, batch_size: Optional[int] = None) -> Iterator[LogInventario]:
+        self.esperar_logs()
+        anios = []
+        if not limit or self._contar_hasta("log_inventario", limit) < limit:
+            anios = self._anios_archivados("log_inventario")
+        return self._iter_log_con_archivos("log_inventario", "", (), anios, limit, batch_size)
 
-    def get_all_log_sistema(self) -> List[Dict]:
-        cursor = self.execute_query('SELECT * FROM log_sistema ORDER BY fecha DESC')
-        return [dict(row) for row in cursor.fetchall()]
+    def get_all_log_inventario(self, limit: Optional[int] = None) -> List[LogInventario]:
+        return list(self.iter_all_log_inventario(limit))
+
+    def iter_all_log_sistema(self, batch_size: Optional[int] = None) -> Iterator[LogSistema]:
+        self.esperar_logs()
+        anios = self._anios_archivados("log_sistema")
+        return self._iter_log_con_archivos("log_sistema", "", (), anios, batch_size=batch_size)
 
-    def get_last_movimiento_by_placa(self, placa: str) -> Optional[Dict]:
-        cursor = self.execute_query('SELECT * FROM log_inventario WHERE equipo_placa = ? ORDER BY fecha DESC LIMIT 1', (placa,))
+    def get_all_log_sistema(self) -> List[LogSistema]:
+        return list(self.iter_all_log_sistema())
+
+    def get_last_movimiento_by_placa(self, placa: str) -> Optional[LogInventario]:
+        self.esperar_logs()
+        cursor = self.execute_query(SQL_ULTIMO_LOG_PLACA, (placa,))
         row = cursor.fetchone()
-        return dict(row) if row else None
+        if row:
+            return LogInventario(*row)
+        # Sin movimientos vivos, el último puede estar en un archivo.
+        return next(self.iter_log_by_placa(placa, limit=1), None)
 
-    def get_last_log_by_action(self, placa: str, accion: str) -> Optional[Dict]:
+    def get_last_log_by_action(self, placa: str, accion: str) -> Optional[LogInventario]:
         """Obtiene el último registro de log para una placa y acción específicas."""
-        cursor = self.execute_query('SELECT * FROM log_inventario WHERE equipo_placa = ? AND accion = ? ORDER BY fecha DESC LIMIT 1', (placa, accion))
+        self.esperar_logs()
+        cursor = self.execute_query(SQL_ULTIMO_LOG_PLACA_ACCION, (placa, accion))
         row = cursor.fetchone()
-        return dict(row) if row else None
+        if row:
+            return LogInventario(*row)
+        anios = self._anios_archivados_placa(placa)
+        if not anios:
+            return None
+        return next(self._iter_log_con_archivos("log_inventario", "WHERE equipo_placa = ? AND accion = ?",
+                                                (placa, accion), anios, limit=1), None)
         
     def get_last_movimientos_by_user(self, usuario: str, limit: int = 10) -> List[Dict]:
         """Obtiene los últimos movimientos de inventario realizados por un usuario específico."""
-        query = """
-            SELECT
-                li.fecha,
-                li.equipo_placa,
-                e.marca,
-                li.accion,
-                li.detalles
-            FROM
-                log_inventario li
-            LEFT JOIN
-                equipos e ON li.equipo_placa = e.placa
-            WHERE
-                li.usuario = ?
-            ORDER BY
-                li.fecha DESC
-            LIMIT ?
-        """
-        cursor = self.execute_query(query, (usuario, limit))
+        self.esperar_logs()
+        cursor = self.execute_query(SQL_ULTIMOS_MOVIMIENTOS_USUARIO, (usuario, limit))
         return [dict(row) for row in cursor.fetchall()]
 
-    def get_movimientos_en_rango_de_fechas(self, fecha_inicio: str, fecha_fin: str) -> List[Dict]:
+    def iter_movimientos_en_rango_de_fechas(self, fecha_inicio: str, fecha_fin: str, batch_size: Optional[int] = None) -> Iterator[LogInventario]:
+        """Recorre los movimientos de inventario dentro de un rango de fechas, incluidos los archivos que lo cubren."""
+        self.esperar_logs()
+        anios = self._anios_archivados("log_inventario", fecha_inicio, fecha_fin)
+        return self._iter_log_con_archivos("log_inventario", "WHERE fecha BETWEEN ? AND ?",
+                                           (fecha_inicio, fecha_fin), anios, batch_size=batch_size)
+
+    def get_movimientos_en_rango_de_fechas(self, fecha_inicio: str, fecha_fin: str) -> List[LogInventario]:
         """Obtiene todos los movimientos de inventario dentro de un rango de fechas."""
-        query = """
-            SELECT * FROM log_inventario
-            WHERE fecha BETWEEN ? AND ?
-            ORDER BY fecha DESC
+        return list(self.iter_movimientos_en_rango_de_fechas(fecha_inicio, fecha_fin))
+
+    # --- Archivo anual de logs ---
+    def ruta_archivo_log(self, anio: int) -> str:
+        """Ruta del archivo de un año, junto a la base: inventario.db -> inventario_archivo_AAAA.db."""
+        base, _ = os.path.splitext(self.db_name)
+        return f"{base}_archivo_{anio}.db"
+
+    def _adjuntar_archivos(self, anios: List[int], crear: bool = False) -> List[str]:
+        """
+        Adjunta (ATTACH) a la conexión del hilo los archivos de los años indicados y devuelve sus
+        esquemas. Si no caben, se separan antes los archivos adjuntos que no se necesitan.
+        """
+        conn = self.conn
+        adjuntos = {row[1] for row in conn.execute("PRAGMA database_list") if row[1].startswith("archivo_")}
+        esquemas = [f"archivo_{anio}" for anio in anios]
+        if len(adjuntos | set(esquemas)) > MAX_ARCHIVOS_ADJUNTOS:
+            for esquema in adjuntos - set(esquemas):
+                try:
+                    conn.execute(f"DETACH DATABASE {esquema}")
+                    adjuntos.discard(esquema)
+                except sqlite3.OperationalError:
+                    pass  # Todavía lo usa una consulta abierta.
+        for anio, esquema in zip(anios, esquemas):
+            if esquema not in adjuntos:
+                ruta = self.ruta_archivo_log(anio)
+                if not crear and not os.path.exists(ruta):
+                    raise sqlite3.OperationalError(f"No se encuentra el archivo de logs {ruta}")
+                conn.execute(f"ATTACH DATABASE ? AS {esquema}", (ruta,))
+            if crear:
+                with self.transaction():
+                    for sentencia in ESQUEMA_ARCHIVO_LOG:
+                        self.execute_query(sentencia.format(esquema=esquema))
+        return esquemas
+
+    def _anios_archivados(self, tabla: str, desde: Optional[str] = None, hasta: Optional[str] = None) -> List[int]:
+        """Años con filas archivadas de la tabla; con desde/hasta, solo los que se solapan con el rango."""
+        query = f"SELECT anio FROM archivos_log WHERE filas_{tabla} > 0"
+        params = []
+        if hasta is not None:
+            query += " AND fecha_min <= ?"
+            params.append(hasta)
+        if desde is not None:
+            query += " AND fecha_max >= ?"
+            params.append(desde)
+        return [row[0] for row in self.execute_query(query + " ORDER BY anio DESC", tuple(params))]
+
+    def _anios_archivados_placa(self, placa: str, limit: Optional[int] = None) -> List[int]:
+        """
+        Años que hay que consultar para el historial de una placa. log_resumen sigue contando los
+        movimientos archivados, así que basta compararlo con los vivos (leídos con el índice).
+        """
+        anios = self._anios_archivados("log_inventario")
+        if not anios:
+            return []
+        vivos = self.execute_query('SELECT COUNT(*) FROM log_inventario WHERE equipo_placa = ?', (placa,)).fetchone()[0]
+        if vivos >= self.count_movimientos_by_placa(placa) or (limit and vivos >= limit):
+            return []
+        return anios
+
+    def _contar_hasta(self, tabla: str, tope: int) -> int:
+        """Cuenta filas de la tabla sin pasar de tope, para no recorrerla entera."""
+        return self.execute_query(f"SELECT COUNT(*) FROM (SELECT 1 FROM {tabla} LIMIT ?)", (int(tope),)).fetchone()[0]
+
+    def _iter_log_con_archivos(self, tabla: str, filtro: str, params: tuple, anios: List[int],
+                               limit: Optional[int] = None, batch_size: Optional[int] = None) -> Iterator[ModeloFila]:
+        """
+        Recorre un log por fecha descendente uniendo (UNION ALL) la tabla viva con los archivos de los
+        años indicados. Sin años es la consulta de siempre sobre la tabla viva. Los archivos son
+        anuales y anteriores a las filas vivas, así que si hay más años de los que se pueden adjuntar
+        a la vez se leen en grupos sucesivos sin perder el orden.
+        """
+        grupos = [["main"] + sorted(anios, reverse=True)]
+        while len(grupos[-1]) > MAX_ARCHIVOS_ADJUNTOS:
+            grupos.append(grupos[-1][MAX_ARCHIVOS_ADJUNTOS:])
+            grupos[-2] = grupos[-2][:MAX_ARCHIVOS_ADJUNTOS]
+        pendientes = int(limit) if limit else None
+        for grupo in grupos:
+            esquemas = [e for e in grupo if e == "main"]
+            esquemas += self._adjuntar_archivos([a for a in grupo if a != "main"])
+            query = sql_log_con_archivos(tabla, filtro, esquemas, pendientes)
+            for fila in self.iter_query(query, params * len(esquemas), batch_size, modelo=MODELOS_LOG[tabla]):
+                yield fila
+                if pendientes:
+                    pendientes -= 1
+                    if pendientes == 0:
+                        return
+
+    def archivar_logs(self, fecha_corte: str, tamano_lote: Optional[int] = None,
+                      progreso: Optional[Callable[[str, int], None]] = None,
+                      tablas: Optional[List[str]] = None) -> Dict[str, int]:
+        """
+        Mueve las filas de log_inventario y log_sistema (o solo las tablas indicadas) anteriores a
+        fecha_corte (AAAA-MM-DD) a archivos anuales. Cada lote se copia y se borra en una transacción;
+        la copia usa INSERT OR IGNORE, así que repetir un lote interrumpido no duplica filas.
+        Devuelve las filas movidas.
+        """
+        self.esperar_logs()
+        tamano = tamano_lote or TAMANO_LOTE_ARCHIVO
+        movidas = {tabla: 0 for tabla in tablas or COLUMNAS_LOG}
+        for tabla in movidas:
+            columnas = COLUMNAS_LOG[tabla]
+            while True:
+                # Lo ya archivado se borra, así que la fecha mínima restante indica el siguiente año.
+                minima = self.execute_query(f"SELECT MIN(fecha) FROM {tabla} WHERE fecha < ?", (fecha_corte,)).fetchone()[0]
+                if minima is None:
+                    break
+                anio = int(minima[:4])
+                esquema = self._adjuntar_archivos([anio], crear=True)[0]
+                desde, hasta = f"{anio}-01-01", min(f"{anio + 1}-01-01", fecha_corte)
+                while True:
+                    with self.transaction():
+                        filas = self.execute_query(sql_lote_archivado(tabla), (desde, hasta, tamano)).fetchall()
+                        if not filas:
+                            break
+                        ids = tuple(fila[0] for fila in filas)
+                        marcadores = ", ".join("?" * len(ids))
+                        self.execute_query("UPDATE control_archivado SET activo = 1 WHERE id = 1")
+                        self.execute_query(
+                            f"INSERT OR IGNORE INTO {esquema}.{tabla} ({columnas}) "
+                            f"SELECT {columnas} FROM main.{tabla} WHERE id IN ({marcadores})", ids)
+                        self.execute_query(f"DELETE FROM main.{tabla} WHERE id IN ({marcadores})", ids)
+                        self.execute_query("UPDATE control_archivado SET activo = 0 WHERE id = 1")
+                        self.execute_query(f'''
+                            INSERT INTO archivos_log (anio, ruta, fecha_min, fecha_max, filas_{tabla}) VALUES (?, ?, ?, ?, ?)
+                            ON CONFLICT(anio) DO UPDATE SET
+                                fecha_min = MIN(fecha_min, excluded.fecha_min),
+                                fecha_max = MAX(fecha_max, excluded.fecha_max),
+                                filas_{tabla} = filas_{tabla} + excluded.filas_{tabla}
+                        ''', (anio, os.path.basename(self.ruta_archivo_log(anio)), filas[0][1], filas[-1][1], len(ids)))
+                    movidas[tabla] += len(ids)
+                    if progreso:
+                        progreso(tabla, movidas[tabla])
+        return movidas
+
+    def eliminar_log_sistema_anterior(self, fecha_corte: str, tamano_lote: Optional[int] = None) -> int:
+        """Borra por lotes las filas de log_sistema anteriores a fecha_corte. Devuelve las filas borradas."""
+        self.esperar_logs()
+        tamano = tamano_lote or TAMANO_LOTE_ARCHIVO
+        borradas = 0
+        while True:
+            with self.transaction():
+                cursor = self.execute_query(
+                    "DELETE FROM log_sistema WHERE id IN (SELECT id FROM log_sistema WHERE fecha < ? ORDER BY fecha, id LIMIT ?)",
+                    (fecha_corte, tamano))
+            if cursor.rowcount <= 0:
+                return borradas
+            borradas += cursor.rowcount
+
+    def get_archivos_log(self) -> List[Dict]:
+        return [dict(row) for row in self.execute_query("SELECT * FROM archivos_log ORDER BY anio")]
+
+    def contar_logs_anteriores(self, fecha_corte: str) -> Dict[str, int]:
+        """Filas de cada log anteriores a la fecha de corte (lo que movería archivar_logs)."""
+        self.esperar_logs()
+        return {tabla: self.execute_query(f"SELECT COUNT(*) FROM {tabla} WHERE fecha < ?", (fecha_corte,)).fetchone()[0]
+                for tabla in COLUMNAS_LOG}
+
+    # --- Índice de búsqueda en memoria ---
+    def iter_claves_busqueda(self, batch_size: Optional[int] = None) -> Iterator[Dict]:
+        return self.iter_query("SELECT placa, serial, asignado_a, email_asignado FROM equipos", batch_size=batch_size)
+
+    def get_claves_busqueda(self, placa: str) -> Optional[Dict]:
+        cursor = self.execute_query("SELECT placa, serial, asignado_a, email_asignado FROM equipos WHERE placa = ?", (placa,))
+        row = cursor.fetchone()
+        return dict(row) if row else None
+
+    def get_rango_cambios_equipos(self) -> tuple:
+        """Devuelve (primer, último) número de secuencia del registro de cambios, o (None, None) si está vacío."""
+        return tuple(self.execute_query("SELECT MIN(seq), MAX(seq) FROM equipos_cambios").fetchone())
+
+    def get_placas_cambiadas_desde(self, seq: int) -> List[str]:
+        cursor = self.execute_query("SELECT DISTINCT placa FROM equipos_cambios WHERE seq > ?", (seq,))
+        return [row[0] for row in cursor.fetchall()]
+
+    # --- Búsqueda de texto completo ---
+    @staticmethod
+    def consulta_fts(texto: str) -> str:
+        """
+        Convierte el texto del usuario en una consulta FTS5 segura: cada término va entre comillas
+        (así 'INC-1234' no se interpreta como operador) y un '*' final se mantiene como prefijo.
+        """
+        terminos = []
+        for termino in texto.split():
+            es_prefijo = termino.endswith("*")
+            termino = termino.rstrip("*").replace('"', '""')
+            if termino:
+                terminos.append(f'"{termino}"' + ("*" if es_prefijo else ""))
+        return " ".join(terminos)
+
+    def _buscar_texto(self, indice: str, columnas: str, tabla: str, columna_id: str, texto: str,
+                      limit: int, marcas: tuple) -> List[Dict]:
+        self.esperar_logs()
+        consulta = self.consulta_fts(texto)
+        if not consulta:
+            return []
+        # FTS5 puntúa con bm25 todas las coincidencias y ordena por rank; el LIMIT se aplica al
+        # resultado ya ordenado, así que los fragmentos y el cruce con la tabla solo se hacen para esas filas.
+        query = f"""
+            SELECT {columnas}, c.fragmento FROM (
+                SELECT rowid, rank, snippet({indice}, -1, ?, ?, '…', 12) AS fragmento
+                FROM {indice} WHERE {indice} MATCH ?
+                ORDER BY rank
+                LIMIT ?
+            ) c
+            JOIN {tabla} t ON t.{columna_id} = c.rowid
+            ORDER BY c.rank
         """
-        cursor = self.execute_query(query, (fecha_inicio, fecha_fin))
+        cursor = self.execute_query(query, (marcas[0], marcas[1], consulta, int(limit)))
         return [dict(row) for row in cursor.fetchall()]
 
+    def buscar_equipos_texto(self, texto: str, limit: int = 20, marcas: tuple = ("[", "]")) -> List[Dict]:
+        """Equipos cuyas observaciones o asignado coinciden con el texto, ordenados por relevancia."""
+        return self._buscar_texto("equipos_fts", "t.placa, t.tipo, t.marca, t.modelo, t.estado", "equipos", "rowid",
+                                  texto, limit, marcas)
+
+    def buscar_log_inventario_texto(self, texto: str, limit: int = 20, marcas: tuple = ("[", "]")) -> List[Dict]:
+        """Movimientos de inventario cuyos detalles coinciden con el texto, ordenados por relevancia."""
+        return self._buscar_texto("log_inventario_fts", "t.id, t.equipo_placa, t.accion, t.usuario, t.fecha", "log_inventario", "id",
+                                  texto, limit, marcas)
+
+    def buscar_log_sistema_texto(self, texto: str, limit: int = 20, marcas: tuple = ("[", "]")) -> List[Dict]:
+        """Registros del log del sistema cuyos detalles coinciden con el texto, ordenados por relevancia."""
+        return self._buscar_texto("log_sistema_fts", "t.id, t.accion, t.usuario, t.fecha", "log_sistema", "id",
+                                  texto, limit, marcas)
+
+    def reconstruir_indice_busqueda(self, indices: Optional[List[str]] = None):
+        """Regenera los índices FTS5 (todos o los indicados) a partir de las tablas originales y los compacta."""
+        with self.transaction():
+            for indice in indices or INDICES_BUSQUEDA:
+                self.execute_query(f"INSERT INTO {indice} ({indice}) VALUES ('rebuild')")
+                self.execute_query(f"INSERT INTO {indice} ({indice}) VALUES ('optimize')")
+
+    # --- Mantenimiento ---
+    def tamano_base(self) -> Dict[str, int]:
+        """Tamaño de la base en disco (archivo principal y WAL) y páginas libres."""
+        wal = self.db_name + "-wal"
+        return {
+            "bytes": os.path.getsize(self.db_name) if os.path.exists(self.db_name) else 0,
+            "bytes_wal": os.path.getsize(wal) if os.path.exists(wal) else 0,
+            "paginas": self.conn.execute("PRAGMA page_count").fetchone()[0],
+            "paginas_libres": self.conn.execute("PRAGMA freelist_count").fetchone()[0],
+            "tamano_pagina": self.conn.execute("PRAGMA page_size").fetchone()[0],
+        }
+
+    def verificar_integridad(self) -> List[str]:
+        """Ejecuta PRAGMA integrity_check; devuelve ['ok'] o la lista de problemas encontrados."""
+        return [row[0] for row in self.conn.execute("PRAGMA integrity_check")]
+
+    def vacuum(self):
+        """
+        Compacta la base con VACUUM y vacía el WAL. VACUUM puede renumerar el rowid implícito de
+        equipos, del que depende equipos_fts, así que ese índice se reconstruye a continuación.
+        """
+        if self._transaction_depth > 0:
+            raise sqlite3.OperationalError("VACUUM no puede ejecutarse dentro de una transacción")
+        with self._write_lock:
+            self.conn.execute("VACUUM")
+            self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        self.reconstruir_indice_busqueda([indice for indice, (tabla, columna_id, _) in INDICES_BUSQUEDA.items()
+                                          if columna_id == "rowid"])
+
+    def analizar(self):
+        """Actualiza las estadísticas del planificador (ANALYZE) y deja que SQLite ajuste lo demás (PRAGMA optimize)."""
+        with self.transaction():
+            self.execute_query("ANALYZE")
+            self.execute_query("PRAGMA optimize")
+
     # --- Métodos para Usuarios ---
     def insert_user(self, user: Usuario):
         self.execute_query('''
@@ -347,10 +1604,10 @@ class DatabaseManager:
         ''', (user.nombre_usuario, user.contrasena_hash, user.rol, user.nombre_completo, int(user.cambio_clave_requerido), int(user.is_active)))
         self.commit()
 
-    def get_user_by_username(self, nombre_usuario: str) -> Optional[Dict]:
-        cursor = self.execute_query('SELECT * FROM usuarios WHERE nombre_usuario = ?', (nombre_usuario,))
+    def get_user_by_username(self, nombre_usuario: str) -> Optional[Usuario]:
+        cursor = self.execute_query(f'SELECT {SQL_COLUMNAS_USUARIO} FROM usuarios WHERE nombre_usuario = ?', (nombre_usuario,))
         row = cursor.fetchone()
-        return dict(row) if row else None
+        return Usuario(*row) if row else None
 
     def update_user(self, user: Usuario):
         self.execute_query('''
@@ -364,20 +1621,51 @@ class DatabaseManager:
         return [dict(row) for row in cursor.fetchall()]
 
     # --- Métodos para Parámetros ---
+    def _catalogo_parametros(self) -> Dict[str, Dict]:
+        """
+        Catálogo completo de parámetros en memoria: por tipo, la lista ordenada y los conjuntos de
+        valores activos e inactivos. Se carga con una sola consulta y se descarta al añadir,
+        cambiar o eliminar un parámetro, o cuando cambia la versión de la tabla parametros.
+        """
+        conn = self.conn
+        clave = (id(conn), self.version_datos("parametros"))
+        if self._cache_parametros is None or self._cache_parametros_clave != clave:
+            catalogo = {}
+            for row in conn.execute('SELECT tipo, valor, is_active FROM parametros ORDER BY tipo, valor'):
+                entrada = catalogo.setdefault(row['tipo'], {"lista": [], "activos": set(), "inactivos": set()})
+                entrada["lista"].append((row['valor'], row['is_active']))
+                entrada["activos" if row['is_active'] else "inactivos"].add(row['valor'])
+            for entrada in catalogo.values():
+                entrada["activos"] = frozenset(entrada["activos"])
+                entrada["inactivos"] = frozenset(entrada["inactivos"])
+            self._cache_parametros = catalogo
+            self._cache_parametros_clave = clave
+        return self._cache_parametros
+
+    def invalidar_parametros(self):
+        self._cache_parametros = None
+
     def add_parametro(self, tipo: str, valor: str):
         self.execute_query('INSERT INTO parametros (tipo, valor, is_active) VALUES (?, ?, 1)', (tipo, valor))
+        self.invalidar_parametros()
         self.commit()
 
     def get_parametros_por_tipo(self, tipo: str, solo_activos: bool = False) -> List[Dict]:
-        query = 'SELECT valor, is_active FROM parametros WHERE tipo = ?'
-        if solo_activos:
-            query += ' AND is_active = 1'
-        query += ' ORDER BY valor'
-        cursor = self.execute_query(query, (tipo,))
-        return [dict(row) for row in cursor.fetchall()]
+        lista = self._catalogo_parametros().get(tipo, {}).get("lista", [])
+        return [{"valor": valor, "is_active": is_active} for valor, is_active in lista if is_active or not solo_activos]
+
+    def get_parametros_activos(self, tipo: str) -> frozenset:
+        return self._catalogo_parametros().get(tipo, {}).get("activos", frozenset())
+
+    def get_parametros_inactivos(self, tipo: str) -> frozenset:
+        return self._catalogo_parametros().get(tipo, {}).get("inactivos", frozenset())
+
+    def es_parametro_activo(self, tipo: str, valor: str) -> bool:
+        return valor in self.get_parametros_activos(tipo)
 
     def update_parametro_status(self, tipo: str, valor: str, new_status: bool):
         self.execute_query('UPDATE parametros SET is_active = ? WHERE tipo = ? AND valor = ?', (int(new_status), tipo, valor))
+        self.invalidar_parametros()
         self.commit()
 
     def is_parametro_in_use(self, tipo_parametro: str, valor: str) -> bool:
@@ -396,9 +1684,40 @@ class DatabaseManager:
         
     def delete_parametro(self, tipo: str, valor: str):
         self.execute_query('DELETE FROM parametros WHERE tipo = ? AND valor = ?', (tipo, valor))
+        self.invalidar_parametros()
         self.commit()
 
-db_manager = DatabaseManager("inventario.db")
+class GestorDiferido:
+    """
+    Crea el DatabaseManager en el primer uso: importar un módulo no abre la base de datos ni
+    aplica migraciones. Cualquier atributo se reenvía al gestor real.
+    """
+
+    def __init__(self, db_name: str):
+        self._db_name = db_name
+        self._gestor: Optional[DatabaseManager] = None
+        self._lock = threading.Lock()
+
+    @property
+    def iniciado(self) -> bool:
+        return self._gestor is not None
+
+    def iniciar(self) -> DatabaseManager:
+        if self._gestor is None:
+            with self._lock:
+                if self._gestor is None:
+                    self._gestor = DatabaseManager(self._db_name)
+        return self._gestor
+
+    def close(self):
+        # Si nunca se usó, no hay nada que cerrar (y no se abre la base solo para cerrarla).
+        if self._gestor is not None:
+            self._gestor.close()
+
+    def __getattr__(self, nombre: str):
+        return getattr(self.iniciar(), nombre)
+
+db_manager = GestorDiferido("inventario.db")
 
 def registrar_movimiento_inventario(placa: str, accion: str, detalles: str, usuario: str):
     log = LogInventario(placa, accion, detalles, usuario)
@@ -25,7 +25,7 @@ def mostrar_estadisticas(usuario: str):
     mostrar_encabezado("Estadísticas de Inventario", color=Fore.BLUE)
 
     # --- 1. Obtención de Datos ---
-    equipos = db_manager.get_all_equipos()
+    conteo_estados = db_manager.count_by_estado()
     
     # MODIFICADO: Añadido el estado "Renovación"
     estados = {
@@ -37,15 +37,17 @@ def mostrar_estadisticas(usuario: str):
         "Devuelto a Proveedor": 0,
         "Renovación": 0,
     }
-    for equipo in equipos:
-        if equipo['estado'] in estados:
-            estados[equipo['estado']] += 1
+    for estado in estados:
+        estados[estado] = conteo_estados.get(estado, 0)
     
     # Los equipos en renovación no se cuentan como activos.
-    total_equipos_activos = sum(v for k, v in estados.items() if k not in ["Devuelto a Proveedor", "Renovación"])
+    estados_activos = [k for k in estados if k not in ["Devuelto a Proveedor", "Renovación"]]
+    total_equipos_activos = sum(estados[k] for k in estados_activos)
+    equipos_por_tipo = db_manager.count_by_tipo(estados_activos)
+    equipos_por_marca = db_manager.count_by_marca(estados_activos)
 
     # Últimos 10 movimientos
-    movimientos_recientes = db_manager.get_all_log_inventario()[:10]
+    movimientos_recientes = db_manager.get_all_log_inventario(limit=10)
 
     # --- 2. Renderizado del Dashboard ---
     
@@ -75,6 +77,13 @@ def mostrar_estadisticas(usuario: str):
     print(f"  {Fore.WHITE}En Renovación:{' ' * (28 - len('En Renovación:'))}{color_renovacion}{estados['Renovación']}{Style.RESET_ALL}")
     print("-" * 40)
 
+    # Sección de Distribución de Equipos Activos
+    print(Fore.CYAN + "\n--- Equipos Activos por Tipo y Marca ---" + Style.RESET_ALL)
+    for titulo, conteo in (("Tipo", equipos_por_tipo), ("Marca", equipos_por_marca)):
+        resumen = ", ".join(f"{valor}: {Fore.YELLOW}{cantidad}{Style.RESET_ALL}" for valor, cantidad in sorted(conteo.items()))
+        print(f"  {Fore.WHITE}{titulo}:{Style.RESET_ALL} {resumen or 'N/A'}")
+    print("-" * 40)
+
 
     # Sección de Movimientos Recientes
     print(Fore.CYAN + f"\n--- Últimos {len(movimientos_recientes)} Movimientos del Inventario ---" + Style.RESET_ALL)
@@ -1,23 +1,22 @@
 # gestion_acceso.py
 import os
-import bcrypt
 import getpass
 import re
 import time
-from typing import Callable, Dict
+from typing import Callable, Dict, Optional
 import sqlite3
-import webbrowser
 import tempfile
 from datetime import datetime
+from itertools import chain
 from functools import wraps
 
-from openpyxl import Workbook
-from openpyxl.styles import Font, Alignment, Border, Side, PatternFill
-from openpyxl.utils import get_column_letter
 from colorama import Fore, Back, Style
+from dotenv import load_dotenv
 
-from database import db_manager, Usuario, registrar_movimiento_sistema
+from database import db_manager, Usuario, registrar_movimiento_sistema, FORMATO_FECHA, FORMATO_FECHA_PANTALLA
 import ui
+from mantenimiento import ejecutar_mantenimiento, cargar_retencion_log_sistema, formatear_bytes
+from utilidades_excel import fila_encabezados, fila_datos
 
 # --- CONTROL DE ACCESO BASADO EN ROLES (RBAC) ---
 ROLES_PERMISOS = {
@@ -36,32 +35,114 @@ ROLES_PERMISOS = {
     }
 }
 
+def cargar_ttl_sesion() -> int:
+    """Segundos máximos entre revalidaciones de la sesión, leídos de SESION_TTL_SEGUNDOS en el .env."""
+    load_dotenv()
+    valor_env = os.getenv("SESION_TTL_SEGUNDOS", "300").strip() or "300"
+    try:
+        return max(0, int(valor_env))
+    except ValueError:
+        print(Fore.YELLOW + f"⚠️ Valor inválido para SESION_TTL_SEGUNDOS: '{valor_env}'. Se usará 300." + Style.RESET_ALL)
+        return 300
+
+SESION_TTL_SEGUNDOS = cargar_ttl_sesion()
+
+class Sesion:
+    """
+    Usuario con sesión iniciada: su fila, su rol y el conjunto de permisos ya calculado.
+    Se vuelve a leer de la base de datos solo cuando cambia la versión de la tabla usuarios
+    o cuando vence el TTL, así un cambio de rol o un bloqueo surte efecto en la siguiente acción
+    sin consultar la tabla de usuarios en cada salto de menú.
+    """
+
+    def __init__(self, nombre_usuario: str):
+        self.nombre_usuario = nombre_usuario
+        self.usuario: Optional[Usuario] = None
+        self.rol: Optional[str] = None
+        self.permisos = frozenset()
+        self._version = None
+        self._validada_en = 0.0
+        self.recargar()
+
+    def recargar(self):
+        self._version = db_manager.version_datos("usuarios")
+        self._validada_en = time.monotonic()
+        self.usuario = db_manager.get_user_by_username(self.nombre_usuario)
+        if self.usuario and self.usuario['is_active']:
+            self.rol = self.usuario['rol']
+            self.permisos = frozenset(ROLES_PERMISOS.get(self.rol, ()))
+        else:
+            self.rol = self.usuario['rol'] if self.usuario else None
+            self.permisos = frozenset()
+        ui.USUARIO_ACTUAL = self.nombre_usuario
+        ui.ROL_ACTUAL = self.rol
+        ui.NOMBRE_COMPLETO_USUARIO = (self.usuario or {}).get('nombre_completo') or self.nombre_usuario
+
+    def revalidar(self) -> bool:
+        """Recarga la sesión si cambiaron los datos o venció el TTL. Devuelve si sigue activa."""
+        if (db_manager.version_datos("usuarios") != self._version
+                or time.monotonic() - self._validada_en >= SESION_TTL_SEGUNDOS):
+            self.recargar()
+        return self.activa
+
+    @property
+    def activa(self) -> bool:
+        return bool(self.usuario and self.usuario['is_active'])
+
+    def tiene_permiso(self, permiso: str) -> bool:
+        return self.revalidar() and permiso in self.permisos
+
+_sesion_actual: Optional[Sesion] = None
+
+def iniciar_sesion(nombre_usuario: str) -> Sesion:
+    global _sesion_actual
+    _sesion_actual = Sesion(nombre_usuario)
+    return _sesion_actual
+
+def cerrar_sesion():
+    global _sesion_actual
+    _sesion_actual = None
+    ui.USUARIO_ACTUAL = None
+    ui.ROL_ACTUAL = None
+    ui.NOMBRE_COMPLETO_USUARIO = None
+
+def obtener_sesion() -> Optional[Sesion]:
+    """Sesión del usuario actual; si se fijó ui.USUARIO_ACTUAL sin iniciar sesión, se crea en ese momento."""
+    if ui.USUARIO_ACTUAL is None:
+        return None
+    if _sesion_actual is None or _sesion_actual.nombre_usuario != ui.USUARIO_ACTUAL:
+        return iniciar_sesion(ui.USUARIO_ACTUAL)
+    return _sesion_actual
+
 def requiere_permiso(permiso: str) -> Callable:
     def decorator(func: Callable) -> Callable:
         @wraps(func)
         def wrapper(*args, **kwargs):
-            if ui.USUARIO_ACTUAL is None:
+            sesion = obtener_sesion()
+            if sesion is None:
                 print(Fore.RED + "\n❌ Acceso denegado. No hay usuario logueado." + Style.RESET_ALL)
                 return
-            user_data = db_manager.get_user_by_username(ui.USUARIO_ACTUAL)
-            if not user_data:
-                print(Fore.RED + "\n❌ Acceso denegado. Usuario no encontrado." + Style.RESET_ALL)
+            if not sesion.revalidar():
+                motivo = "Usuario no encontrado." if sesion.usuario is None else "Su cuenta de usuario está bloqueada."
+                print(Fore.RED + f"\n❌ Acceso denegado. {motivo}" + Style.RESET_ALL)
                 return
-            rol_usuario = user_data['rol']
-            if permiso in ROLES_PERMISOS.get(rol_usuario, {}):
+            if permiso in sesion.permisos:
                 return func(*args, **kwargs)
             else:
-                print(Fore.RED + f"\n❌ Permiso denegado. Su rol '{rol_usuario}' no tiene el permiso '{permiso}'." + Style.RESET_ALL)
+                print(Fore.RED + f"\n❌ Permiso denegado. Su rol '{sesion.rol}' no tiene el permiso '{permiso}'." + Style.RESET_ALL)
                 ui.pausar_pantalla()
                 return
         return wrapper
     return decorator
 
 # --- FUNCIONES DE AUTENTICACIÓN Y GESTIÓN DE USUARIOS ---
+# bcrypt y openpyxl se importan al usarse: no hacen falta hasta el login o la exportación.
 def hash_contrasena(contrasena: str) -> str:
+    import bcrypt
     return bcrypt.hashpw(contrasena.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
 
 def verificar_contrasena(contrasena: str, hash_almacenado: str) -> bool:
+    import bcrypt
     return bcrypt.checkpw(contrasena.encode('utf-8'), hash_almacenado.encode('utf-8'))
 
 def validar_contrasena(contrasena: str) -> bool:
@@ -201,7 +282,7 @@ def cambiar_contrasena_usuario(nombre_usuario: str, forzar_cambio: bool = False)
                 error_message = "❌ Las contraseñas no coinciden."
                 continue
 
-            user_obj = Usuario(**user_data)
+            user_obj = user_data
             user_obj.contrasena_hash = hash_contrasena(new_password)
             user_obj.cambio_clave_requerido = False
             db_manager.update_user(user_obj)
@@ -266,7 +347,7 @@ def menu_usuarios(usuario_actual: str):
             ui.pausar_pantalla()
 
 def gestionar_usuario_especifico(admin_usuario: str, target_user_data: Dict):
-    target_user_obj = Usuario(**db_manager.get_user_by_username(target_user_data['nombre_usuario']))
+    target_user_obj = db_manager.get_user_by_username(target_user_data['nombre_usuario'])
     
     while True:
         estado = Fore.GREEN + "Activo" if target_user_obj.is_active else Fore.RED + "Bloqueado"
@@ -329,16 +410,19 @@ def menu_ver_log_sistema(usuario: str):
 @requiere_permiso("ver_historico")
 def generar_excel_log_sistema(usuario: str):
     try:
-        log_sistema = db_manager.get_all_log_sistema()
+        import webbrowser
+        from openpyxl import Workbook
+        from openpyxl.styles import Font, Border, Side, PatternFill
 
-        if not log_sistema:
+        movimientos = db_manager.iter_all_log_sistema()
+        primero = next(movimientos, None)
+        if primero is None:
             print(Fore.YELLOW + "\nNo hay actividad del sistema para exportar.")
-            ui.pausar_pantalla()
             return
 
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "Log del Sistema"
+        # Libro en modo write_only: las filas se escriben según se leen del cursor.
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet("Log del Sistema")
 
         header_fill = PatternFill(start_color="BFBFBF", end_color="BFBFBF", fill_type="solid")
         header_font = Font(color="000000", bold=True)
@@ -346,30 +430,18 @@ def generar_excel_log_sistema(usuario: str):
         
         encabezados = ["FECHA", "ACCIÓN", "USUARIO", "DETALLES"]
         
-        for col_num, encabezado in enumerate(encabezados, 1):
-            col_letra = get_column_letter(col_num)
-            celda = ws[f"{col_letra}1"]
-            celda.value = encabezado
-            celda.fill = header_fill
-            celda.font = header_font
-            celda.alignment = Alignment(horizontal='center')
-            celda.border = border
-        
         ws.column_dimensions['A'].width = 25
         ws.column_dimensions['B'].width = 25
         ws.column_dimensions['C'].width = 20
         ws.column_dimensions['D'].width = 80
+        ws.freeze_panes = "A2"
 
-        for row_num, mov in enumerate(log_sistema, 2):
+        ws.append(fila_encabezados(ws, encabezados, header_fill, header_font, border))
+
+        for mov in chain([primero], movimientos):
             fecha_obj = datetime.strptime(mov['fecha'], "%Y-%m-%d %H:%M:%S")
             fecha_formateada = fecha_obj.strftime("%d/%m/%Y %H:%M")
-            
-            ws.cell(row=row_num, column=1, value=fecha_formateada).border = border
-            ws.cell(row=row_num, column=2, value=mov.get('accion', 'N/A')).border = border
-            ws.cell(row=row_num, column=3, value=mov.get('usuario', 'N/A')).border = border
-            ws.cell(row=row_num, column=4, value=mov.get('detalles', '')).border = border
-        
-        ws.freeze_panes = "A2"
+            ws.append(fila_datos(ws, [fecha_formateada, mov.get('accion', 'N/A'), mov.get('usuario', 'N/A'), mov.get('detalles', '')], border))
 
         with tempfile.NamedTemporaryFile(delete=False, suffix=".xlsx") as tmp:
             wb.save(tmp.name)
@@ -390,6 +462,9 @@ def menu_configuracion_sistema(usuario: str):
             "Gestionar Tipos de Equipo", 
             "Gestionar Marcas", 
             "Gestionar Dominios de Correo", 
+            "Reconstruir Índice de Búsqueda",
+            "Archivar Logs Antiguos",
+            "Mantenimiento de la Base de Datos",
             "Volver"
         ]
         ui.mostrar_menu(opciones_menu, titulo="Configuración del Sistema")
@@ -403,10 +478,109 @@ def menu_configuracion_sistema(usuario: str):
         elif opcion == '3':
             gestionar_parametros(usuario, 'dominio_correo', 'Dominio de Correo Permitido')
         elif opcion == '4':
+            reconstruir_indice_busqueda(usuario)
+        elif opcion == '5':
+            archivar_logs_antiguos(usuario)
+        elif opcion == '6':
+            mantenimiento_base_datos(usuario)
+        elif opcion == '7':
             break
         else:
             print(Fore.RED + "Opción no válida.")
 
+def reconstruir_indice_busqueda(usuario: str):
+    """Regenera los índices de búsqueda de texto desde las tablas de equipos y logs."""
+    confirmacion = input(Fore.YELLOW + "¿Reconstruir el índice de búsqueda? Puede tardar con logs muy grandes. (S/N): " + Style.RESET_ALL).strip().upper()
+    if confirmacion != 'S':
+        print(Fore.YELLOW + "Operación cancelada.")
+        ui.pausar_pantalla()
+        return
+    try:
+        inicio = time.perf_counter()
+        db_manager.reconstruir_indice_busqueda()
+        duracion = time.perf_counter() - inicio
+        registrar_movimiento_sistema("Mantenimiento", "Índice de búsqueda reconstruido", usuario)
+        print(Fore.GREEN + f"\n✅ Índice de búsqueda reconstruido en {duracion:.1f} s.")
+    except sqlite3.Error as e:
+        print(Fore.RED + f"\n❌ Error al reconstruir el índice de búsqueda: {e}")
+    ui.pausar_pantalla()
+
+def archivar_logs_antiguos(usuario: str):
+    """Mueve los logs anteriores a una fecha de corte a los archivos anuales inventario_archivo_AAAA.db."""
+    ui.mostrar_encabezado("Archivar Logs Antiguos")
+    archivos = db_manager.get_archivos_log()
+    if archivos:
+        print(Fore.CYAN + "Archivos existentes:" + Style.RESET_ALL)
+        for archivo in archivos:
+            print(f"  {archivo['anio']}: {archivo['ruta']} ({archivo['filas_log_inventario']} movimientos, {archivo['filas_log_sistema']} registros del sistema)")
+        print()
+
+    # Por defecto se conservan en la base el año en curso y el anterior.
+    corte_defecto = datetime(datetime.now().year - 1, 1, 1)
+    texto = input(Fore.YELLOW + f"Archivar registros anteriores a (DD/MM/AAAA) [{corte_defecto.strftime(FORMATO_FECHA_PANTALLA)}]: " + Style.RESET_ALL).strip()
+    try:
+        corte = datetime.strptime(texto, FORMATO_FECHA_PANTALLA) if texto else corte_defecto
+    except ValueError:
+        print(Fore.RED + "❌ Fecha no válida. Use el formato DD/MM/AAAA.")
+        ui.pausar_pantalla()
+        return
+    fecha_corte = corte.strftime(FORMATO_FECHA)
+
+    pendientes = db_manager.contar_logs_anteriores(fecha_corte)
+    if not any(pendientes.values()):
+        print(Fore.YELLOW + "\nNo hay registros anteriores a esa fecha.")
+        ui.pausar_pantalla()
+        return
+    print(f"\nSe moverán {pendientes['log_inventario']} movimientos de inventario y {pendientes['log_sistema']} registros del sistema.")
+    print(Style.DIM + "Seguirán apareciendo en el historial y en el reporte histórico, pero no en la búsqueda de texto." + Style.RESET_ALL)
+    if input(Fore.YELLOW + "¿Continuar? (S/N): " + Style.RESET_ALL).strip().upper() != 'S':
+        print(Fore.YELLOW + "Operación cancelada.")
+        ui.pausar_pantalla()
+        return
+
+    def mostrar_progreso(tabla: str, movidas: int):
+        # Una línea por tabla, que se reescribe con cada lote.
+        fin = "\n" if movidas == pendientes[tabla] else ""
+        print(f"\r  {tabla}: {movidas}/{pendientes[tabla]} filas", end=fin, flush=True)
+
+    try:
+        inicio = time.perf_counter()
+        movidas = db_manager.archivar_logs(fecha_corte, progreso=mostrar_progreso)
+        duracion = time.perf_counter() - inicio
+        detalles = (f"Logs anteriores a {corte.strftime(FORMATO_FECHA_PANTALLA)} archivados: "
+                    f"{movidas['log_inventario']} movimientos, {movidas['log_sistema']} registros del sistema")
+        registrar_movimiento_sistema("Mantenimiento", detalles, usuario)
+        print(Fore.GREEN + f"\n✅ {detalles} en {duracion:.1f} s.")
+    except sqlite3.Error as e:
+        print(Fore.RED + f"\n\n❌ Error al archivar los logs: {e}. Puede repetir la operación; no se duplican registros.")
+    ui.pausar_pantalla()
+
+def mantenimiento_base_datos(usuario: str):
+    """Integridad, retención de log_sistema, VACUUM y ANALYZE; lo mismo que 'python mantenimiento.py'."""
+    ui.mostrar_encabezado("Mantenimiento de la Base de Datos")
+    tamano = db_manager.tamano_base()
+    retencion = cargar_retencion_log_sistema()
+    print(f"Tamaño actual: {formatear_bytes(tamano['bytes'] + tamano['bytes_wal'])} "
+          f"({tamano['paginas_libres']} de {tamano['paginas']} páginas libres)")
+    if retencion["dias"]:
+        print(f"Retención de log_sistema: {retencion['dias']} días ({retencion['modo']})")
+    else:
+        print("Retención de log_sistema: desactivada")
+    print(Style.DIM + "VACUUM bloquea la base mientras dura; conviene hacerlo sin otros usuarios trabajando." + Style.RESET_ALL)
+
+    if input(Fore.YELLOW + "\n¿Ejecutar el mantenimiento? (S/N): " + Style.RESET_ALL).strip().upper() != 'S':
+        print(Fore.YELLOW + "Operación cancelada.")
+        ui.pausar_pantalla()
+        return
+
+    resultado = ejecutar_mantenimiento(usuario, informar=lambda mensaje: print("  " + mensaje))
+    despues = resultado["despues"]
+    if resultado["ok"]:
+        print(Fore.GREEN + f"\n✅ Mantenimiento completado. Tamaño final: {formatear_bytes(despues['bytes'] + despues['bytes_wal'])}.")
+    else:
+        print(Fore.RED + "\n❌ El mantenimiento terminó con errores. Revise el log del sistema.")
+    ui.pausar_pantalla()
+
 def gestionar_parametros(usuario: str, tipo_parametro: str, nombre_amigable: str):
     while True:
         ui.mostrar_encabezado(f"Gestionar {nombre_amigable}s")
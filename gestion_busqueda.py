@@ -0,0 +1,71 @@
+# gestion_busqueda.py
+import sqlite3
+import time
+from datetime import datetime
+
+from colorama import Fore, Style
+
+from database import db_manager
+from ui import mostrar_encabezado, pausar_pantalla
+from gestion_acceso import requiere_permiso, obtener_sesion
+
+RESULTADOS_POR_SECCION = 10
+MARCAS_RESALTADO = (Fore.YELLOW + Style.BRIGHT, Style.RESET_ALL)
+
+def _fecha_corta(fecha: str) -> str:
+    return datetime.strptime(fecha, "%Y-%m-%d %H:%M:%S").strftime("%d/%m/%Y %H:%M")
+
+def _fragmento(texto: str) -> str:
+    return " ".join((texto or "").split())
+
+@requiere_permiso("ver_inventario")
+def buscar_texto(usuario: str):
+    """Búsqueda por relevancia en observaciones, asignados y detalles de los movimientos."""
+    puede_ver_log_sistema = obtener_sesion().tiene_permiso("ver_historico")
+
+    while True:
+        mostrar_encabezado("Búsqueda de Texto", color=Fore.BLUE)
+        print(Fore.CYAN + "💡 Busque por palabras o números de ticket. Termine un término con '*' para buscar por prefijo.")
+        print("   Deje el campo vacío para volver." + Style.RESET_ALL)
+
+        texto = input(Fore.YELLOW + "\nBuscar: " + Style.RESET_ALL).strip()
+        if not texto:
+            break
+
+        inicio = time.perf_counter()
+        try:
+            equipos = db_manager.buscar_equipos_texto(texto, RESULTADOS_POR_SECCION, MARCAS_RESALTADO)
+            movimientos = db_manager.buscar_log_inventario_texto(texto, RESULTADOS_POR_SECCION, MARCAS_RESALTADO)
+            sistema = db_manager.buscar_log_sistema_texto(texto, RESULTADOS_POR_SECCION, MARCAS_RESALTADO) if puede_ver_log_sistema else []
+        except sqlite3.OperationalError as e:
+            print(Fore.RED + f"\n❌ No se pudo realizar la búsqueda: {e}")
+            pausar_pantalla()
+            continue
+        duracion_ms = (time.perf_counter() - inicio) * 1000
+
+        if not (equipos or movimientos or sistema):
+            print(Fore.YELLOW + f"\nSin resultados para '{texto}'.")
+            pausar_pantalla()
+            continue
+
+        print(Style.DIM + f"\nBúsqueda resuelta en {duracion_ms:.1f} ms" + Style.RESET_ALL)
+
+        if equipos:
+            print(Fore.CYAN + "\n--- Equipos ---" + Style.RESET_ALL)
+            for equipo in equipos:
+                print(f"  {Fore.YELLOW}{equipo['placa']}{Style.RESET_ALL} {equipo['tipo']} {equipo['marca']} {equipo['modelo']} ({equipo['estado']})")
+                print(f"      {_fragmento(equipo['fragmento'])}")
+
+        if movimientos:
+            print(Fore.CYAN + "\n--- Movimientos de Inventario ---" + Style.RESET_ALL)
+            for mov in movimientos:
+                print(f"  {_fecha_corta(mov['fecha'])}  {Fore.YELLOW}{mov['equipo_placa']}{Style.RESET_ALL}  {mov['accion']} ({mov['usuario']})")
+                print(f"      {_fragmento(mov['fragmento'])}")
+
+        if sistema:
+            print(Fore.CYAN + "\n--- Log del Sistema ---" + Style.RESET_ALL)
+            for mov in sistema:
+                print(f"  {_fecha_corta(mov['fecha'])}  {mov['accion']} ({mov['usuario']})")
+                print(f"      {_fragmento(mov['fragmento'])}")
+
+        pausar_pantalla()
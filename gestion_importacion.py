@@ -0,0 +1,193 @@
+# gestion_importacion.py
+import csv
+import os
+import time
+from datetime import datetime
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+from colorama import Fore, Style
+
+from database import db_manager, Equipo, LogInventario, registrar_movimiento_sistema
+from ui import mostrar_encabezado, pausar_pantalla
+from gestion_acceso import requiere_permiso
+from gestion_inventario import validar_placa_formato, validar_serial, validar_campo_general
+
+COLUMNAS_OBLIGATORIAS = ["placa", "tipo", "marca", "modelo", "serial"]
+COLUMNAS_IMPORTACION = COLUMNAS_OBLIGATORIAS + ["observaciones"]
+TAMANO_LOTE = 5000
+
+# --- LECTURA DE ARCHIVOS ---
+def _normalizar_encabezado(valor) -> str:
+    return str(valor or "").strip().lower()
+
+def leer_filas_csv(ruta: str) -> Iterator[Dict[str, str]]:
+    """Lee un CSV fila a fila, detectando si el separador es ',' o ';'."""
+    with open(ruta, newline='', encoding='utf-8-sig') as archivo:
+        muestra = archivo.read(4096)
+        archivo.seek(0)
+        try:
+            dialecto = csv.Sniffer().sniff(muestra, delimiters=",;")
+        except csv.Error:
+            dialecto = csv.excel
+        lector = csv.reader(archivo, dialecto)
+        encabezados = [_normalizar_encabezado(c) for c in next(lector, [])]
+        for fila in lector:
+            if not any(celda.strip() for celda in fila):
+                continue
+            yield dict(zip(encabezados, fila))
+
+def leer_filas_xlsx(ruta: str) -> Iterator[Dict[str, str]]:
+    """Lee la primera hoja de un XLSX en modo de solo lectura, sin cargarla entera en memoria."""
+    from openpyxl import load_workbook
+
+    wb = load_workbook(ruta, read_only=True, data_only=True)
+    try:
+        filas = wb.active.iter_rows(values_only=True)
+        encabezados = [_normalizar_encabezado(c) for c in next(filas, ())]
+        for fila in filas:
+            if not any(celda not in (None, "") for celda in fila):
+                continue
+            yield {col: ("" if valor is None else str(valor)) for col, valor in zip(encabezados, fila)}
+    finally:
+        wb.close()
+
+def leer_filas(ruta: str) -> Iterator[Dict[str, str]]:
+    extension = os.path.splitext(ruta)[1].lower()
+    if extension == ".csv":
+        return leer_filas_csv(ruta)
+    if extension in (".xlsx", ".xlsm"):
+        return leer_filas_xlsx(ruta)
+    raise ValueError(f"Formato de archivo no soportado: '{extension}'. Use .csv o .xlsx.")
+
+# --- VALIDACIÓN ---
+def validar_fila(fila: Dict[str, str], tipos: Dict[str, str], marcas: Dict[str, str], placas_existentes: set) -> Tuple[Optional[Equipo], Optional[str]]:
+    """Valida una fila con las mismas reglas del registro manual. Devuelve (equipo, error)."""
+    valores = {col: (fila.get(col) or "").strip() for col in COLUMNAS_IMPORTACION}
+    faltantes = [col for col in COLUMNAS_OBLIGATORIAS if not valores[col]]
+    if faltantes:
+        return None, f"Campos obligatorios vacíos: {', '.join(faltantes)}"
+
+    placa = valores["placa"].upper()
+    if not validar_placa_formato(placa):
+        return None, "Formato de placa inválido (mín. 4 caracteres alfanuméricos)"
+    if placa in placas_existentes:
+        return None, "La placa ya está registrada o repetida en el archivo"
+
+    tipo = tipos.get(valores["tipo"].lower())
+    if not tipo:
+        return None, f"Tipo de equipo '{valores['tipo']}' no está activo en los parámetros"
+    marca = marcas.get(valores["marca"].lower())
+    if not marca:
+        return None, f"Marca '{valores['marca']}' no está activa en los parámetros"
+
+    if not validar_campo_general(valores["modelo"]):
+        return None, "Modelo inválido"
+    if not validar_serial(valores["serial"]):
+        return None, "Número de serie inválido"
+
+    equipo = Equipo(placa=placa, tipo=tipo, marca=marca, modelo=valores["modelo"], serial=valores["serial"],
+                    observaciones=valores["observaciones"] or "Ninguna")
+    return equipo, None
+
+# --- IMPORTACIÓN ---
+def importar_equipos_desde_archivo(ruta: str, usuario: str, tamano_lote: int = TAMANO_LOTE,
+                                   progreso: Optional[Callable[[int, int], None]] = None) -> Tuple[int, int, Optional[str]]:
+    """
+    Importa equipos desde un CSV o XLSX. Las filas válidas se insertan por lotes, cada lote en
+    una transacción junto con su registro "Registro" en el log. Las filas rechazadas se escriben
+    en un CSV de errores junto al archivo original.
+    Devuelve (importados, rechazados, ruta del archivo de errores o None).
+    """
+    tipos = {p['valor'].lower(): p['valor'] for p in db_manager.get_parametros_por_tipo('tipo_equipo', solo_activos=True)}
+    marcas = {p['valor'].lower(): p['valor'] for p in db_manager.get_parametros_por_tipo('marca_equipo', solo_activos=True)}
+    placas_existentes = db_manager.get_all_placas()
+    fecha_registro = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    ruta_errores = os.path.splitext(ruta)[0] + "_errores.csv"
+    archivo_errores = None
+    escritor_errores = None
+    importados = 0
+    rechazados = 0
+    lote_equipos, lote_logs = [], []
+
+    def guardar_lote():
+        nonlocal importados
+        with db_manager.transaction():
+            db_manager.insert_equipos_lote(lote_equipos, lote_logs)
+        importados += len(lote_equipos)
+        lote_equipos.clear()
+        lote_logs.clear()
+        if progreso:
+            progreso(importados, rechazados)
+
+    try:
+        for num_fila, fila in enumerate(leer_filas(ruta), 2):
+            equipo, error = validar_fila(fila, tipos, marcas, placas_existentes)
+            if error:
+                rechazados += 1
+                if escritor_errores is None:
+                    archivo_errores = open(ruta_errores, "w", newline='', encoding='utf-8-sig')
+                    escritor_errores = csv.writer(archivo_errores)
+                    escritor_errores.writerow(["fila"] + COLUMNAS_IMPORTACION + ["error"])
+                escritor_errores.writerow([num_fila] + [fila.get(col, "") for col in COLUMNAS_IMPORTACION] + [error])
+                continue
+
+            equipo.fecha_registro = fecha_registro
+            placas_existentes.add(equipo.placa)
+            lote_equipos.append(equipo)
+            lote_logs.append(LogInventario(equipo.placa, "Registro",
+                                           f"Nuevo equipo registrado: {equipo.tipo} {equipo.marca} {equipo.modelo} (importación masiva)",
+                                           usuario, fecha_registro))
+            if len(lote_equipos) >= tamano_lote:
+                guardar_lote()
+
+        if lote_equipos:
+            guardar_lote()
+    finally:
+        if archivo_errores:
+            archivo_errores.close()
+
+    return importados, rechazados, (ruta_errores if rechazados else None)
+
+@requiere_permiso("registrar_equipo")
+def importar_equipos(usuario: str):
+    """Pantalla para la importación masiva de equipos desde un archivo CSV o XLSX."""
+    mostrar_encabezado("Importación Masiva de Equipos", color=Fore.BLUE)
+    print(Fore.CYAN + "💡 El archivo debe tener una fila de encabezados con las columnas:")
+    print(f"   {', '.join(COLUMNAS_OBLIGATORIAS)} y, opcionalmente, observaciones." + Style.RESET_ALL)
+
+    try:
+        ruta = input(Fore.YELLOW + "\nRuta del archivo (.csv o .xlsx): " + Style.RESET_ALL).strip().strip('"')
+        if not ruta:
+            print(Fore.YELLOW + "Operación cancelada.")
+            return
+        if not os.path.isfile(ruta):
+            print(Fore.RED + f"❌ No se encontró el archivo '{ruta}'.")
+            return
+
+        confirmacion = input(Fore.YELLOW + f"¿Desea importar los equipos de '{os.path.basename(ruta)}'? (S/N): " + Style.RESET_ALL).strip().upper()
+        if confirmacion != 'S':
+            print(Fore.YELLOW + "Operación cancelada.")
+            return
+
+        def mostrar_progreso(importados: int, rechazados: int):
+            print(Fore.CYAN + f"\r  Importados: {importados}  Rechazados: {rechazados}", end="", flush=True)
+
+        inicio = time.perf_counter()
+        importados, rechazados, ruta_errores = importar_equipos_desde_archivo(ruta, usuario, progreso=mostrar_progreso)
+        duracion = time.perf_counter() - inicio
+        print(Style.RESET_ALL)
+
+        registrar_movimiento_sistema("Importación Equipos", f"Importados {importados} equipos desde '{os.path.basename(ruta)}' ({rechazados} rechazados)", usuario)
+        print(Fore.GREEN + f"\n✅ Importación finalizada en {duracion:.1f} s: {importados} equipos registrados.")
+        if ruta_errores:
+            print(Fore.YELLOW + f"⚠️ {rechazados} filas rechazadas. Detalle en: {ruta_errores}")
+
+    except ValueError as e:
+        print(Fore.RED + f"\n❌ {e}")
+    except KeyboardInterrupt:
+        print(Fore.CYAN + "\n🚫 Importación cancelada. Los lotes ya confirmados se conservan.")
+    except Exception as e:
+        print(Fore.RED + f"\n❌ Error durante la importación: {str(e)}")
+    finally:
+        pausar_pantalla()
@@ -7,10 +7,14 @@ from typing import Optional, List
 
 from colorama import Fore, Style
 
-from database import db_manager, Equipo, registrar_movimiento_inventario, registrar_movimiento_sistema
+from database import (
+    db_manager, Equipo, ConflictoEdicion, EQUIPO_COLUMNAS, registrar_movimiento_inventario, registrar_movimiento_sistema,
+    FORMATO_FECHA, fecha_a_pantalla
+)
 from ui import mostrar_encabezado, mostrar_menu, pausar_pantalla, confirmar_con_placa
 from gestion_acceso import requiere_permiso
 from gestion_reportes import generar_excel_historico_equipo
+from indice_equipos import indice_equipos
 
 # --- FUNCIONES DE UTILIDAD Y VALIDACIÓN ---
 def validar_placa_unica(placa: str) -> bool:
@@ -65,6 +69,45 @@ def formatear_y_validar_nombre(nombre: str) -> Optional[str]:
     # Pone en mayúscula la primera letra de cada palabra y las une con un espacio
     return ' '.join(p.capitalize() for p in partes)
 
+def sugerir_placa(texto: str) -> Optional[str]:
+    """
+    Muestra los equipos que se parecen al texto ingresado (placa, serial, asignado o email)
+    y devuelve la placa elegida, o None si no hay sugerencias o el usuario escribe otra cosa.
+    """
+    sugerencias = indice_equipos.sugerir(texto)
+    if not sugerencias:
+        return None
+
+    print(Fore.YELLOW + "¿Quiso decir alguno de estos equipos?" + Style.RESET_ALL)
+    for i, sugerencia in enumerate(sugerencias, 1):
+        print(f"  {Fore.YELLOW}{i}.{Style.RESET_ALL} {sugerencia['placa']:<12} {Style.DIM}{sugerencia['campo']}: {sugerencia['valor']}{Style.RESET_ALL}")
+
+    seleccion = input(Fore.YELLOW + "Seleccione un número o presione Enter para escribir otra placa: " + Style.RESET_ALL).strip()
+    if seleccion.isdigit() and 1 <= int(seleccion) <= len(sugerencias):
+        return sugerencias[int(seleccion) - 1]['placa']
+    return None
+
+def mostrar_conflicto(conflicto: ConflictoEdicion):
+    """Informa que otro usuario se adelantó y muestra los datos vigentes del equipo frente a los que se intentó guardar."""
+    print(Fore.RED + f"\n❌ {conflicto} No se guardaron sus cambios.")
+    actual = conflicto.actual
+    if not actual:
+        print(Fore.YELLOW + "El equipo ya no existe en el inventario." + Style.RESET_ALL)
+        return
+
+    ultimo = db_manager.get_last_movimiento_by_placa(actual['placa'])
+    if ultimo:
+        fecha = datetime.strptime(ultimo['fecha'], "%Y-%m-%d %H:%M:%S").strftime("%d/%m/%Y %H:%M")
+        print(Fore.YELLOW + f"Último movimiento: {ultimo['accion']} por {ultimo['usuario']} el {fecha}." + Style.RESET_ALL)
+
+    diferencias = [col for col in EQUIPO_COLUMNAS if col not in ("version", "fecha_registro")
+                   and actual.get(col) != getattr(conflicto.equipo, col, None)]
+    if diferencias:
+        print(Fore.CYAN + f"\n  {'CAMPO':<28} {'VALOR VIGENTE':<25} {'SU CAMBIO'}")
+        for col in diferencias:
+            print(f"  {col:<28} {str(actual.get(col) or 'N/A'):<25} {getattr(conflicto.equipo, col, None) or 'N/A'}")
+    print(Fore.YELLOW + "\nRevise los datos vigentes y repita la operación si aún corresponde." + Style.RESET_ALL)
+
 # --- NUEVA FUNCIÓN DE AYUDA PARA FORMATEO DE TEXTO ---
 def format_wrapped_text(label: str, text: str, width: int = 90) -> str:
     """
@@ -115,8 +158,8 @@ def seleccionar_parametro(tipo_parametro: Optional[str], nombre_amigable: str, l
 def registrar_equipo(usuario: str):
     mostrar_encabezado("Registro de Nuevo Equipo", color=Fore.BLUE)
     
-    tipos_existentes = db_manager.get_parametros_por_tipo('tipo_equipo', solo_activos=True)
-    marcas_existentes = db_manager.get_parametros_por_tipo('marca_equipo', solo_activos=True)
+    tipos_existentes = db_manager.get_parametros_activos('tipo_equipo')
+    marcas_existentes = db_manager.get_parametros_activos('marca_equipo')
 
     if not tipos_existentes or not marcas_existentes:
         print(Fore.RED + "❌ No se puede registrar un nuevo equipo.")
@@ -148,7 +191,7 @@ def registrar_equipo(usuario: str):
                             print(Fore.YELLOW + "Reactivación cancelada.")
                             continue
 
-                        equipo_reactivado = Equipo(**equipo_existente)
+                        equipo_reactivado = equipo_existente
                         equipo_reactivado.estado = "Disponible"
                         equipo_reactivado.estado_anterior = "Devuelto a Proveedor"
                         equipo_reactivado.asignado_a = None
@@ -157,8 +200,9 @@ def registrar_equipo(usuario: str):
                         equipo_reactivado.motivo_devolucion = None
                         equipo_reactivado.fecha_registro = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
                         
-                        db_manager.update_equipo(equipo_reactivado)
-                        registrar_movimiento_inventario(placa, "Reactivación", "Equipo reactivado en el inventario tras devolución a proveedor.", usuario)
+                        with db_manager.transaction():
+                            db_manager.update_equipo(equipo_reactivado)
+                            registrar_movimiento_inventario(placa, "Reactivación", "Equipo reactivado en el inventario tras devolución a proveedor.", usuario)
                         print(Fore.GREEN + f"\n✅ ¡Equipo {placa} reactivado y disponible en el inventario!")
                         pausar_pantalla()
                         return
@@ -205,12 +249,15 @@ def registrar_equipo(usuario: str):
              return
 
         nuevo_equipo = Equipo(placa=placa, tipo=tipo, marca=marca, modelo=modelo, serial=serial, observaciones=observaciones)
-        db_manager.insert_equipo(nuevo_equipo)
-        registrar_movimiento_inventario(placa, "Registro", f"Nuevo equipo registrado: {tipo} {marca} {modelo}", usuario)
+        with db_manager.transaction():
+            db_manager.insert_equipo(nuevo_equipo)
+            registrar_movimiento_inventario(placa, "Registro", f"Nuevo equipo registrado: {tipo} {marca} {modelo}", usuario)
         print(Fore.GREEN + f"\n✅ ¡Equipo con placa {placa} registrado exitosamente!")
 
     except KeyboardInterrupt:
         print(Fore.CYAN + "\n🚫 Operación de registro cancelada.")
+    except ConflictoEdicion as e:
+        mostrar_conflicto(e)
     finally:
         pausar_pantalla()
 
@@ -221,14 +268,14 @@ def gestionar_equipos(usuario: str):
         print(Fore.CYAN + "💡 Puede presionar Ctrl+C en cualquier momento para regresar." + Style.RESET_ALL)
         
         # 1. Equipos nuevos
-        equipos_nuevos = db_manager.get_new_equipos()
+        equipos_nuevos = db_manager.get_new_equipos(columns="lista")
         if equipos_nuevos:
             print(Fore.GREEN + "\n--- Equipos Nuevos (sin gestión) ---" + Style.RESET_ALL)
             for equipo in equipos_nuevos:
                 print(f"  - Placa: {equipo['placa']}, Tipo: {equipo['tipo']}, Marca: {equipo['marca']} {Fore.CYAN}(New){Style.RESET_ALL}")
         
         # 2. Equipos disponibles (no nuevos)
-        equipos_disponibles = db_manager.get_available_not_new_equipos()
+        equipos_disponibles = db_manager.get_available_not_new_equipos(columns="lista")
         if equipos_disponibles:
             print(Fore.CYAN + "\n--- Equipos Disponibles (con historial) ---" + Style.RESET_ALL)
             for equipo in equipos_disponibles:
@@ -250,10 +297,16 @@ def gestionar_equipos(usuario: str):
             equipo_data = db_manager.get_equipo_by_placa(placa)
 
             if not equipo_data:
-                print(Fore.RED + "❌ No se encontró un equipo con esa placa. Intente de nuevo.")
-                continue
+                print(Fore.RED + "❌ No se encontró un equipo con esa placa.")
+                placa_sugerida = sugerir_placa(placa)
+                if not placa_sugerida:
+                    print(Fore.RED + "Intente de nuevo.")
+                    continue
+                equipo_data = db_manager.get_equipo_by_placa(placa_sugerida)
+                if not equipo_data:
+                    continue
             
-            equipo = Equipo(**equipo_data)
+            equipo = equipo_data
             menu_gestion_especifica(usuario, equipo)
             break 
 
@@ -287,7 +340,7 @@ def menu_gestion_especifica(usuario: str, equipo: Equipo):
         if equipo.asignado_a:
             print(f"  {'Asignado a:'.ljust(25)} {equipo.asignado_a} ({equipo.email_asignado})")
         if equipo.fecha_devolucion_prestamo:
-            print(f"  {'Fecha devolución (Préstamo):'.ljust(25)} {equipo.fecha_devolucion_prestamo}")
+            print(f"  {'Fecha devolución (Préstamo):'.ljust(25)} {fecha_a_pantalla(equipo.fecha_devolucion_prestamo)}")
         
         if equipo.estado in ["En mantenimiento", "Pendiente Devolución a Proveedor", "Devuelto a Proveedor", "Renovación"]:
             print(Fore.YELLOW + f"⚠️  Este equipo está '{equipo.estado}'. Las acciones de gestión están limitadas.")
@@ -361,7 +414,7 @@ def menu_gestion_especifica(usuario: str, equipo: Equipo):
         
         equipo_data_actualizado = db_manager.get_equipo_by_placa(equipo.placa)
         if not equipo_data_actualizado: break
-        equipo = Equipo(**equipo_data_actualizado)
+        equipo = equipo_data_actualizado
 
 def mostrar_detalles_equipo(equipo: Equipo):
     """Muestra una vista detallada y contextual de la información de un equipo."""
@@ -392,12 +445,12 @@ def mostrar_detalles_equipo(equipo: Equipo):
         print(f"  {'Asignado a:'.ljust(28)} {equipo.asignado_a} ({equipo.email_asignado or 'Sin email'})")
 
     if equipo.estado == "En préstamo" and equipo.fecha_devolucion_prestamo:
-        print(f"  {'Fecha Devolución Préstamo:'.ljust(28)} {equipo.fecha_devolucion_prestamo}")
+        print(f"  {'Fecha Devolución Préstamo:'.ljust(28)} {fecha_a_pantalla(equipo.fecha_devolucion_prestamo)}")
     
     if equipo.estado == "Renovación" and equipo.renovacion_placa_asociada:
         print(Fore.CYAN + "\n--- Detalles de la Renovación ---" + Style.RESET_ALL)
         print(f"  {'Equipo de reemplazo:'.ljust(28)} {equipo.renovacion_placa_asociada}")
-        print(f"  {'Fecha Máx. de Entrega:'.ljust(28)} {equipo.fecha_entrega_renovacion}")
+        print(f"  {'Fecha Máx. de Entrega:'.ljust(28)} {fecha_a_pantalla(equipo.fecha_entrega_renovacion)}")
         
         log_renovacion = db_manager.get_last_log_by_action(equipo.placa, 'Inicio Renovación')
         if log_renovacion:
@@ -422,7 +475,7 @@ def mostrar_detalles_equipo(equipo: Equipo):
         print(f"  {'Fecha de Registro:'.ljust(28)} {fecha_evento}")
         print(f"  {'Registrado por:'.ljust(28)} {log_devolucion['usuario']}")
         print(f"  {'Motivo:'.ljust(28)} {equipo.motivo_devolucion}")
-        print(f"  {'Fecha Programada:'.ljust(28)} {equipo.fecha_devolucion_proveedor}")
+        print(f"  {'Fecha Programada:'.ljust(28)} {fecha_a_pantalla(equipo.fecha_devolucion_proveedor)}")
         
         label = f"  {'Observaciones:'.ljust(28)}"
         print(format_wrapped_text(label, equipo.observaciones))
@@ -460,8 +513,7 @@ def asignar_o_prestar_equipo(usuario: str, equipo: Equipo):
         pausar_pantalla()
         return
     
-    dominios_permitidos = db_manager.get_parametros_por_tipo('dominio_correo', solo_activos=True)
-    if not dominios_permitidos:
+    if not db_manager.get_parametros_activos('dominio_correo'):
         print(Fore.RED + "❌ No se puede asignar un equipo.")
         print(Fore.YELLOW + "   - No hay 'Dominios de Correo' activos configurados en el sistema.")
         print(Fore.CYAN + "   Por favor, pida a un Administrador que configure este parámetro.")
@@ -495,13 +547,12 @@ def asignar_o_prestar_equipo(usuario: str, equipo: Equipo):
             
             try:
                 dominio_email = email_asignado.split('@')[1]
-                dominios_activos_lista = [d['valor'] for d in dominios_permitidos]
 
-                if dominio_email in dominios_activos_lista:
+                if db_manager.es_parametro_activo('dominio_correo', dominio_email):
                     break
                 else:
                     print(Fore.RED + f"❌ Dominio '{dominio_email}' no está permitido.")
-                    print(Fore.CYAN + "Dominios activos permitidos: " + ", ".join(dominios_activos_lista))
+                    print(Fore.CYAN + "Dominios activos permitidos: " + ", ".join(sorted(db_manager.get_parametros_activos('dominio_correo'))))
             except IndexError:
                 print(Fore.RED + "Formato de email inválido. Intente de nuevo.")
 
@@ -518,7 +569,7 @@ def asignar_o_prestar_equipo(usuario: str, equipo: Equipo):
                 fecha_dt = validar_formato_fecha(fecha_str)
                 if fecha_dt:
                     if fecha_dt.date() > datetime.now().date():
-                        fecha_devolucion = fecha_str
+                        fecha_devolucion = fecha_dt
                         break
                     else:
                         print(Fore.RED + "La fecha de devolución debe ser posterior a la fecha actual.")
@@ -531,7 +582,7 @@ def asignar_o_prestar_equipo(usuario: str, equipo: Equipo):
         print(f"  {'Asignado a:'.ljust(20)} {nombre_asignado}")
         print(f"  {'Email:'.ljust(20)} {email_asignado}")
         if fecha_devolucion:
-            print(f"  {'Fecha de Devolución:'.ljust(20)} {fecha_devolucion}")
+            print(f"  {'Fecha de Devolución:'.ljust(20)} {fecha_devolucion.strftime('%d/%m/%Y')}")
         print(f"  {'Observación:'.ljust(20)} {observacion_asignacion}")
         print("--------------------------------" + Style.RESET_ALL)
         
@@ -541,18 +592,21 @@ def asignar_o_prestar_equipo(usuario: str, equipo: Equipo):
         equipo.estado = "En préstamo" if es_prestamo else "Asignado"
         detalles_movimiento = f"{tipo_movimiento} a {nombre_asignado}. Obs: {observacion_asignacion}"
         if fecha_devolucion:
-            detalles_movimiento += f". Devolución: {fecha_devolucion}"
+            detalles_movimiento += f". Devolución: {fecha_devolucion.strftime('%d/%m/%Y')}"
         
         equipo.asignado_a = nombre_asignado
         equipo.email_asignado = email_asignado
-        equipo.fecha_devolucion_prestamo = fecha_devolucion
+        equipo.fecha_devolucion_prestamo = fecha_devolucion.strftime(FORMATO_FECHA) if fecha_devolucion else None
 
-        db_manager.update_equipo(equipo)
-        registrar_movimiento_inventario(equipo.placa, tipo_movimiento, detalles_movimiento, usuario)
+        with db_manager.transaction():
+            db_manager.update_equipo(equipo)
+            registrar_movimiento_inventario(equipo.placa, tipo_movimiento, detalles_movimiento, usuario)
         print(Fore.GREEN + f"\n✅ ¡Operación confirmada! Equipo {equipo.placa} ahora está '{equipo.estado}'.")
 
     except KeyboardInterrupt:
         print(Fore.CYAN + "\n🚫 Operación cancelada.")
+    except ConflictoEdicion as e:
+        mostrar_conflicto(e)
     finally:
         pausar_pantalla()
 
@@ -588,12 +642,15 @@ def devolver_equipo(usuario: str, equipo: Equipo):
         equipo.email_asignado = None
         equipo.fecha_devolucion_prestamo = None
         
-        db_manager.update_equipo(equipo)
-        registrar_movimiento_inventario(equipo.placa, "Devolución a Inventario", detalles_previos, usuario)
+        with db_manager.transaction():
+            db_manager.update_equipo(equipo)
+            registrar_movimiento_inventario(equipo.placa, "Devolución a Inventario", detalles_previos, usuario)
         print(Fore.GREEN + f"\n✅ ¡Devolución confirmada! Equipo {equipo.placa} ahora está 'Disponible'.")
 
     except KeyboardInterrupt:
         print(Fore.CYAN + "\n🚫 Operación cancelada.")
+    except ConflictoEdicion as e:
+        mostrar_conflicto(e)
     finally:
         pausar_pantalla()
 
@@ -650,13 +707,16 @@ def editar_equipo(usuario: str, equipo: Equipo):
             return
 
         equipo.tipo, equipo.marca, equipo.modelo, equipo.serial = tipo_nuevo, marca_nueva, modelo_nuevo, serial_nuevo
-        db_manager.update_equipo(equipo)
         detalles_log = f"Cambios: {'; '.join(cambios)}. Motivo: {motivo_edicion}"
-        registrar_movimiento_inventario(equipo.placa, "Edición", detalles_log, usuario)
+        with db_manager.transaction():
+            db_manager.update_equipo(equipo)
+            registrar_movimiento_inventario(equipo.placa, "Edición", detalles_log, usuario)
         print(Fore.GREEN + f"\n✅ ¡Equipo {equipo.placa} actualizado exitosamente!")
 
     except KeyboardInterrupt:
         print(Fore.CYAN + "\n🚫 Operación de edición cancelada.")
+    except ConflictoEdicion as e:
+        mostrar_conflicto(e)
     finally:
         pausar_pantalla()
 
@@ -670,13 +730,13 @@ def registrar_renovacion(usuario: str, equipo_actual: Equipo) -> bool:
         print(Fore.CYAN + "💡 Este proceso requiere que el nuevo equipo ya esté registrado en el sistema.")
         
         # Mostrar equipos disponibles
-        equipos_nuevos = db_manager.get_new_equipos()
+        equipos_nuevos = db_manager.get_new_equipos(columns="lista")
         if equipos_nuevos:
             print(Fore.GREEN + "\n--- Equipos Nuevos (sin gestión) ---" + Style.RESET_ALL)
             for equipo in equipos_nuevos:
                 print(f"  - Placa: {equipo['placa']}, Tipo: {equipo['tipo']}, Marca: {equipo['marca']}")
         
-        equipos_disponibles = db_manager.get_available_not_new_equipos()
+        equipos_disponibles = db_manager.get_available_not_new_equipos(columns="lista")
         if equipos_disponibles:
             print(Fore.CYAN + "\n--- Equipos Disponibles (con historial) ---" + Style.RESET_ALL)
             for equipo in equipos_disponibles:
@@ -690,8 +750,14 @@ def registrar_renovacion(usuario: str, equipo_actual: Equipo) -> bool:
             equipo_nuevo_data = db_manager.get_equipo_by_placa(placa_nuevo_equipo)
             if not equipo_nuevo_data:
                 print(Fore.RED + f"\nLa placa '{placa_nuevo_equipo}' no existe.")
-                print(Fore.YELLOW + "Por favor, vaya a 'Registrar nuevo equipo', créelo y vuelva a ejecutar esta operación.")
-                return False
+                placa_sugerida = sugerir_placa(placa_nuevo_equipo)
+                if not placa_sugerida:
+                    print(Fore.YELLOW + "Por favor, vaya a 'Registrar nuevo equipo', créelo y vuelva a ejecutar esta operación.")
+                    return False
+                placa_nuevo_equipo = placa_sugerida
+                equipo_nuevo_data = db_manager.get_equipo_by_placa(placa_nuevo_equipo)
+                if not equipo_nuevo_data:
+                    continue
             
             if equipo_nuevo_data['estado'] != 'Disponible':
                 print(Fore.RED + f"El equipo '{placa_nuevo_equipo}' no está 'Disponible' (Estado actual: {equipo_nuevo_data['estado']}).")
@@ -712,7 +778,7 @@ def registrar_renovacion(usuario: str, equipo_actual: Equipo) -> bool:
                         break
                     print(Fore.RED + "La justificación es obligatoria.")
 
-            equipo_nuevo = Equipo(**equipo_nuevo_data)
+            equipo_nuevo = equipo_nuevo_data
             break
             
         print(Fore.YELLOW + textwrap.dedent("""\
@@ -735,7 +801,8 @@ def registrar_renovacion(usuario: str, equipo_actual: Equipo) -> bool:
             
         while True:
             fecha_max_entrega_str = input(Fore.YELLOW + "Fecha máxima de entrega del equipo actual (DD/MM/AAAA): " + Style.RESET_ALL).strip()
-            if validar_formato_fecha(fecha_max_entrega_str):
+            fecha_max_entrega = validar_formato_fecha(fecha_max_entrega_str)
+            if fecha_max_entrega:
                 break
             print(Fore.RED + "Formato de fecha inválido.")
 
@@ -760,19 +827,20 @@ def registrar_renovacion(usuario: str, equipo_actual: Equipo) -> bool:
             print(Fore.RED + "\n❌ Las placas no coinciden. Operación cancelada.")
             return False
 
-        # Ambos equipos se bloquean en estado "Renovación"
-        # Actualizar equipo actual (el que se devuelve)
-        equipo_actual.estado = "Renovación"
-        equipo_actual.fecha_entrega_renovacion = fecha_max_entrega_str
-        equipo_actual.renovacion_placa_asociada = equipo_nuevo.placa
-        db_manager.update_equipo(equipo_actual)
-        registrar_movimiento_inventario(equipo_actual.placa, "Inicio Renovación", f"Reemplazado por {equipo_nuevo.placa}. Obs: {observaciones}", usuario)
-
-        # Actualizar equipo nuevo (el que se asignará)
-        equipo_nuevo.estado = "Renovación"
-        equipo_nuevo.renovacion_placa_asociada = equipo_actual.placa
-        db_manager.update_equipo(equipo_nuevo)
-        registrar_movimiento_inventario(equipo_nuevo.placa, "Inicio Renovación", f"Reemplazo de {equipo_actual.placa}. Obs: {observaciones}", usuario)
+        # Ambos equipos se bloquean en estado "Renovación" en una única transacción
+        with db_manager.transaction():
+            # Actualizar equipo actual (el que se devuelve)
+            equipo_actual.estado = "Renovación"
+            equipo_actual.fecha_entrega_renovacion = fecha_max_entrega.strftime(FORMATO_FECHA)
+            equipo_actual.renovacion_placa_asociada = equipo_nuevo.placa
+            db_manager.update_equipo(equipo_actual)
+            registrar_movimiento_inventario(equipo_actual.placa, "Inicio Renovación", f"Reemplazado por {equipo_nuevo.placa}. Obs: {observaciones}", usuario)
+
+            # Actualizar equipo nuevo (el que se asignará)
+            equipo_nuevo.estado = "Renovación"
+            equipo_nuevo.renovacion_placa_asociada = equipo_actual.placa
+            db_manager.update_equipo(equipo_nuevo)
+            registrar_movimiento_inventario(equipo_nuevo.placa, "Inicio Renovación", f"Reemplazo de {equipo_actual.placa}. Obs: {observaciones}", usuario)
 
         print(Fore.GREEN + "\n✅ Renovación registrada. Pendiente de aprobación por un Administrador.")
         return True
@@ -780,6 +848,9 @@ def registrar_renovacion(usuario: str, equipo_actual: Equipo) -> bool:
     except KeyboardInterrupt:
         print(Fore.CYAN + "\n🚫 Operación de renovación cancelada.")
         return False
+    except ConflictoEdicion as e:
+        mostrar_conflicto(e)
+        return False
     finally:
         pausar_pantalla()
 
@@ -790,10 +861,10 @@ def menu_gestionar_pendientes(usuario: str):
         # Se elimina la limpieza de pantalla redundante. mostrar_encabezado ya lo hace.
         mostrar_encabezado("Gestionar Mantenimientos, Devoluciones y Renovaciones")
         
-        equipos = db_manager.get_all_equipos()
-        mantenimientos_pendientes = len([e for e in equipos if e.get('estado') == "En mantenimiento"])
-        devoluciones_pendientes = len([e for e in equipos if e.get('estado') == "Pendiente Devolución a Proveedor"])
-        renovaciones_pendientes = len([e for e in equipos if e.get('estado') == "Renovación" and e.get('fecha_entrega_renovacion')])
+        conteo_estados = db_manager.count_by_estado()
+        mantenimientos_pendientes = conteo_estados.get("En mantenimiento", 0)
+        devoluciones_pendientes = conteo_estados.get("Pendiente Devolución a Proveedor", 0)
+        renovaciones_pendientes = db_manager.count_renovaciones_pendientes()
 
         def get_color_indicator(count):
             if count == 0: return Fore.GREEN
@@ -861,13 +932,16 @@ def registrar_mantenimiento(usuario: str, equipo: Equipo):
 
         equipo.estado_anterior = equipo.estado
         equipo.estado = "En mantenimiento"
-        db_manager.update_equipo(equipo)
         detalles = f"Tipo: {tipo_seleccionado}. Obs: {observaciones_mantenimiento}. Estado anterior: {equipo.estado_anterior}"
-        registrar_movimiento_inventario(equipo.placa, "Mantenimiento", detalles, usuario)
+        with db_manager.transaction():
+            db_manager.update_equipo(equipo)
+            registrar_movimiento_inventario(equipo.placa, "Mantenimiento", detalles, usuario)
         print(Fore.GREEN + f"\n✅ Mantenimiento registrado. Estado cambiado a 'En mantenimiento'.")
 
     except KeyboardInterrupt:
         print(Fore.CYAN + "\n🚫 Operación cancelada.")
+    except ConflictoEdicion as e:
+        mostrar_conflicto(e)
     finally:
         pausar_pantalla()
 
@@ -886,8 +960,9 @@ def registrar_devolucion_a_proveedor(usuario: str, equipo: Equipo):
         
         while True:
             fecha_str = input(Fore.YELLOW + "Fecha de devolución a proveedor (DD/MM/AAAA): " + Style.RESET_ALL).strip()
-            if validar_formato_fecha(fecha_str):
-                fecha_devolucion = fecha_str
+            fecha_dt = validar_formato_fecha(fecha_str)
+            if fecha_dt:
+                fecha_devolucion = fecha_dt.strftime(FORMATO_FECHA)
                 break
             print(Fore.RED + "Formato de fecha inválido.")
 
@@ -900,7 +975,7 @@ def registrar_devolucion_a_proveedor(usuario: str, equipo: Equipo):
         print("\n" + Fore.CYAN + "--- Resumen de Devolución a Proveedor ---")
         print(f"  {'Equipo (Placa):'.ljust(25)} {equipo.placa}")
         print(f"  {'Motivo:'.ljust(25)} {motivo}")
-        print(f"  {'Fecha programada:'.ljust(25)} {fecha_devolucion}")
+        print(f"  {'Fecha programada:'.ljust(25)} {fecha_a_pantalla(fecha_devolucion)}")
         print(f"  {'Observaciones:'.ljust(25)} {observaciones}")
         print(f"  {'Nuevo estado:'.ljust(25)} Pendiente Devolución a Proveedor")
         print("-----------------------------------" + Style.RESET_ALL)
@@ -917,13 +992,16 @@ def registrar_devolucion_a_proveedor(usuario: str, equipo: Equipo):
         equipo.email_asignado = None
         equipo.fecha_devolucion_prestamo = None
 
-        db_manager.update_equipo(equipo)
-        detalles = f"Motivo: {motivo}. Fecha prog.: {fecha_devolucion}. Obs: {observaciones}. Estado anterior: {estado_anterior}"
-        registrar_movimiento_inventario(equipo.placa, "Registro Devolución Proveedor", detalles, usuario)
+        detalles = f"Motivo: {motivo}. Fecha prog.: {fecha_a_pantalla(fecha_devolucion)}. Obs: {observaciones}. Estado anterior: {estado_anterior}"
+        with db_manager.transaction():
+            db_manager.update_equipo(equipo)
+            registrar_movimiento_inventario(equipo.placa, "Registro Devolución Proveedor", detalles, usuario)
         print(Fore.GREEN + f"\n✅ Equipo {equipo.placa} registrado para devolución a proveedor.")
 
     except KeyboardInterrupt:
         print(Fore.CYAN + "\n🚫 Operación cancelada.")
+    except ConflictoEdicion as e:
+        mostrar_conflicto(e)
     finally:
         pausar_pantalla()
 
@@ -952,8 +1030,10 @@ def eliminar_equipo(usuario: str, equipo: Equipo) -> bool:
         if not confirmar_con_placa(equipo.placa):
             return False
 
-        db_manager.delete_equipo(equipo.placa)
-        registrar_movimiento_inventario(equipo.placa, "Eliminación", f"Equipo eliminado. Motivo: {motivo}", usuario)
+        # El historial del equipo se elimina en cascada, por lo que la eliminación queda en el log del sistema.
+        with db_manager.transaction():
+            db_manager.delete_equipo(equipo.placa)
+            registrar_movimiento_sistema("Eliminación Equipo", f"Equipo {equipo.placa} eliminado. Motivo: {motivo}", usuario)
         print(Fore.GREEN + f"\n✅ Equipo {equipo.placa} eliminado.")
         pausar_pantalla()
         return True
@@ -968,10 +1048,10 @@ def menu_gestionar_pendientes(usuario: str):
     while True:
         os.system('cls' if os.name == 'nt' else 'clear')
         
-        equipos = db_manager.get_all_equipos()
-        mantenimientos_pendientes = len([e for e in equipos if e.get('estado') == "En mantenimiento"])
-        devoluciones_pendientes = len([e for e in equipos if e.get('estado') == "Pendiente Devolución a Proveedor"])
-        renovaciones_pendientes = len([e for e in equipos if e.get('estado') == "Renovación"])
+        conteo_estados = db_manager.count_by_estado()
+        mantenimientos_pendientes = conteo_estados.get("En mantenimiento", 0)
+        devoluciones_pendientes = conteo_estados.get("Pendiente Devolución a Proveedor", 0)
+        renovaciones_pendientes = conteo_estados.get("Renovación", 0)
 
         def get_color_indicator(count):
             if count == 0: return Fore.GREEN
@@ -1017,7 +1097,7 @@ def gestionar_mantenimientos(usuario: str):
     mostrar_encabezado("Gestionar Equipos en Mantenimiento", color=Fore.BLUE)
     try:
         while True:
-            equipos_pendientes = [Equipo(**e) for e in db_manager.get_all_equipos() if e.get('estado') == "En mantenimiento"]
+            equipos_pendientes = list(db_manager.find_equipos(estado="En mantenimiento", columns=["placa", "tipo", "marca"]))
             if not equipos_pendientes:
                 print(Fore.YELLOW + "\nNo hay equipos en mantenimiento para gestionar.")
                 pausar_pantalla()
@@ -1028,7 +1108,7 @@ def gestionar_mantenimientos(usuario: str):
             print(Fore.CYAN + "💡 Puede presionar Ctrl+C en cualquier momento para regresar." + Style.RESET_ALL)
             print(Fore.WHITE + "\n--- Equipos en Mantenimiento ---" + Style.RESET_ALL)
             for i, equipo in enumerate(equipos_pendientes, 1):
-                print(f"{Fore.YELLOW}{i}.{Style.RESET_ALL} Placa: {equipo.placa}, Tipo: {equipo.tipo}, Marca: {equipo.marca}")
+                print(f"{Fore.YELLOW}{i}.{Style.RESET_ALL} Placa: {equipo['placa']}, Tipo: {equipo['tipo']}, Marca: {equipo['marca']}")
             print(Fore.WHITE + "---------------------------------" + Style.RESET_ALL)
 
             seleccion = input(Fore.YELLOW + "\nSeleccione el equipo a gestionar: " + Style.RESET_ALL).strip()
@@ -1038,7 +1118,10 @@ def gestionar_mantenimientos(usuario: str):
                 if not (0 <= indice < len(equipos_pendientes)):
                     print(Fore.RED + "❌ Número no válido."); continue
                 
-                equipo_a_gestionar = equipos_pendientes[indice]
+                equipo_data = db_manager.get_equipo_by_placa(equipos_pendientes[indice]['placa'])
+                if not equipo_data:
+                    print(Fore.RED + "❌ El equipo ya no existe."); continue
+                equipo_a_gestionar = equipo_data
                 
                 ultimo_movimiento = db_manager.get_last_movimiento_by_placa(equipo_a_gestionar.placa)
 
@@ -1078,8 +1161,9 @@ def gestionar_mantenimientos(usuario: str):
 
                     equipo_a_gestionar.estado = nuevo_estado
                     equipo_a_gestionar.estado_anterior = None
-                    db_manager.update_equipo(equipo_a_gestionar)
-                    registrar_movimiento_inventario(equipo_a_gestionar.placa, "Mantenimiento Completado", f"Estado restaurado a '{nuevo_estado}'. Obs: {observacion}", usuario)
+                    with db_manager.transaction():
+                        db_manager.update_equipo(equipo_a_gestionar)
+                        registrar_movimiento_inventario(equipo_a_gestionar.placa, "Mantenimiento Completado", f"Estado restaurado a '{nuevo_estado}'. Obs: {observacion}", usuario)
                     print(Fore.GREEN + f"\n✅ Equipo {equipo_a_gestionar.placa} ahora está '{nuevo_estado}'.")
 
                 elif accion == '2':
@@ -1109,7 +1193,8 @@ def gestionar_mantenimientos(usuario: str):
 
                     while True:
                         fecha_devolucion_str = input(Fore.YELLOW + "Fecha de devolución a proveedor (DD/MM/AAAA): " + Style.RESET_ALL).strip()
-                        if validar_formato_fecha(fecha_devolucion_str):
+                        fecha_devolucion_dt = validar_formato_fecha(fecha_devolucion_str)
+                        if fecha_devolucion_dt:
                             break
                         print(Fore.RED + "Formato de fecha inválido.")
 
@@ -1148,21 +1233,23 @@ def gestionar_mantenimientos(usuario: str):
                         pausar_pantalla()
                         continue
 
-                    if fue_retirado:
-                        registrar_movimiento_inventario(equipo_a_gestionar.placa, "Devolución a Inventario", f"Retirado de {equipo_a_gestionar.asignado_a}. Motivo: {observacion_retiro}", usuario)
+                    detalles_log_retiro = f"Retirado de {equipo_a_gestionar.asignado_a}. Motivo: {observacion_retiro}"
 
                     equipo_a_gestionar.estado = "Pendiente Devolución a Proveedor"
                     equipo_a_gestionar.estado_anterior = "En mantenimiento"
                     equipo_a_gestionar.asignado_a = None
                     equipo_a_gestionar.email_asignado = None
                     equipo_a_gestionar.fecha_devolucion_prestamo = None
-                    equipo_a_gestionar.fecha_devolucion_proveedor = fecha_devolucion_str
+                    equipo_a_gestionar.fecha_devolucion_proveedor = fecha_devolucion_dt.strftime(FORMATO_FECHA)
                     equipo_a_gestionar.motivo_devolucion = motivo_devolucion
                     equipo_a_gestionar.observaciones = observaciones_devolucion
 
-                    db_manager.update_equipo(equipo_a_gestionar)
                     detalles_log_devolucion = f"Motivo: {motivo_devolucion}. Fecha prog.: {fecha_devolucion_str}. Obs: {observaciones_devolucion}. Proceso iniciado desde Mantenimiento."
-                    registrar_movimiento_inventario(equipo_a_gestionar.placa, "Registro Devolución Proveedor", detalles_log_devolucion, usuario)
+                    with db_manager.transaction():
+                        if fue_retirado:
+                            registrar_movimiento_inventario(equipo_a_gestionar.placa, "Devolución a Inventario", detalles_log_retiro, usuario)
+                        db_manager.update_equipo(equipo_a_gestionar)
+                        registrar_movimiento_inventario(equipo_a_gestionar.placa, "Registro Devolución Proveedor", detalles_log_devolucion, usuario)
 
                     print(Fore.GREEN + "\n✅ ¡Operación completada! El equipo ha sido retirado y marcado para devolución al proveedor.")
 
@@ -1171,6 +1258,8 @@ def gestionar_mantenimientos(usuario: str):
 
             except ValueError:
                 print(Fore.RED + "❌ Entrada inválida. Ingrese un número.")
+            except ConflictoEdicion as e:
+                mostrar_conflicto(e)
             pausar_pantalla()
     except KeyboardInterrupt:
         print(Fore.CYAN + "\n🚫 Regresando al menú anterior.")
@@ -1181,7 +1270,8 @@ def gestionar_devoluciones_proveedor(usuario: str):
     mostrar_encabezado("Gestionar Devoluciones a Proveedor", color=Fore.BLUE)
     try:
         while True:
-            equipos_pendientes = [Equipo(**e) for e in db_manager.get_all_equipos() if e.get('estado') == "Pendiente Devolución a Proveedor"]
+            equipos_pendientes = list(db_manager.find_equipos(estado="Pendiente Devolución a Proveedor", columns=["placa", "fecha_devolucion_proveedor", "motivo_devolucion"],
+                                                           order_by="fecha_devolucion_proveedor"))
             if not equipos_pendientes:
                 print(Fore.YELLOW + "\nNo hay devoluciones pendientes para gestionar.")
                 pausar_pantalla()
@@ -1192,7 +1282,7 @@ def gestionar_devoluciones_proveedor(usuario: str):
             print(Fore.CYAN + "💡 Puede presionar Ctrl+C en cualquier momento para regresar." + Style.RESET_ALL)
             print(Fore.WHITE + "\n--- Devoluciones Pendientes ---" + Style.RESET_ALL)
             for i, equipo in enumerate(equipos_pendientes, 1):
-                print(f"{Fore.YELLOW}{i}.{Style.RESET_ALL} Placa: {equipo.placa}, Fecha Prog.: {equipo.fecha_devolucion_proveedor}, Motivo: {equipo.motivo_devolucion}")
+                print(f"{Fore.YELLOW}{i}.{Style.RESET_ALL} Placa: {equipo['placa']}, Fecha Prog.: {fecha_a_pantalla(equipo['fecha_devolucion_proveedor'])}, Motivo: {equipo['motivo_devolucion']}")
             print(Fore.WHITE + "---------------------------------" + Style.RESET_ALL)
 
             seleccion = input(Fore.YELLOW + "Seleccione el equipo a gestionar: " + Style.RESET_ALL).strip()
@@ -1202,7 +1292,10 @@ def gestionar_devoluciones_proveedor(usuario: str):
                 if not (0 <= indice < len(equipos_pendientes)):
                     print(Fore.RED + "❌ Número no válido."); continue
                 
-                equipo_a_gestionar = equipos_pendientes[indice]
+                equipo_data = db_manager.get_equipo_by_placa(equipos_pendientes[indice]['placa'])
+                if not equipo_data:
+                    print(Fore.RED + "❌ El equipo ya no existe."); continue
+                equipo_a_gestionar = equipo_data
 
                 ultimo_movimiento = db_manager.get_last_movimiento_by_placa(equipo_a_gestionar.placa)
 
@@ -1227,7 +1320,7 @@ def gestionar_devoluciones_proveedor(usuario: str):
                     print(f"  {'Fecha del Evento:'.ljust(25)} {fecha_evento}")
                     print(f"  {'Usuario que Registró:'.ljust(25)} {ultimo_movimiento['usuario']}")
                     print(f"  {'Motivo:'.ljust(25)} {equipo_a_gestionar.motivo_devolucion}")
-                    print(f"  {'Fecha Programada:'.ljust(25)} {equipo_a_gestionar.fecha_devolucion_proveedor}")
+                    print(f"  {'Fecha Programada:'.ljust(25)} {fecha_a_pantalla(equipo_a_gestionar.fecha_devolucion_proveedor)}")
                     print(f"  {'Observaciones:'.ljust(25)} {equipo_a_gestionar.observaciones}")
                 else:
                     print(Fore.YELLOW + "No se encontraron detalles específicos del registro de devolución.")
@@ -1249,8 +1342,9 @@ def gestionar_devoluciones_proveedor(usuario: str):
                     equipo_a_gestionar.observaciones = observacion
                     equipo_a_gestionar.asignado_a = None
                     equipo_a_gestionar.email_asignado = None
-                    db_manager.update_equipo(equipo_a_gestionar)
-                    registrar_movimiento_inventario(equipo_a_gestionar.placa, "Devolución a Proveedor Completada", f"Devolución confirmada. Obs: {observacion}", usuario)
+                    with db_manager.transaction():
+                        db_manager.update_equipo(equipo_a_gestionar)
+                        registrar_movimiento_inventario(equipo_a_gestionar.placa, "Devolución a Proveedor Completada", f"Devolución confirmada. Obs: {observacion}", usuario)
                     print(Fore.GREEN + f"\n✅ Equipo {equipo_a_gestionar.placa} marcado como 'Devuelto a Proveedor'.")
 
                 elif accion == '2': # Rechazar Devolución
@@ -1264,8 +1358,9 @@ def gestionar_devoluciones_proveedor(usuario: str):
                     equipo_a_gestionar.estado = "Disponible"
                     equipo_a_gestionar.estado_anterior = "Pendiente Devolución a Proveedor"
                     equipo_a_gestionar.observaciones = observacion
-                    db_manager.update_equipo(equipo_a_gestionar)
-                    registrar_movimiento_inventario(equipo_a_gestionar.placa, "Rechazo Devolución Proveedor", f"Devolución rechazada. Motivo: {observacion}", usuario)
+                    with db_manager.transaction():
+                        db_manager.update_equipo(equipo_a_gestionar)
+                        registrar_movimiento_inventario(equipo_a_gestionar.placa, "Rechazo Devolución Proveedor", f"Devolución rechazada. Motivo: {observacion}", usuario)
                     print(Fore.GREEN + f"\n✅ Devolución rechazada. Equipo {equipo_a_gestionar.placa} vuelve a estar 'Disponible'.")
 
                 elif accion == '3': # Cancelar
@@ -1276,6 +1371,8 @@ def gestionar_devoluciones_proveedor(usuario: str):
 
             except ValueError:
                 print(Fore.RED + "❌ Entrada inválida. Ingrese un número.")
+            except ConflictoEdicion as e:
+                mostrar_conflicto(e)
             pausar_pantalla()
 
     except KeyboardInterrupt:
@@ -1291,7 +1388,8 @@ def gestionar_renovaciones(usuario: str):
         mostrar_encabezado("Gestionar Renovaciones Pendientes", color=Fore.BLUE)
 
         # Se muestra solo un registro por renovación (el equipo a devolver)
-        equipos_pendientes = [Equipo(**e) for e in db_manager.get_all_equipos() if e.get('estado') == "Renovación" and e.get('fecha_entrega_renovacion')]
+        equipos_pendientes = list(db_manager.find_equipos(estado="Renovación", columns=["placa", "asignado_a", "fecha_entrega_renovacion"],
+                                                           no_nulos=["fecha_entrega_renovacion"], order_by="fecha_entrega_renovacion"))
         if not equipos_pendientes:
             print(Fore.YELLOW + "\nNo hay renovaciones pendientes para gestionar.")
             pausar_pantalla()
@@ -1300,7 +1398,7 @@ def gestionar_renovaciones(usuario: str):
         print(Fore.CYAN + "💡 Puede presionar Ctrl+C para regresar." + Style.RESET_ALL)
         print(Fore.WHITE + "\n--- Renovaciones Pendientes de Aprobación ---" + Style.RESET_ALL)
         for i, equipo in enumerate(equipos_pendientes, 1):
-            print(f"{Fore.YELLOW}{i}.{Style.RESET_ALL} Placa: {equipo.placa}, Usuario: {equipo.asignado_a}, Fecha Máx. Entrega: {equipo.fecha_entrega_renovacion}")
+            print(f"{Fore.YELLOW}{i}.{Style.RESET_ALL} Placa: {equipo['placa']}, Usuario: {equipo['asignado_a']}, Fecha Máx. Entrega: {fecha_a_pantalla(equipo['fecha_entrega_renovacion'])}")
         print(Fore.WHITE + "-------------------------------------------" + Style.RESET_ALL)
 
         try:
@@ -1311,8 +1409,12 @@ def gestionar_renovaciones(usuario: str):
             if not (0 <= indice < len(equipos_pendientes)):
                 print(Fore.RED + "❌ Número no válido."); continue
             
-            equipo_actual = equipos_pendientes[indice]
-            equipo_nuevo = Equipo(**db_manager.get_equipo_by_placa(equipo_actual.renovacion_placa_asociada))
+            equipo_actual = db_manager.get_equipo_by_placa(equipos_pendientes[indice]['placa'])
+            if not equipo_actual:
+                print(Fore.RED + "❌ El equipo ya no existe."); continue
+            equipo_nuevo = db_manager.get_equipo_by_placa(equipo_actual.renovacion_placa_asociada)
+            if not equipo_nuevo:
+                print(Fore.RED + f"❌ El equipo nuevo asociado ({equipo_actual.renovacion_placa_asociada}) ya no existe."); continue
             log_solicitud = db_manager.get_last_log_by_action(equipo_actual.placa, "Inicio Renovación")
 
             os.system('cls' if os.name == 'nt' else 'clear')
@@ -1322,7 +1424,7 @@ def gestionar_renovaciones(usuario: str):
             print(Fore.CYAN + "\n--- Detalles del Equipo Actual ---")
             print(f"  Placa: {equipo_actual.placa} ({equipo_actual.modelo})")
             print(f"  Registrado: {equipo_actual.fecha_registro} ({calcular_antiguedad(equipo_actual.fecha_registro)})")
-            print(Fore.RED + f"  Fecha máxima para entregar equipo: {equipo_actual.fecha_entrega_renovacion}")
+            print(Fore.RED + f"  Fecha máxima para entregar equipo: {fecha_a_pantalla(equipo_actual.fecha_entrega_renovacion)}")
 
             print(Fore.CYAN + "\n--- Detalles del Equipo Nuevo ---")
             print(f"  Placa: {equipo_nuevo.placa} ({equipo_nuevo.modelo})")
@@ -1342,11 +1444,13 @@ def gestionar_renovaciones(usuario: str):
             accion = input(Fore.YELLOW + "Seleccione una acción: " + Style.RESET_ALL).strip()
 
             if accion == '1': # Aprobar
-                fecha_max_entrega_actualizada = input(Fore.YELLOW + f"Modificar fecha máx. de entrega ({equipo_actual.fecha_entrega_renovacion}) o presione Enter para mantener: " + Style.RESET_ALL).strip()
-                if fecha_max_entrega_actualizada and not validar_formato_fecha(fecha_max_entrega_actualizada):
-                    print(Fore.RED + "Formato de fecha inválido."); continue
-                if not fecha_max_entrega_actualizada:
-                    fecha_max_entrega_actualizada = equipo_actual.fecha_entrega_renovacion
+                fecha_max_entrega_str = input(Fore.YELLOW + f"Modificar fecha máx. de entrega ({fecha_a_pantalla(equipo_actual.fecha_entrega_renovacion)}) o presione Enter para mantener: " + Style.RESET_ALL).strip()
+                fecha_max_entrega_actualizada = equipo_actual.fecha_entrega_renovacion
+                if fecha_max_entrega_str:
+                    fecha_max_entrega_dt = validar_formato_fecha(fecha_max_entrega_str)
+                    if not fecha_max_entrega_dt:
+                        print(Fore.RED + "Formato de fecha inválido."); continue
+                    fecha_max_entrega_actualizada = fecha_max_entrega_dt.strftime(FORMATO_FECHA)
 
                 obs = input(Fore.YELLOW + "Observaciones de la aprobación (opcional): " + Style.RESET_ALL).strip() or "Aprobado por administrador."
                 if not confirmar_con_placa(equipo_actual.placa): continue
@@ -1355,22 +1459,23 @@ def gestionar_renovaciones(usuario: str):
                 usuario_asignado = equipo_actual.asignado_a
                 email_usuario = equipo_actual.email_asignado
 
-                # 1. Desvincular equipo actual y enviarlo a proveedor
-                equipo_actual.estado = "Pendiente Devolución a Proveedor"
-                equipo_actual.motivo_devolucion = "Renovación"
-                equipo_actual.fecha_devolucion_proveedor = fecha_max_entrega_actualizada
-                equipo_actual.observaciones = f"Renovación Aprobada. {obs}"
-                equipo_actual.asignado_a = None
-                equipo_actual.email_asignado = None
-                db_manager.update_equipo(equipo_actual)
-                registrar_movimiento_inventario(equipo_actual.placa, "Renovación Aprobada", f"Equipo desvinculado y listo para devolver. Obs: {obs}", usuario)
-
-                # 2. Asignar equipo nuevo
-                equipo_nuevo.estado = "Asignado"
-                equipo_nuevo.asignado_a = usuario_asignado
-                equipo_nuevo.email_asignado = email_usuario
-                db_manager.update_equipo(equipo_nuevo)
-                registrar_movimiento_inventario(equipo_nuevo.placa, "Asignación por Renovación Aprobada", f"Asignado a {usuario_asignado} como reemplazo de {equipo_actual.placa}", usuario)
+                with db_manager.transaction():
+                    # 1. Desvincular equipo actual y enviarlo a proveedor
+                    equipo_actual.estado = "Pendiente Devolución a Proveedor"
+                    equipo_actual.motivo_devolucion = "Renovación"
+                    equipo_actual.fecha_devolucion_proveedor = fecha_max_entrega_actualizada
+                    equipo_actual.observaciones = f"Renovación Aprobada. {obs}"
+                    equipo_actual.asignado_a = None
+                    equipo_actual.email_asignado = None
+                    db_manager.update_equipo(equipo_actual)
+                    registrar_movimiento_inventario(equipo_actual.placa, "Renovación Aprobada", f"Equipo desvinculado y listo para devolver. Obs: {obs}", usuario)
+
+                    # 2. Asignar equipo nuevo
+                    equipo_nuevo.estado = "Asignado"
+                    equipo_nuevo.asignado_a = usuario_asignado
+                    equipo_nuevo.email_asignado = email_usuario
+                    db_manager.update_equipo(equipo_nuevo)
+                    registrar_movimiento_inventario(equipo_nuevo.placa, "Asignación por Renovación Aprobada", f"Asignado a {usuario_asignado} como reemplazo de {equipo_actual.placa}", usuario)
 
                 print(Fore.GREEN + f"\n✅ Renovación para {equipo_actual.placa} aprobada.")
 
@@ -1380,18 +1485,19 @@ def gestionar_renovaciones(usuario: str):
                     print(Fore.RED + "El motivo es obligatorio."); continue
                 if not confirmar_con_placa(equipo_actual.placa): continue
                 
-                # Revertir equipo nuevo a Disponible
-                equipo_nuevo.estado = "Disponible"
-                equipo_nuevo.renovacion_placa_asociada = None
-                db_manager.update_equipo(equipo_nuevo)
-                registrar_movimiento_inventario(equipo_nuevo.placa, "Renovación Rechazada", f"Vuelve a inventario. Motivo: {obs}", usuario)
-
-                # Revertir equipo actual a Asignado
-                equipo_actual.estado = "Asignado"
-                equipo_actual.renovacion_placa_asociada = None
-                equipo_actual.fecha_entrega_renovacion = None
-                db_manager.update_equipo(equipo_actual)
-                registrar_movimiento_inventario(equipo_actual.placa, "Renovación Rechazada", f"Vuelve a ser 'Asignado'. Motivo: {obs}", usuario)
+                with db_manager.transaction():
+                    # Revertir equipo nuevo a Disponible
+                    equipo_nuevo.estado = "Disponible"
+                    equipo_nuevo.renovacion_placa_asociada = None
+                    db_manager.update_equipo(equipo_nuevo)
+                    registrar_movimiento_inventario(equipo_nuevo.placa, "Renovación Rechazada", f"Vuelve a inventario. Motivo: {obs}", usuario)
+
+                    # Revertir equipo actual a Asignado
+                    equipo_actual.estado = "Asignado"
+                    equipo_actual.renovacion_placa_asociada = None
+                    equipo_actual.fecha_entrega_renovacion = None
+                    db_manager.update_equipo(equipo_actual)
+                    registrar_movimiento_inventario(equipo_actual.placa, "Renovación Rechazada", f"Vuelve a ser 'Asignado'. Motivo: {obs}", usuario)
                 print(Fore.GREEN + "\n✅ Renovación rechazada. Los estados de los equipos han sido revertidos.")
 
             elif accion == '3':
@@ -1402,5 +1508,7 @@ def gestionar_renovaciones(usuario: str):
 
         except (ValueError, IndexError):
             print(Fore.RED + "❌ Entrada inválida.")
+        except ConflictoEdicion as e:
+            mostrar_conflicto(e)
         finally:
             pausar_pantalla()
\ No newline at end of file
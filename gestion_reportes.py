@@ -1,18 +1,17 @@
 # gestion_reportes.py
 import os
-import webbrowser
 from datetime import datetime
+from itertools import chain
 from typing import Optional
 
 import tempfile
-from openpyxl import Workbook
-from openpyxl.styles import Font, Alignment, Border, Side, PatternFill
-from openpyxl.utils import get_column_letter
 from colorama import Fore, Style
 
-from database import db_manager, Equipo, registrar_movimiento_sistema
+from database import db_manager, Equipo, registrar_movimiento_sistema, fecha_a_pantalla
 from ui import mostrar_encabezado, mostrar_menu, pausar_pantalla
 from gestion_acceso import requiere_permiso
+from gestion_busqueda import buscar_texto
+from utilidades_excel import fila_encabezados, fila_datos
 
 # --- MENÚ PRINCIPAL DE VISUALIZACIÓN ---
 @requiere_permiso("ver_inventario")
@@ -24,6 +23,7 @@ def menu_ver_inventario(usuario: str):
             "Generar Reportes de Inventario en Excel",
             "Ver últimos 20 movimientos",
             "Ver Inventario Actual en Consola",
+            "Búsqueda de Texto en Equipos y Movimientos",
             "Volver al menú principal"
         ]
         mostrar_menu(opciones, titulo="Módulo de Visualización de Inventario")
@@ -37,6 +37,8 @@ def menu_ver_inventario(usuario: str):
         elif opcion == '3':
             ver_inventario_consola()
         elif opcion == '4':
+            buscar_texto(usuario)
+        elif opcion == '5':
             break
         else:
             print(Fore.RED + "Opción no válida.")
@@ -99,15 +101,17 @@ def menu_reportes_excel(usuario: str):
 def generar_excel_inventario(usuario: str) -> None:
     """Genera un reporte Excel con los equipos activos."""
     try:
-        inventario = db_manager.get_equipos_activos()
-        if not inventario:
+        from openpyxl import Workbook
+        from openpyxl.styles import Font, Border, Side, PatternFill
+
+        equipos = db_manager.iter_equipos_activos_con_resumen()
+        primero = next(equipos, None)
+        if primero is None:
             print(Fore.YELLOW + "\nNo hay equipos activos para generar un reporte.")
-            pausar_pantalla()
             return
 
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "Inventario de Equipos"
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet("Inventario de Equipos")
 
         header_fill = PatternFill(start_color="4F81BD", end_color="4F81BD", fill_type="solid")
         header_font = Font(color="FFFFFF", bold=True)
@@ -121,33 +125,28 @@ def generar_excel_inventario(usuario: str) -> None:
         column_widths = {'A': 25, 'B': 15, 'C': 25, 'D': 25, 'E': 25, 'F': 30, 'G': 30, 'H': 25, 'I': 25, 'J': 30, 'K': 30, 'L': 80}
         for col, width in column_widths.items():
             ws.column_dimensions[col].width = width
+        ws.freeze_panes = "A2"
         
-        for col_num, encabezado in enumerate(encabezados, 1):
-            col_letra = get_column_letter(col_num)
-            celda = ws[f"{col_letra}1"]
-            celda.value = encabezado
-            celda.fill = header_fill
-            celda.font = header_font
-            celda.alignment = Alignment(horizontal='center')
-            celda.border = border
+        ws.append(fila_encabezados(ws, encabezados, header_fill, header_font, border))
 
         colores_estado = {
             "Disponible": "C6EFCE", "Asignado": "FFEB9C", "En préstamo": "DDEBF7",
             "En mantenimiento": "FCE4D6", "Pendiente Devolución a Proveedor": "FFFFCC"
         }
+        rellenos_estado = {estado: PatternFill(start_color=color, end_color=color, fill_type="solid")
+                           for estado, color in colores_estado.items()}
 
-        for row_num, equipo in enumerate(inventario, 2):
-            ultimo_movimiento = db_manager.get_last_movimiento_by_placa(equipo['placa'])
-            
+        total = 0
+        for equipo in chain([primero], equipos):
             fecha_ult_cambio = "N/A"
             usuario_ult_cambio = "N/A"
             ultima_observacion = equipo.get('observaciones', 'N/A')
 
-            if ultimo_movimiento:
-                fecha_obj = datetime.strptime(ultimo_movimiento['fecha'], "%Y-%m-%d %H:%M:%S")
+            if equipo.get('ultima_fecha'):
+                fecha_obj = datetime.strptime(equipo['ultima_fecha'], "%Y-%m-%d %H:%M:%S")
                 fecha_ult_cambio = fecha_obj.strftime("%d/%m/%Y %H:%M")
-                usuario_ult_cambio = ultimo_movimiento.get('usuario', 'N/A')
-                ultima_observacion = ultimo_movimiento.get('detalles', ultima_observacion)
+                usuario_ult_cambio = equipo.get('ultimo_usuario') or 'N/A'
+                ultima_observacion = equipo.get('ultimos_detalles') or ultima_observacion
 
             data_row = [
                 equipo.get('fecha_registro', 'N/A'), equipo.get('placa', 'N/A'), equipo.get('tipo', 'N/A'),
@@ -156,23 +155,21 @@ def generar_excel_inventario(usuario: str) -> None:
                 equipo.get('asignado_a', ''), equipo.get('email_asignado', ''), ultima_observacion
             ]
             
-            for col_num, cell_value in enumerate(data_row, 1):
-                cell = ws.cell(row=row_num, column=col_num, value=cell_value)
-                cell.border = border
-            
-            estado_celda = ws.cell(row=row_num, column=7)
-            color_hex = colores_estado.get(equipo.get('estado'))
-            if color_hex:
-                estado_celda.fill = PatternFill(start_color=color_hex, end_color=color_hex, fill_type="solid")
-        
-        ws.freeze_panes = "A2"
+            fila = fila_datos(ws, data_row, border)
+            relleno = rellenos_estado.get(equipo.get('estado'))
+            if relleno:
+                fila[6].fill = relleno
+            ws.append(fila)
+            total += 1
+
         
         with tempfile.NamedTemporaryFile(delete=False, suffix=".xlsx") as tmp:
             wb.save(tmp.name)
             ruta_temporal = tmp.name
 
-        registrar_movimiento_sistema("Reporte Inventario Activo", f"Generado reporte con {len(inventario)} equipos", usuario)
+        registrar_movimiento_sistema("Reporte Inventario Activo", f"Generado reporte con {total} equipos", usuario)
         print(Fore.GREEN + f"\n✅ Abriendo el reporte de inventario activo en Excel..." + Style.RESET_ALL)
+        import webbrowser
         webbrowser.open(ruta_temporal)
 
     except Exception as e:
@@ -183,15 +180,17 @@ def generar_excel_inventario(usuario: str) -> None:
 @requiere_permiso("generar_reporte")
 def generar_excel_devueltos_proveedor(usuario: str) -> None:
     try:
-        inventario_devuelto = db_manager.get_equipos_devueltos()
-        if not inventario_devuelto:
+        from openpyxl import Workbook
+        from openpyxl.styles import Font, Border, Side, PatternFill
+
+        equipos = db_manager.iter_equipos_devueltos(columns="devueltos")
+        primero = next(equipos, None)
+        if primero is None:
             print(Fore.YELLOW + "\nNo hay equipos devueltos al proveedor para reportar.")
-            pausar_pantalla()
             return
-            
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "Equipos Devueltos"
+
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet("Equipos Devueltos")
         
         header_fill = PatternFill(start_color="A5A5A5", end_color="A5A5A5", fill_type="solid")
         header_font = Font(color="000000", bold=True)
@@ -205,35 +204,29 @@ def generar_excel_devueltos_proveedor(usuario: str) -> None:
         column_widths = {'A': 15, 'B': 25, 'C': 25, 'D': 25, 'E': 30, 'F': 25, 'G': 25, 'H': 80}
         for col, width in column_widths.items():
             ws.column_dimensions[col].width = width
+        ws.freeze_panes = "A2"
 
-        for col_num, encabezado in enumerate(encabezados, 1):
-            col_letra = get_column_letter(col_num)
-            celda = ws[f"{col_letra}1"]
-            celda.value = encabezado
-            celda.fill = header_fill
-            celda.font = header_font
-            celda.alignment = Alignment(horizontal='center')
-            celda.border = border
+        ws.append(fila_encabezados(ws, encabezados, header_fill, header_font, border))
 
-        for row_num, equipo in enumerate(inventario_devuelto, 2):
+        total = 0
+        for equipo in chain([primero], equipos):
             data_row = [
                 equipo.get('placa', 'N/A'), equipo.get('tipo', 'N/A'), equipo.get('marca', 'N/A'),
                 equipo.get('modelo', 'N/A'), equipo.get('serial', 'N/A'),
-                equipo.get('fecha_devolucion_proveedor', 'N/A'), equipo.get('motivo_devolucion', 'N/A'),
+                fecha_a_pantalla(equipo.get('fecha_devolucion_proveedor')) or 'N/A', equipo.get('motivo_devolucion', 'N/A'),
                 equipo.get('observaciones', 'N/A')
             ]
-            for col_num, cell_value in enumerate(data_row, 1):
-                cell = ws.cell(row=row_num, column=col_num, value=cell_value)
-                cell.border = border
-        
-        ws.freeze_panes = "A2"
+            ws.append(fila_datos(ws, data_row, border))
+            total += 1
+
 
         with tempfile.NamedTemporaryFile(delete=False, suffix=".xlsx") as tmp:
             wb.save(tmp.name)
             ruta_temporal = tmp.name
         
-        registrar_movimiento_sistema("Reporte Equipos Devueltos", f"Generado reporte con {len(inventario_devuelto)} equipos devueltos", usuario)
+        registrar_movimiento_sistema("Reporte Equipos Devueltos", f"Generado reporte con {total} equipos devueltos", usuario)
         print(Fore.GREEN + f"\n✅ Abriendo el reporte de equipos devueltos en Excel..." + Style.RESET_ALL)
+        import webbrowser
         webbrowser.open(ruta_temporal)
 
     except Exception as e:
@@ -244,16 +237,17 @@ def generar_excel_devueltos_proveedor(usuario: str) -> None:
 @requiere_permiso("ver_historico")
 def generar_excel_historico(usuario: str):
     try:
-        log_equipos = db_manager.get_all_log_inventario()
+        from openpyxl import Workbook
+        from openpyxl.styles import Font, Border, Side, PatternFill
 
-        if not log_equipos:
+        movimientos = db_manager.iter_all_log_inventario()
+        primero = next(movimientos, None)
+        if primero is None:
             print(Fore.YELLOW + "\nNo hay movimientos de equipos para exportar.")
-            pausar_pantalla()
             return
 
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "Histórico de Movimientos"
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet("Histórico de Movimientos")
 
         header_fill = PatternFill(start_color="808080", end_color="808080", fill_type="solid")
         header_font = Font(color="FFFFFF", bold=True)
@@ -261,32 +255,23 @@ def generar_excel_historico(usuario: str):
         
         encabezados = ["FECHA", "PLACA EQUIPO", "ACCIÓN", "USUARIO", "DETALLES"]
         
-        for col_num, encabezado in enumerate(encabezados, 1):
-            col_letra = get_column_letter(col_num)
-            celda = ws[f"{col_letra}1"]
-            celda.value = encabezado
-            celda.fill = header_fill
-            celda.font = header_font
-            celda.alignment = Alignment(horizontal='center')
-            celda.border = border
-        
         ws.column_dimensions['A'].width = 25
         ws.column_dimensions['B'].width = 20
         ws.column_dimensions['C'].width = 25
         ws.column_dimensions['D'].width = 20
         ws.column_dimensions['E'].width = 80
+        ws.freeze_panes = "A2"
+
+        ws.append(fila_encabezados(ws, encabezados, header_fill, header_font, border))
 
-        for row_num, mov in enumerate(log_equipos, 2):
+        for mov in chain([primero], movimientos):
             fecha_obj = datetime.strptime(mov['fecha'], "%Y-%m-%d %H:%M:%S")
             fecha_formateada = fecha_obj.strftime("%d/%m/%Y %H:%M")
             
-            ws.cell(row=row_num, column=1, value=fecha_formateada).border = border
-            ws.cell(row=row_num, column=2, value=mov.get('equipo_placa', 'N/A')).border = border
-            ws.cell(row=row_num, column=3, value=mov.get('accion', 'N/A')).border = border
-            ws.cell(row=row_num, column=4, value=mov.get('usuario', 'N/A')).border = border
-            ws.cell(row=row_num, column=5, value=mov.get('detalles', '')).border = border
-        
-        ws.freeze_panes = "A2"
+            ws.append(fila_datos(ws, [
+                fecha_formateada, mov.get('equipo_placa', 'N/A'), mov.get('accion', 'N/A'),
+                mov.get('usuario', 'N/A'), mov.get('detalles', '')
+            ], border))
 
         with tempfile.NamedTemporaryFile(delete=False, suffix=".xlsx") as tmp:
             wb.save(tmp.name)
@@ -294,6 +279,7 @@ def generar_excel_historico(usuario: str):
 
         registrar_movimiento_sistema("Reporte Histórico Equipos", "Generado reporte de histórico de equipos", usuario)
         print(Fore.GREEN + f"\n✅ Abriendo el reporte histórico de equipos en Excel..." + Style.RESET_ALL)
+        import webbrowser
         webbrowser.open(ruta_temporal)
 
     except Exception as e:
@@ -305,22 +291,43 @@ def generar_excel_historico(usuario: str):
 
 @requiere_permiso("ver_inventario")
 def ver_inventario_consola():
-    """Muestra el inventario activo en consola con paginación y ordenamiento."""
+    """Muestra el inventario activo en consola con paginación por clave y ordenamiento."""
     page = 1
     page_size = 20
+    clave_inicio = None  # Clave (estado, placa) del primer equipo de la página actual
+    inventario = None
+    placa_resaltada = None
+    version = None
+
+    def clave(equipo):
+        return (equipo['estado'], equipo['placa'])
     
     while True:
         mostrar_encabezado("Inventario Actual de Equipos Activos")
-        
-        total_equipos = db_manager.count_equipos_activos()
+
+        # Los totales solo se recalculan cuando cambian los datos.
+        version_actual = db_manager.version_datos("equipos")
+        if version_actual != version:
+            version = version_actual
+            conteo_estados = db_manager.count_by_estado()
+            orden_estados = db_manager.get_orden_estados_activos(conteo_estados)
+            total_equipos = sum(conteo_estados[e] for e in orden_estados)
+            if clave_inicio:
+                page = db_manager.get_posicion_equipo_activo(conteo_estados, clave_inicio) // page_size + 1
+            inventario = None
+
         if total_equipos == 0:
             print(Fore.YELLOW + "\nEl inventario activo está vacío.")
             pausar_pantalla()
             return
             
         total_pages = (total_equipos + page_size - 1) // page_size
-        
-        inventario = db_manager.get_equipos_activos_paginated(page, page_size)
+
+        if inventario is None:
+            inventario = db_manager.get_equipos_activos_seek(orden_estados, clave_inicio, page_size)
+            if not inventario:
+                clave_inicio, page = None, 1
+                inventario = db_manager.get_equipos_activos_seek(orden_estados, None, page_size)
 
         # --- INICIO DE CORRECCIÓN: Ajuste de anchos de columna ---
         print(f"{Fore.CYAN}{'PLACA':<15} {'TIPO':<20} {'ESTADO':<35} {'ASIGNADO A'}{Style.RESET_ALL}")
@@ -334,44 +341,76 @@ def ver_inventario_consola():
             elif equipo['estado'] == "Pendiente Devolución a Proveedor": estado_color = Fore.LIGHTYELLOW_EX
             
             asignado_a = equipo.get('asignado_a') or 'N/A'
+            placa_color = Fore.CYAN + Style.BRIGHT if equipo['placa'] == placa_resaltada else ""
             
-            print(f"{equipo['placa']:<15} {equipo['tipo']:<20} {estado_color}{equipo['estado']:<35}{Style.RESET_ALL} {asignado_a}")
+            print(f"{placa_color}{equipo['placa']:<15}{Style.RESET_ALL} {equipo['tipo']:<20} {estado_color}{equipo['estado']:<35}{Style.RESET_ALL} {asignado_a}")
         # --- FIN DE CORRECCIÓN ---
 
         print("\n" + Fore.WHITE + f"Página {page} de {total_pages}" + Style.RESET_ALL)
         
         # --- Navegación ---
-        prompt = f"{Fore.CYAN}Presione (s) para siguiente, (a) para anterior, o (q) para salir: {Style.RESET_ALL}"
+        prompt = f"{Fore.CYAN}Presione (s) siguiente, (a) anterior, (p) ir a página, (b) buscar placa, o (q) para salir: {Style.RESET_ALL}"
         opcion = input(prompt).strip().lower()
+        placa_resaltada = None
 
         if opcion == 's':
-            if page < total_pages:
+            siguiente = db_manager.get_equipos_activos_seek(orden_estados, clave(inventario[-1]), page_size, incluir_clave=False) if inventario else []
+            if page < total_pages and siguiente:
+                inventario = siguiente
+                clave_inicio = clave(inventario[0])
                 page += 1
             else:
                 print(Fore.YELLOW + "Ya estás en la última página.")
                 pausar_pantalla()
         elif opcion == 'a':
-            if page > 1:
+            anterior = db_manager.get_equipos_activos_seek(orden_estados, clave(inventario[0]), page_size, incluir_clave=False, descendente=True) if inventario else []
+            if page > 1 and anterior:
+                inventario = list(reversed(anterior))
+                clave_inicio = clave(inventario[0])
                 page -= 1
             else:
                 print(Fore.YELLOW + "Ya estás en la primera página.")
                 pausar_pantalla()
+        elif opcion == 'p':
+            try:
+                destino = int(input(Fore.YELLOW + f"Número de página (1-{total_pages}): " + Style.RESET_ALL).strip())
+                if not 1 <= destino <= total_pages:
+                    raise ValueError
+                clave_inicio = db_manager.get_clave_equipo_activo_en_posicion(conteo_estados, (destino - 1) * page_size)
+                page = destino
+                inventario = None
+            except ValueError:
+                print(Fore.RED + "Número de página no válido.")
+                pausar_pantalla()
+        elif opcion == 'b':
+            placa = input(Fore.YELLOW + "Placa a buscar: " + Style.RESET_ALL).strip().upper()
+            equipo_data = db_manager.get_equipo_by_placa(placa)
+            if not equipo_data or equipo_data['estado'] not in orden_estados:
+                print(Fore.RED + f"❌ No se encontró un equipo activo con la placa '{placa}'.")
+                pausar_pantalla()
+                continue
+            posicion = db_manager.get_posicion_equipo_activo(conteo_estados, clave(equipo_data))
+            page = posicion // page_size + 1
+            clave_inicio = db_manager.get_clave_equipo_activo_en_posicion(conteo_estados, (page - 1) * page_size)
+            inventario = None
+            placa_resaltada = placa
         elif opcion == 'q':
             break
 
 def generar_excel_historico_equipo(usuario: str, equipo: Equipo):
     """Genera un reporte Excel con el historial de un solo equipo."""
     try:
-        log_equipo = db_manager.get_log_by_placa(equipo.placa)
+        from openpyxl import Workbook
+        from openpyxl.styles import Font, Border, Side, PatternFill
 
-        if not log_equipo:
+        movimientos = db_manager.iter_log_by_placa(equipo.placa)
+        primero = next(movimientos, None)
+        if primero is None:
             print(Fore.YELLOW + f"\nNo hay historial para el equipo {equipo.placa}.")
-            pausar_pantalla()
             return
 
-        wb = Workbook()
-        ws = wb.active
-        ws.title = f"Historial {equipo.placa}"
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet(f"Historial {equipo.placa}")
 
         header_fill = PatternFill(start_color="808080", end_color="808080", fill_type="solid")
         header_font = Font(color="FFFFFF", bold=True)
@@ -379,30 +418,21 @@ def generar_excel_historico_equipo(usuario: str, equipo: Equipo):
         
         encabezados = ["FECHA", "ACCIÓN", "USUARIO", "DETALLES"]
         
-        for col_num, encabezado in enumerate(encabezados, 1):
-            col_letra = get_column_letter(col_num)
-            celda = ws[f"{col_letra}1"]
-            celda.value = encabezado
-            celda.fill = header_fill
-            celda.font = header_font
-            celda.alignment = Alignment(horizontal='center')
-            celda.border = border
-        
         ws.column_dimensions['A'].width = 25
         ws.column_dimensions['B'].width = 25
         ws.column_dimensions['C'].width = 20
         ws.column_dimensions['D'].width = 80
+        ws.freeze_panes = "A2"
+
+        ws.append(fila_encabezados(ws, encabezados, header_fill, header_font, border))
 
-        for row_num, mov in enumerate(log_equipo, 2):
+        for mov in chain([primero], movimientos):
             fecha_obj = datetime.strptime(mov['fecha'], "%Y-%m-%d %H:%M:%S")
             fecha_formateada = fecha_obj.strftime("%d/%m/%Y %H:%M")
             
-            ws.cell(row=row_num, column=1, value=fecha_formateada).border = border
-            ws.cell(row=row_num, column=2, value=mov.get('accion', 'N/A')).border = border
-            ws.cell(row=row_num, column=3, value=mov.get('usuario', 'N/A')).border = border
-            ws.cell(row=row_num, column=4, value=mov.get('detalles', '')).border = border
-        
-        ws.freeze_panes = "A2"
+            ws.append(fila_datos(ws, [
+                fecha_formateada, mov.get('accion', 'N/A'), mov.get('usuario', 'N/A'), mov.get('detalles', '')
+            ], border))
 
         with tempfile.NamedTemporaryFile(delete=False, suffix=".xlsx") as tmp:
             wb.save(tmp.name)
@@ -410,6 +440,7 @@ def generar_excel_historico_equipo(usuario: str, equipo: Equipo):
 
         registrar_movimiento_sistema("Reporte Histórico Individual", f"Generado reporte para placa {equipo.placa}", usuario)
         print(Fore.GREEN + f"\n✅ Abriendo el historial del equipo {equipo.placa} en Excel..." + Style.RESET_ALL)
+        import webbrowser
         webbrowser.open(ruta_temporal)
 
     except Exception as e:
@@ -0,0 +1,119 @@
+# gestion_vencimientos.py
+import heapq
+import os
+from datetime import date, datetime, timedelta
+from itertools import islice
+from typing import Dict, Iterator, Optional
+
+from colorama import Fore, Style
+from dotenv import load_dotenv
+
+from database import db_manager, FORMATO_FECHA, VISTAS_EQUIPO, fecha_a_pantalla
+from ui import mostrar_encabezado, pausar_pantalla
+from gestion_acceso import requiere_permiso
+
+# Reglas de vencimiento: (nombre, estado, columna con la fecha límite, variable del .env con los días de gracia)
+REGLAS_VENCIMIENTO = [
+    ("Préstamo", "En préstamo", "fecha_devolucion_prestamo", "DIAS_GRACIA_PRESTAMO"),
+    ("Renovación", "Renovación", "fecha_entrega_renovacion", "DIAS_GRACIA_RENOVACION"),
+]
+MAX_VENCIDOS_PANTALLA = 200
+
+def cargar_dias_gracia() -> Dict[str, int]:
+    """Lee del .env los días de gracia de cada regla (0 si no se indican)."""
+    load_dotenv()
+    dias_gracia = {}
+    for nombre, _, _, variable in REGLAS_VENCIMIENTO:
+        valor_env = os.getenv(variable, "0").strip() or "0"
+        try:
+            dias_gracia[nombre] = max(0, int(valor_env))
+        except ValueError:
+            print(Fore.YELLOW + f"⚠️ Valor inválido para {variable}: '{valor_env}'. Se usará 0." + Style.RESET_ALL)
+            dias_gracia[nombre] = 0
+    return dias_gracia
+
+# Se leen la primera vez que se calcula un vencimiento, no al importar el módulo.
+_dias_gracia: Optional[Dict[str, int]] = None
+
+def obtener_dias_gracia() -> Dict[str, int]:
+    global _dias_gracia
+    if _dias_gracia is None:
+        _dias_gracia = cargar_dias_gracia()
+    return _dias_gracia
+
+def fecha_corte(dias_gracia: int, hoy: Optional[date] = None) -> str:
+    """Un equipo está vencido si su fecha límite es anterior a hoy menos los días de gracia."""
+    return ((hoy or date.today()) - timedelta(days=dias_gracia)).strftime(FORMATO_FECHA)
+
+# El conteo se reutiliza mientras no cambien los datos ni el día, así el menú principal
+# solo paga un PRAGMA data_version en cada redibujado.
+_conteo_cache = {"clave": None, "conteo": {}}
+
+def contar_vencidos() -> Dict[str, int]:
+    """Devuelve el número de equipos vencidos por regla."""
+    hoy = date.today()
+    dias_gracia = obtener_dias_gracia()
+    clave = (db_manager.version_datos("equipos"), hoy)
+    if _conteo_cache["clave"] != clave:
+        _conteo_cache["conteo"] = {
+            nombre: db_manager.count_equipos_por_vencimiento(columna, fecha_corte(dias_gracia[nombre], hoy), estado)
+            for nombre, estado, columna, _ in REGLAS_VENCIMIENTO
+        }
+        _conteo_cache["clave"] = clave
+    return _conteo_cache["conteo"]
+
+def iter_vencidos(hoy: Optional[date] = None) -> Iterator[Dict]:
+    """
+    Recorre los equipos vencidos de todas las reglas, del más atrasado al menos atrasado.
+    Cada consulta ya llega ordenada por fecha límite, así que basta con intercalarlas.
+    """
+    hoy = hoy or date.today()
+    dias_gracia = obtener_dias_gracia()
+
+    def vencidos_de_regla(nombre: str, estado: str, columna: str):
+        columnas = VISTAS_EQUIPO["vencidos"] + [columna]
+        for equipo in db_manager.find_equipos_por_vencimiento(columna, fecha_corte(dias_gracia[nombre], hoy), estado, columns=columnas):
+            fecha_limite = equipo.pop(columna)
+            equipo["regla"] = nombre
+            equipo["fecha_limite"] = fecha_limite
+            equipo["dias_retraso"] = (hoy - datetime.strptime(fecha_limite, FORMATO_FECHA).date()).days
+            yield equipo
+
+    flujos = [vencidos_de_regla(nombre, estado, columna) for nombre, estado, columna, _ in REGLAS_VENCIMIENTO]
+    return heapq.merge(*flujos, key=lambda equipo: equipo["fecha_limite"])
+
+def texto_indicador_vencidos() -> str:
+    """Texto con el contador de vencidos para el menú principal."""
+    total = sum(contar_vencidos().values())
+    color = Fore.RED if total else Fore.GREEN
+    return f"Equipos Vencidos {color}({total}){Style.RESET_ALL}"
+
+@requiere_permiso("ver_inventario")
+def ver_equipos_vencidos(usuario: str):
+    """Muestra los préstamos y renovaciones vencidos, ordenados por días de retraso."""
+    mostrar_encabezado("Equipos Vencidos", color=Fore.RED)
+    conteo = contar_vencidos()
+    total = sum(conteo.values())
+
+    dias_gracia = obtener_dias_gracia()
+    resumen = ", ".join(f"{nombre}: {conteo[nombre]} (gracia {dias_gracia[nombre]} días)" for nombre, _, _, _ in REGLAS_VENCIMIENTO)
+    print(Fore.CYAN + f"💡 {resumen}" + Style.RESET_ALL)
+
+    if not total:
+        print(Fore.GREEN + "\n✅ No hay préstamos ni renovaciones vencidos.")
+        pausar_pantalla()
+        return
+
+    print(f"\n{'DÍAS':>5}  {'TIPO':<10} {'PLACA':<10} {'EQUIPO':<22} {'ASIGNADO A':<17} {'LÍMITE'}")
+    print("-" * 80)
+    for equipo in islice(iter_vencidos(), MAX_VENCIDOS_PANTALLA):
+        descripcion = f"{equipo['tipo']} {equipo['marca']} {equipo['modelo']}"[:22]
+        asignado = (equipo.get('asignado_a') or "N/A")[:17]
+        color = Fore.RED if equipo['dias_retraso'] > 7 else Fore.YELLOW
+        print(f"{color}{equipo['dias_retraso']:>5}{Style.RESET_ALL}  {equipo['regla']:<10} {equipo['placa']:<10} "
+              f"{descripcion:<22} {asignado:<17} {fecha_a_pantalla(equipo['fecha_limite'])}")
+
+    if total > MAX_VENCIDOS_PANTALLA:
+        print(Fore.YELLOW + f"\n... y {total - MAX_VENCIDOS_PANTALLA} equipos vencidos más." + Style.RESET_ALL)
+    print(Fore.CYAN + "\n💡 Gestione cada equipo desde 'Gestión de Inventario > Gestionar Equipos'." + Style.RESET_ALL)
+    pausar_pantalla()
@@ -0,0 +1,214 @@
+# indice_equipos.py
+import unicodedata
+from bisect import bisect_left, insort
+from typing import Dict, List, Optional, Set, Tuple, Union
+
+from database import db_manager
+
+# Campos indexados: (columna en la tabla equipos, etiqueta para mostrar)
+CAMPOS_INDICE = [
+    ("placa", "Placa"),
+    ("serial", "Serial"),
+    ("asignado_a", "Asignado a"),
+    ("email_asignado", "Email"),
+]
+MAX_SUGERENCIAS = 8
+
+def normalizar(texto: Optional[str]) -> str:
+    """Mayúsculas, sin tildes y sin espacios repetidos, para comparar sin importar cómo se escribió."""
+    if not texto:
+        return ""
+    if texto.isascii():
+        return " ".join(texto.upper().split())
+    sin_tildes = unicodedata.normalize("NFKD", texto).encode("ascii", "ignore").decode("ascii")
+    return " ".join(sin_tildes.upper().split())
+
+class _IndiceCampo:
+    """
+    Valores normalizados de un campo: claves ordenadas para prefijos y un mapa valor -> placas.
+    Casi todos los valores pertenecen a un solo equipo, así que se guarda la placa sola y solo se
+    usa un conjunto cuando el valor se repite; con 200.000 equipos esto ahorra memoria y evita que
+    el recolector de basura recorra cientos de miles de conjuntos durante la carga.
+    """
+
+    def __init__(self):
+        self.placas_por_valor: Dict[str, Union[str, Set[str]]] = {}
+        self.claves: List[str] = []
+        self.alfabeto: Set[str] = set()
+
+    def agregar(self, valor: str, placa: str, ordenar: bool = True):
+        actual = self.placas_por_valor.get(valor)
+        if actual is None:
+            self.placas_por_valor[valor] = placa
+            if ordenar:
+                insort(self.claves, valor)
+                self.alfabeto.update(valor)
+        elif isinstance(actual, str):
+            if actual != placa:
+                self.placas_por_valor[valor] = {actual, placa}
+        else:
+            actual.add(placa)
+
+    def quitar(self, valor: str, placa: str):
+        actual = self.placas_por_valor.get(valor)
+        if actual is None:
+            return
+        if isinstance(actual, str):
+            if actual == placa:
+                del self.placas_por_valor[valor]
+                del self.claves[bisect_left(self.claves, valor)]
+        else:
+            actual.discard(placa)
+            if len(actual) == 1:
+                self.placas_por_valor[valor] = actual.pop()
+
+    def ordenar(self):
+        """Ordena las claves y calcula el alfabeto tras una carga masiva."""
+        self.claves = sorted(self.placas_por_valor)
+        self.alfabeto = set("".join(self.claves))
+
+    def placas(self, valor: str) -> List[str]:
+        actual = self.placas_por_valor.get(valor)
+        if actual is None:
+            return []
+        return [actual] if isinstance(actual, str) else sorted(actual)
+
+    def por_prefijo(self, prefijo: str, limite: int) -> List[str]:
+        resultado = []
+        for i in range(bisect_left(self.claves, prefijo), len(self.claves)):
+            clave = self.claves[i]
+            if not clave.startswith(prefijo) or len(resultado) >= limite:
+                break
+            resultado.append(clave)
+        return resultado
+
+    def a_una_edicion(self, texto: str) -> List[str]:
+        """
+        Valores a distancia 1 (un carácter de más, de menos, cambiado o dos contiguos intercambiados).
+        Se generan las variantes del texto buscado con el alfabeto del campo y se consultan en el mapa,
+        así el costo depende del largo del texto y no del número de equipos.
+        """
+        mapa = self.placas_por_valor
+        encontrados = []
+        vistos = set()
+
+        def probar(variante: str):
+            if variante in mapa and variante not in vistos:
+                vistos.add(variante)
+                encontrados.append(variante)
+
+        cortes = [(texto[:i], texto[i:]) for i in range(len(texto) + 1)]
+        for izquierda, derecha in cortes:
+            if derecha:
+                probar(izquierda + derecha[1:])
+                if len(derecha) > 1:
+                    probar(izquierda + derecha[1] + derecha[0] + derecha[2:])
+                for letra in self.alfabeto:
+                    probar(izquierda + letra + derecha[1:])
+            for letra in self.alfabeto:
+                probar(izquierda + letra + derecha)
+        return sorted(encontrados)
+
+class IndiceEquipos:
+    """
+    Índice en memoria de placa, serial, asignado y email para autocompletar y sugerir
+    equipos sin consultar la base de datos. Se construye al iniciar sesión y se pone al día
+    leyendo solo las placas del registro de cambios cuando cambia la versión de los datos.
+    """
+
+    def __init__(self):
+        self.campos: Dict[str, _IndiceCampo] = {}
+        self.valores_por_placa: Dict[str, Tuple[str, ...]] = {}
+        self.version = None
+        self.ultimo_cambio = None
+        self.construido = False
+
+    def construir(self):
+        self.version = db_manager.version_datos("equipos")
+        _, self.ultimo_cambio = db_manager.get_rango_cambios_equipos()
+        self.campos = {columna: _IndiceCampo() for columna, _ in CAMPOS_INDICE}
+        self.valores_por_placa = {}
+        for fila in db_manager.iter_claves_busqueda():
+            self._agregar(fila, ordenar=False)
+        # En la carga inicial se ordena una sola vez en lugar de insertar cada clave en su sitio.
+        for campo in self.campos.values():
+            campo.ordenar()
+        self.construido = True
+
+    def actualizar(self):
+        """Aplica los cambios ocurridos desde la última lectura. Sin cambios, cuesta un PRAGMA."""
+        if not self.construido:
+            self.construir()
+            return
+        version = db_manager.version_datos("equipos")
+        if version == self.version:
+            return
+        self.version = version
+
+        primero, ultimo = db_manager.get_rango_cambios_equipos()
+        if ultimo is None or ultimo == self.ultimo_cambio:
+            return
+        # Si el registro ya descartó cambios que no hemos leído, se reconstruye completo.
+        if self.ultimo_cambio is None or primero > self.ultimo_cambio + 1:
+            self.construir()
+            return
+
+        for placa in db_manager.get_placas_cambiadas_desde(self.ultimo_cambio):
+            self._quitar(placa)
+            fila = db_manager.get_claves_busqueda(placa)
+            if fila:
+                self._agregar(fila)
+        self.ultimo_cambio = ultimo
+
+    def _agregar(self, fila: Dict, ordenar: bool = True):
+        placa = fila["placa"]
+        valores = tuple(normalizar(fila.get(columna)) for columna, _ in CAMPOS_INDICE)
+        self.valores_por_placa[placa] = valores
+        for (columna, _), valor in zip(CAMPOS_INDICE, valores):
+            if valor:
+                self.campos[columna].agregar(valor, placa, ordenar)
+
+    def _quitar(self, placa: str):
+        valores = self.valores_por_placa.pop(placa, None)
+        if valores is None:
+            return
+        for (columna, _), valor in zip(CAMPOS_INDICE, valores):
+            if valor:
+                self.campos[columna].quitar(valor, placa)
+
+    def sugerir(self, texto: str, limite: int = MAX_SUGERENCIAS) -> List[Dict]:
+        """
+        Sugerencias para un texto: primero coincidencias exactas, luego por prefijo y por último
+        a una edición de distancia. Cada sugerencia indica la placa y el campo que coincidió.
+        """
+        self.actualizar()
+        buscado = normalizar(texto)
+        if not buscado:
+            return []
+
+        sugerencias = []
+        placas_vistas = set()
+
+        def agregar(columna: str, etiqueta: str, valor: str, tipo: str) -> bool:
+            for placa in self.campos[columna].placas(valor):
+                if placa not in placas_vistas:
+                    placas_vistas.add(placa)
+                    sugerencias.append({"placa": placa, "campo": etiqueta, "valor": valor, "coincidencia": tipo})
+                    if len(sugerencias) >= limite:
+                        return True
+            return False
+
+        for columna, etiqueta in CAMPOS_INDICE:
+            if buscado in self.campos[columna].placas_por_valor and agregar(columna, etiqueta, buscado, "exacta"):
+                return sugerencias
+        for columna, etiqueta in CAMPOS_INDICE:
+            for valor in self.campos[columna].por_prefijo(buscado, limite):
+                if agregar(columna, etiqueta, valor, "prefijo"):
+                    return sugerencias
+        for columna, etiqueta in CAMPOS_INDICE:
+            for valor in self.campos[columna].a_una_edicion(buscado):
+                if agregar(columna, etiqueta, valor, "similar"):
+                    return sugerencias
+        return sugerencias
+
+indice_equipos = IndiceEquipos()
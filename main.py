@@ -1,4 +1,11 @@
 # main.py
+import sys
+from perfil_arranque import perfil_arranque, OPCION_PERFIL
+
+# Con --startup-profile se miden las importaciones que siguen y los pasos de inicialización.
+if OPCION_PERFIL in sys.argv:
+    perfil_arranque.activar()
+
 import os
 from colorama import Fore, Back, Style
 from dotenv import load_dotenv
@@ -19,18 +26,24 @@ from gestion_reportes import (
 )
 from gestion_acceso import (
     login, menu_usuarios, menu_configuracion_sistema,
-    cambiar_contrasena_usuario, inicializar_admin_si_no_existe, ROLES_PERMISOS,
-    menu_ver_log_sistema
+    cambiar_contrasena_usuario, inicializar_admin_si_no_existe,
+    menu_ver_log_sistema, iniciar_sesion, cerrar_sesion, obtener_sesion
 )
 from estadisticas import mostrar_estadisticas
+from gestion_importacion import importar_equipos
+from gestion_vencimientos import ver_equipos_vencidos, texto_indicador_vencidos
+from gestion_busqueda import buscar_texto
+from indice_equipos import indice_equipos
 
-load_dotenv()
+perfil_arranque.terminar_importaciones()
+
+with perfil_arranque.medir("Configuración (.env)"):
+    load_dotenv()
 
 # main.py
 
 def menu_gestion_inventario(usuario: str):
-    user_data = db_manager.get_user_by_username(usuario)
-    rol_actual = user_data['rol']
+    sesion = obtener_sesion()
     
     while True:
         # --- INICIO DE CORRECCIÓN ---
@@ -40,16 +53,17 @@ def menu_gestion_inventario(usuario: str):
 
         opciones_disponibles = []
         
-        if "registrar_equipo" in ROLES_PERMISOS[rol_actual]: 
+        if sesion.tiene_permiso("registrar_equipo"): 
             opciones_disponibles.append("Registrar nuevo equipo")
-        if "gestionar_equipo" in ROLES_PERMISOS[rol_actual]: 
+            opciones_disponibles.append("Importar equipos desde archivo (CSV/XLSX)")
+        if sesion.tiene_permiso("gestionar_equipo"): 
             opciones_disponibles.append("Gestionar Equipos")
         
-        if "gestionar_pendientes" in ROLES_PERMISOS[rol_actual]:
-            equipos = db_manager.get_all_equipos()
-            mantenimientos_pendientes = len([e for e in equipos if e.get('estado') == "En mantenimiento"])
-            devoluciones_pendientes = len([e for e in equipos if e.get('estado') == "Pendiente Devolución a Proveedor"])
-            renovaciones_pendientes = len([e for e in equipos if e.get('estado') == "Renovación"])
+        if sesion.tiene_permiso("gestionar_pendientes"):
+            conteo_estados = db_manager.count_by_estado()
+            mantenimientos_pendientes = conteo_estados.get("En mantenimiento", 0)
+            devoluciones_pendientes = conteo_estados.get("Pendiente Devolución a Proveedor", 0)
+            renovaciones_pendientes = conteo_estados.get("Renovación", 0)
             total_pendientes = mantenimientos_pendientes + devoluciones_pendientes + renovaciones_pendientes
             
             color = Fore.GREEN
@@ -80,6 +94,8 @@ def menu_gestion_inventario(usuario: str):
             
             if "Registrar nuevo equipo" in opcion_texto:
                 registrar_equipo(usuario)
+            elif "Importar equipos desde archivo" in opcion_texto:
+                importar_equipos(usuario)
             elif "Gestionar Equipos" in opcion_texto:
                 gestionar_equipos(usuario)
             elif "Gestionar Mantenimientos y Devoluciones" in opcion_texto:
@@ -96,8 +112,7 @@ def menu_gestion_inventario(usuario: str):
 # main.py
 
 def menu_gestion_acceso_sistema(usuario: str):
-    user_data = db_manager.get_user_by_username(usuario)
-    rol_actual = user_data['rol']
+    sesion = obtener_sesion()
     
     while True:
         # --- INICIO DE CORRECCIÓN ---
@@ -106,9 +121,9 @@ def menu_gestion_acceso_sistema(usuario: str):
         # --- FIN DE CORRECCIÓN ---
 
         opciones_disponibles = []
-        if "gestionar_usuarios" in ROLES_PERMISOS[rol_actual]: opciones_disponibles.append("Gestión de usuarios")
-        if "configurar_sistema" in ROLES_PERMISOS[rol_actual]: opciones_disponibles.append("Configuración del Sistema")
-        if "ver_historico" in ROLES_PERMISOS[rol_actual]: opciones_disponibles.append("Ver Log de Actividad del Sistema")
+        if sesion.tiene_permiso("gestionar_usuarios"): opciones_disponibles.append("Gestión de usuarios")
+        if sesion.tiene_permiso("configurar_sistema"): opciones_disponibles.append("Configuración del Sistema")
+        if sesion.tiene_permiso("ver_historico"): opciones_disponibles.append("Ver Log de Actividad del Sistema")
         opciones_disponibles.append("Cambiar mi contraseña")
         opciones_disponibles.append("Volver al menú principal")
         
@@ -140,6 +155,8 @@ def menu_accesos_rapidos():
     print(f"  {Fore.YELLOW}gq{Style.RESET_ALL}  - Gestionar un equipo existente")
     print(f"  {Fore.YELLOW}gmd{Style.RESET_ALL} - Gestionar Mantenimientos, Devoluciones y Renovaciones")
     print(f"  {Fore.YELLOW}vm{Style.RESET_ALL} - Ver los últimos 20 movimientos")
+    print(f"  {Fore.YELLOW}ev{Style.RESET_ALL} - Ver préstamos y renovaciones vencidos")
+    print(f"  {Fore.YELLOW}bt{Style.RESET_ALL} - Búsqueda de texto en equipos y movimientos")
     print(f"\n  --- Reportes en Excel ---")
     print(f"  {Fore.YELLOW}ria{Style.RESET_ALL} - Reporte de Inventario Actual")
     print(f"  {Fore.YELLOW}red{Style.RESET_ALL} - Reporte de Equipos Devueltos")
@@ -150,17 +167,17 @@ def menu_accesos_rapidos():
 # main.py
 
 def menu_principal():
-    inicializar_admin_si_no_existe()
+    # La base de datos se abre aquí y no al importar database, para poder medirlo por separado.
+    with perfil_arranque.medir("Base de datos (conexión y migraciones)"):
+        db_manager.iniciar()
+    with perfil_arranque.medir("Administrador inicial"):
+        inicializar_admin_si_no_existe()
     
     ENVIRONMENT = os.getenv("ENVIRONMENT", "production") 
 
     usuario_logueado = None
 
-    import ui
-
-    ui.USUARIO_ACTUAL = None
-    ui.ROL_ACTUAL = None
-    ui.NOMBRE_COMPLETO_USUARIO = None
+    cerrar_sesion()
 
     if ENVIRONMENT == 'development':
         usuario_logueado = "admin"
@@ -171,12 +188,24 @@ def menu_principal():
                 if input(Fore.RED + "¿Salir del programa? (S/N): " + Style.RESET_ALL).strip().upper() == 'S':
                     return
 
-    user_data = db_manager.get_user_by_username(usuario_logueado)
-    ui.USUARIO_ACTUAL = usuario_logueado
-    ui.ROL_ACTUAL = user_data['rol']
-    ui.NOMBRE_COMPLETO_USUARIO = user_data.get('nombre_completo', usuario_logueado)
+    # La sesión guarda el usuario, su rol y sus permisos; ya no se consultan en cada menú.
+    with perfil_arranque.medir("Sesión y permisos"):
+        sesion = iniciar_sesion(usuario_logueado)
+
+    # Índice en memoria para sugerir equipos por placa, serial, asignado o email.
+    with perfil_arranque.medir("Índice de equipos"):
+        indice_equipos.construir()
+
+    if perfil_arranque.activo:
+        perfil_arranque.mostrar_informe()
+        pausar_pantalla()
 
     while True:
+        if not sesion.revalidar():
+            print(Fore.RED + "\n❌ Su cuenta de usuario fue bloqueada o eliminada. La sesión se ha cerrado.")
+            cerrar_sesion()
+            break
+
         # --- INICIO DE CORRECCIÓN ---
         # Se añade esta línea para limpiar la pantalla en cada ciclo del menú.
         mostrar_encabezado("Menú Principal")
@@ -194,6 +223,10 @@ def menu_principal():
         # Se utiliza una función que NO limpia la pantalla
         mostrar_menu([], titulo="") # Título vacío
         for i, opcion in enumerate(opciones_principales, 1):
+            if i == len(opciones_principales) and sesion.tiene_permiso("ver_inventario"):
+                # Los vencidos se abren con su acceso rápido, así "Salir" conserva su número y sigue
+                # siendo la última opción. El contador solo se calcula para quien puede ver el inventario.
+                print(Fore.YELLOW + "ev." + Style.RESET_ALL + f" {texto_indicador_vencidos()}")
             print(Fore.YELLOW + f"{i}." + Style.RESET_ALL + f" {opcion}")
         print(Style.BRIGHT + Fore.WHITE + "═" * 80 + Style.RESET_ALL)
         
@@ -204,6 +237,8 @@ def menu_principal():
             'gq': lambda: gestionar_equipos(usuario_logueado),
             'gmd': lambda: menu_gestionar_pendientes(usuario_logueado),
             'vm': lambda: menu_ver_ultimos_movimientos(usuario_logueado),
+            'ev': lambda: ver_equipos_vencidos(usuario_logueado),
+            'bt': lambda: buscar_texto(usuario_logueado),
             'ria': lambda: generar_excel_inventario(usuario_logueado),
             'red': lambda: generar_excel_devueltos_proveedor(usuario_logueado),
             'rhc': lambda: generar_excel_historico(usuario_logueado),
@@ -0,0 +1,123 @@
+# mantenimiento.py
+import os
+import sqlite3
+import sys
+import time
+from datetime import date, timedelta
+from typing import Callable, Dict, Optional
+
+from colorama import Fore, Style
+from dotenv import load_dotenv
+
+from database import db_manager, FORMATO_FECHA, registrar_movimiento_sistema
+
+# Usuario con el que se registran las ejecuciones programadas (sin sesión iniciada).
+USUARIO_PROGRAMADO = "sistema"
+RETENCION_DIAS_DEFECTO = 730
+MODOS_RETENCION = ("archivar", "eliminar")
+
+def cargar_retencion_log_sistema() -> Dict:
+    """
+    Lee del .env la retención de log_sistema: LOG_SISTEMA_RETENCION_DIAS (0 la desactiva) y
+    LOG_SISTEMA_RETENCION_MODO, 'archivar' (a los archivos anuales) o 'eliminar'.
+    """
+    load_dotenv()
+    valor_env = os.getenv("LOG_SISTEMA_RETENCION_DIAS", str(RETENCION_DIAS_DEFECTO)).strip() or str(RETENCION_DIAS_DEFECTO)
+    try:
+        dias = max(0, int(valor_env))
+    except ValueError:
+        print(Fore.YELLOW + f"⚠️ Valor inválido para LOG_SISTEMA_RETENCION_DIAS: '{valor_env}'. Se usará {RETENCION_DIAS_DEFECTO}." + Style.RESET_ALL)
+        dias = RETENCION_DIAS_DEFECTO
+    modo = os.getenv("LOG_SISTEMA_RETENCION_MODO", "archivar").strip().lower() or "archivar"
+    if modo not in MODOS_RETENCION:
+        print(Fore.YELLOW + f"⚠️ Valor inválido para LOG_SISTEMA_RETENCION_MODO: '{modo}'. Se usará 'archivar'." + Style.RESET_ALL)
+        modo = "archivar"
+    return {"dias": dias, "modo": modo}
+
+def formatear_bytes(valor: int) -> str:
+    for unidad in ("B", "KB", "MB"):
+        if valor < 1024:
+            return f"{valor:.0f} {unidad}" if unidad == "B" else f"{valor:.1f} {unidad}"
+        valor /= 1024
+    return f"{valor:.1f} GB"
+
+def ejecutar_mantenimiento(usuario: str, vacuum: bool = True,
+                           informar: Optional[Callable[[str], None]] = None) -> Dict:
+    """
+    Comprueba la integridad, aplica la retención de log_sistema, compacta (VACUUM), actualiza
+    las estadísticas (ANALYZE y PRAGMA optimize), comprueba que las consultas indexadas siguen
+    usando su índice y deja constancia en log_sistema de los tamaños y la duración de cada paso.
+    Si la integridad falla no se toca nada más.
+    Devuelve {'ok', 'pasos': [(paso, segundos, detalle)], 'antes', 'despues'}.
+    """
+    informar = informar or (lambda mensaje: None)
+    retencion = cargar_retencion_log_sistema()
+    resultado = {"ok": True, "pasos": [], "antes": db_manager.tamano_base(), "despues": None}
+
+    def paso(nombre: str, funcion: Callable[[], str]):
+        informar(f"{nombre}...")
+        inicio = time.perf_counter()
+        detalle = funcion()
+        duracion = time.perf_counter() - inicio
+        resultado["pasos"].append((nombre, duracion, detalle))
+        informar(f"{nombre}: {detalle} ({duracion:.1f} s)")
+
+    def integridad() -> str:
+        problemas = db_manager.verificar_integridad()
+        if problemas != ["ok"]:
+            resultado["ok"] = False
+            return f"{len(problemas)} problema(s): {'; '.join(problemas[:5])}"
+        return "ok"
+
+    def aplicar_retencion() -> str:
+        if not retencion["dias"]:
+            return "desactivada"
+        fecha_corte = (date.today() - timedelta(days=retencion["dias"])).strftime(FORMATO_FECHA)
+        if retencion["modo"] == "eliminar":
+            return f"{db_manager.eliminar_log_sistema_anterior(fecha_corte)} registros anteriores a {fecha_corte} eliminados"
+        movidas = db_manager.archivar_logs(fecha_corte, tablas=["log_sistema"])
+        return f"{movidas['log_sistema']} registros anteriores a {fecha_corte} archivados"
+
+    def compactar() -> str:
+        db_manager.vacuum()
+        return "base compactada"
+
+    def analizar() -> str:
+        db_manager.analizar()
+        return "estadísticas actualizadas"
+
+    def planes_consulta() -> str:
+        # Con las estadísticas nuevas el planificador puede elegir otro plan.
+        sin_indice = db_manager.verificar_planes_consulta()
+        if not sin_indice:
+            return "todas las consultas usan su índice"
+        return f"{len(sin_indice)} sin su índice: " + "; ".join(f"{consulta} ({indice})" for consulta, indice in sin_indice)
+
+    try:
+        paso("Integridad", integridad)
+        if resultado["ok"]:
+            paso("Retención de log_sistema", aplicar_retencion)
+            if vacuum:
+                paso("VACUUM", compactar)
+            paso("ANALYZE y optimize", analizar)
+            paso("Planes de consulta", planes_consulta)
+    except sqlite3.Error as e:
+        resultado["ok"] = False
+        resultado["pasos"].append(("Error", 0.0, str(e)))
+        informar(f"Error: {e}")
+
+    resultado["despues"] = db_manager.tamano_base()
+    antes, despues = resultado["antes"], resultado["despues"]
+    detalles = (f"{'Completado' if resultado['ok'] else 'Con errores'}. "
+                f"Tamaño: {formatear_bytes(antes['bytes'] + antes['bytes_wal'])} -> "
+                f"{formatear_bytes(despues['bytes'] + despues['bytes_wal'])}. "
+                + " | ".join(f"{nombre}: {detalle} ({duracion:.1f} s)" for nombre, duracion, detalle in resultado["pasos"]))
+    registrar_movimiento_sistema("Mantenimiento", detalles, usuario)
+    return resultado
+
+if __name__ == "__main__":
+    # Uso programado (cron, Programador de tareas): python mantenimiento.py [--sin-vacuum]
+    # Devuelve 1 si la integridad falla o algún paso termina con error.
+    resultado = ejecutar_mantenimiento(USUARIO_PROGRAMADO, vacuum="--sin-vacuum" not in sys.argv, informar=print)
+    db_manager.close()
+    sys.exit(0 if resultado["ok"] else 1)
@@ -0,0 +1,430 @@
+# migraciones.py
+import sqlite3
+import sys
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Tuple
+
+from colorama import Fore, Style
+
+DB_NAME = "inventario.db"
+
+# --- PASOS DE MIGRACIÓN ---
+# Cada migración recibe un cursor dentro de una transacción abierta. Nunca se modifica
+# una migración ya publicada: los cambios de esquema se añaden como una migración nueva.
+
+def _columnas_existentes(cursor: sqlite3.Cursor, tabla: str) -> set:
+    return {row[1] for row in cursor.execute(f"PRAGMA table_info({tabla})").fetchall()}
+
+def _crear_indices(cursor: sqlite3.Cursor, indices: Dict[str, Tuple[str, str]]):
+    for nombre, (tabla, columnas) in indices.items():
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {nombre} ON {tabla} ({columnas})")
+
+def _migracion_esquema_base(cursor: sqlite3.Cursor):
+    """Crea las tablas y añade las columnas que faltan en bases de datos anteriores."""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS equipos (
+            placa TEXT PRIMARY KEY, tipo TEXT NOT NULL, marca TEXT NOT NULL,
+            modelo TEXT NOT NULL, serial TEXT NOT NULL, estado TEXT NOT NULL,
+            asignado_a TEXT, email_asignado TEXT, observaciones TEXT,
+            fecha_registro TEXT, fecha_devolucion_prestamo TEXT,
+            fecha_devolucion_proveedor TEXT, motivo_devolucion TEXT,
+            estado_anterior TEXT, renovacion_placa_asociada TEXT,
+            fecha_entrega_renovacion TEXT
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS log_inventario (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, equipo_placa TEXT NOT NULL,
+            accion TEXT NOT NULL, detalles TEXT NOT NULL, usuario TEXT NOT NULL, fecha TEXT NOT NULL,
+            FOREIGN KEY (equipo_placa) REFERENCES equipos (placa) ON DELETE CASCADE
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS log_sistema (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, accion TEXT NOT NULL,
+            detalles TEXT NOT NULL, usuario TEXT NOT NULL, fecha TEXT NOT NULL
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS usuarios (
+            nombre_usuario TEXT PRIMARY KEY, contrasena_hash TEXT NOT NULL,
+            rol TEXT NOT NULL, nombre_completo TEXT,
+            cambio_clave_requerido INTEGER NOT NULL DEFAULT 1,
+            is_active INTEGER NOT NULL DEFAULT 1
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS parametros (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            tipo TEXT NOT NULL,
+            valor TEXT NOT NULL,
+            is_active INTEGER NOT NULL DEFAULT 1,
+            UNIQUE(tipo, valor)
+        )
+    ''')
+
+    columns_to_add = {
+        'equipos': [
+            ('fecha_devolucion_prestamo', 'TEXT'),
+            ('fecha_devolucion_proveedor', 'TEXT'),
+            ('motivo_devolucion', 'TEXT'),
+            ('estado_anterior', 'TEXT'),
+            ('renovacion_placa_asociada', 'TEXT'),
+            ('fecha_entrega_renovacion', 'TEXT')
+        ],
+        'usuarios': [
+            ('nombre_completo', 'TEXT'),
+            ('cambio_clave_requerido', 'INTEGER NOT NULL DEFAULT 1'),
+            ('is_active', 'INTEGER NOT NULL DEFAULT 1')
+        ],
+        'parametros': [
+            ('is_active', 'INTEGER NOT NULL DEFAULT 1')
+        ]
+    }
+    for table, cols in columns_to_add.items():
+        existentes = _columnas_existentes(cursor, table)
+        for col_name, col_type in cols:
+            if col_name not in existentes:
+                cursor.execute(f"ALTER TABLE {table} ADD COLUMN {col_name} {col_type}")
+
+def _migracion_indices_log(cursor: sqlite3.Cursor):
+    """Índices secundarios para el historial de movimientos y el estado de los equipos."""
+    _crear_indices(cursor, {
+        "idx_log_inventario_placa_fecha": ("log_inventario", "equipo_placa, fecha"),
+        "idx_log_inventario_placa_accion_fecha": ("log_inventario", "equipo_placa, accion, fecha"),
+        "idx_log_inventario_usuario_fecha": ("log_inventario", "usuario, fecha"),
+        "idx_log_inventario_fecha": ("log_inventario", "fecha"),
+        "idx_equipos_estado": ("equipos", "estado"),
+    })
+
+SQL_BACKFILL_LOG_RESUMEN = '''
+    INSERT INTO log_resumen (equipo_placa, num_movimientos, ultimo_id, ultima_fecha, ultimo_usuario, ultima_accion, ultimos_detalles)
+    SELECT l.equipo_placa, c.num_movimientos, l.id, l.fecha, l.usuario, l.accion, l.detalles
+    FROM (SELECT equipo_placa, COUNT(id) AS num_movimientos FROM log_inventario GROUP BY equipo_placa) AS c
+    JOIN log_inventario l ON l.id = (
+        SELECT id FROM log_inventario WHERE equipo_placa = c.equipo_placa ORDER BY fecha DESC, id DESC LIMIT 1
+    )
+'''
+
+def _migracion_log_resumen(cursor: sqlite3.Cursor):
+    """Tabla resumen por equipo (movimientos y último movimiento) mantenida por triggers."""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS log_resumen (
+            equipo_placa TEXT PRIMARY KEY,
+            num_movimientos INTEGER NOT NULL,
+            ultimo_id INTEGER NOT NULL,
+            ultima_fecha TEXT NOT NULL,
+            ultimo_usuario TEXT NOT NULL,
+            ultima_accion TEXT NOT NULL,
+            ultimos_detalles TEXT NOT NULL
+        )
+    ''')
+    # Un movimiento nuevo pasa a ser el último si su fecha no es anterior a la registrada.
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_log_inventario_resumen_insert
+        AFTER INSERT ON log_inventario
+        BEGIN
+            INSERT INTO log_resumen (equipo_placa, num_movimientos, ultimo_id, ultima_fecha, ultimo_usuario, ultima_accion, ultimos_detalles)
+            VALUES (NEW.equipo_placa, 1, NEW.id, NEW.fecha, NEW.usuario, NEW.accion, NEW.detalles)
+            ON CONFLICT(equipo_placa) DO UPDATE SET
+                num_movimientos = num_movimientos + 1,
+                ultimo_id = CASE WHEN excluded.ultima_fecha >= ultima_fecha THEN excluded.ultimo_id ELSE ultimo_id END,
+                ultimo_usuario = CASE WHEN excluded.ultima_fecha >= ultima_fecha THEN excluded.ultimo_usuario ELSE ultimo_usuario END,
+                ultima_accion = CASE WHEN excluded.ultima_fecha >= ultima_fecha THEN excluded.ultima_accion ELSE ultima_accion END,
+                ultimos_detalles = CASE WHEN excluded.ultima_fecha >= ultima_fecha THEN excluded.ultimos_detalles ELSE ultimos_detalles END,
+                ultima_fecha = MAX(excluded.ultima_fecha, ultima_fecha);
+        END
+    ''')
+    # Al borrar el último movimiento se recalcula con el índice (equipo_placa, fecha).
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_log_inventario_resumen_delete
+        AFTER DELETE ON log_inventario
+        BEGIN
+            UPDATE log_resumen SET num_movimientos = num_movimientos - 1 WHERE equipo_placa = OLD.equipo_placa;
+            DELETE FROM log_resumen WHERE equipo_placa = OLD.equipo_placa AND num_movimientos <= 0;
+            UPDATE log_resumen SET (ultimo_id, ultima_fecha, ultimo_usuario, ultima_accion, ultimos_detalles) = (
+                SELECT id, fecha, usuario, accion, detalles FROM log_inventario
+                WHERE equipo_placa = OLD.equipo_placa ORDER BY fecha DESC, id DESC LIMIT 1
+            )
+            WHERE equipo_placa = OLD.equipo_placa AND ultimo_id = OLD.id;
+        END
+    ''')
+    cursor.execute("DELETE FROM log_resumen")
+    cursor.execute(SQL_BACKFILL_LOG_RESUMEN)
+
+def _migracion_indices_tipo_marca(cursor: sqlite3.Cursor):
+    """Índices para los conteos por tipo y marca y la comprobación de parámetros en uso."""
+    _crear_indices(cursor, {
+        "idx_equipos_tipo_estado": ("equipos", "tipo, estado"),
+        "idx_equipos_marca_estado": ("equipos", "marca, estado"),
+    })
+
+def _migracion_indice_estado_placa(cursor: sqlite3.Cursor):
+    """Índice (estado, placa) para la paginación por clave; sustituye al índice solo por estado."""
+    _crear_indices(cursor, {
+        "idx_equipos_estado_placa": ("equipos", "estado, placa"),
+    })
+    cursor.execute("DROP INDEX IF EXISTS idx_equipos_estado")
+
+COLUMNAS_FECHA_VENCIMIENTO = ["fecha_devolucion_prestamo", "fecha_devolucion_proveedor", "fecha_entrega_renovacion"]
+
+def _migracion_fechas_iso(cursor: sqlite3.Cursor):
+    """Pasa las fechas de vencimiento de DD/MM/AAAA a AAAA-MM-DD y las indexa junto al estado."""
+    for columna in COLUMNAS_FECHA_VENCIMIENTO:
+        cursor.execute(f"UPDATE equipos SET {columna} = NULL WHERE TRIM({columna}) = ''")
+        filas = cursor.execute(f"SELECT placa, {columna} FROM equipos WHERE {columna} LIKE '%/%'").fetchall()
+        convertidas = []
+        for placa, valor in filas:
+            try:
+                convertidas.append((datetime.strptime(valor.strip(), "%d/%m/%Y").strftime("%Y-%m-%d"), placa))
+            except ValueError:
+                print(Fore.YELLOW + f"⚠️ Fecha no reconocida en {columna} del equipo {placa}: '{valor}'. Se deja sin convertir." + Style.RESET_ALL)
+        cursor.executemany(f"UPDATE equipos SET {columna} = ? WHERE placa = ?", convertidas)
+        # Índice parcial: solo contiene los equipos con fecha, y no compite con el índice por estado
+        # de los listados (idx_equipos_estado_lista) en las consultas que filtran únicamente por estado.
+        nombre_indice = "idx_equipos_estado_" + columna.replace("fecha_", "", 1)
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {nombre_indice} ON equipos (estado, {columna}) WHERE {columna} IS NOT NULL")
+
+# Índices de texto completo (FTS5) con contenido externo: guardan solo el índice y leen el texto
+# de la tabla original. Equipos usa su rowid implícito, que VACUUM puede renumerar, por lo que
+# tras un VACUUM hay que reconstruirlos.
+INDICES_BUSQUEDA = {
+    "equipos_fts": ("equipos", "rowid", ["observaciones", "asignado_a"]),
+    "log_inventario_fts": ("log_inventario", "id", ["detalles"]),
+    "log_sistema_fts": ("log_sistema", "id", ["detalles"]),
+}
+
+def _migracion_busqueda_texto(cursor: sqlite3.Cursor):
+    """Índices FTS5 sobre observaciones, asignados y detalles de los logs, sincronizados por triggers."""
+    for indice, (tabla, columna_id, columnas) in INDICES_BUSQUEDA.items():
+        lista_columnas = ", ".join(columnas)
+        valores_new = ", ".join(f"NEW.{c}" for c in columnas)
+        valores_old = ", ".join(f"OLD.{c}" for c in columnas)
+        cursor.execute(f'''
+            CREATE VIRTUAL TABLE IF NOT EXISTS {indice} USING fts5(
+                {lista_columnas}, content='{tabla}', content_rowid='{columna_id}',
+                tokenize='unicode61 remove_diacritics 2'
+            )
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_{indice}_insert AFTER INSERT ON {tabla}
+            BEGIN
+                INSERT INTO {indice} (rowid, {lista_columnas}) VALUES (NEW.{columna_id}, {valores_new});
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_{indice}_delete AFTER DELETE ON {tabla}
+            BEGIN
+                INSERT INTO {indice} ({indice}, rowid, {lista_columnas}) VALUES ('delete', OLD.{columna_id}, {valores_old});
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_{indice}_update AFTER UPDATE OF {lista_columnas} ON {tabla}
+            BEGIN
+                INSERT INTO {indice} ({indice}, rowid, {lista_columnas}) VALUES ('delete', OLD.{columna_id}, {valores_old});
+                INSERT INTO {indice} (rowid, {lista_columnas}) VALUES (NEW.{columna_id}, {valores_new});
+            END
+        ''')
+        cursor.execute(f"INSERT INTO {indice} ({indice}) VALUES ('rebuild')")
+
+RETENCION_CAMBIOS_EQUIPOS = 10000
+
+def _migracion_cambios_equipos(cursor: sqlite3.Cursor):
+    """
+    Registro de placas modificadas (alta, baja o cambio de placa, serial o asignado) que usa el
+    índice de búsqueda en memoria para actualizarse sin releer toda la tabla. Solo se conservan
+    las últimas RETENCION_CAMBIOS_EQUIPOS entradas.
+    """
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS equipos_cambios (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            placa TEXT NOT NULL
+        )
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_equipos_cambios_insert AFTER INSERT ON equipos
+        BEGIN
+            INSERT INTO equipos_cambios (placa) VALUES (NEW.placa);
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_equipos_cambios_update AFTER UPDATE OF placa, serial, asignado_a, email_asignado ON equipos
+        BEGIN
+            INSERT INTO equipos_cambios (placa) VALUES (NEW.placa);
+            INSERT INTO equipos_cambios (placa) SELECT OLD.placa WHERE OLD.placa != NEW.placa;
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_equipos_cambios_delete AFTER DELETE ON equipos
+        BEGIN
+            INSERT INTO equipos_cambios (placa) VALUES (OLD.placa);
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_equipos_cambios_retencion AFTER INSERT ON equipos_cambios
+        BEGIN
+            DELETE FROM equipos_cambios WHERE seq <= NEW.seq - {RETENCION_CAMBIOS_EQUIPOS};
+        END
+    ''')
+
+def _migracion_version_equipos(cursor: sqlite3.Cursor):
+    """Número de versión de cada equipo para detectar ediciones simultáneas (control optimista)."""
+    if "version" not in _columnas_existentes(cursor, "equipos"):
+        cursor.execute("ALTER TABLE equipos ADD COLUMN version INTEGER NOT NULL DEFAULT 1")
+
+def _migracion_archivo_logs(cursor: sqlite3.Cursor):
+    """
+    Registro de los archivos anuales de logs (inventario_archivo_AAAA.db) e interruptor que
+    desactiva el trigger de borrado de log_resumen mientras se archiva, para que el resumen
+    siga contando los movimientos que pasan a un archivo.
+    """
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS archivos_log (
+            anio INTEGER PRIMARY KEY,
+            ruta TEXT NOT NULL,
+            fecha_min TEXT NOT NULL,
+            fecha_max TEXT NOT NULL,
+            filas_log_inventario INTEGER NOT NULL DEFAULT 0,
+            filas_log_sistema INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS control_archivado (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            activo INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    cursor.execute("INSERT OR IGNORE INTO control_archivado (id, activo) VALUES (1, 0)")
+    cursor.execute("DROP TRIGGER IF EXISTS trg_log_inventario_resumen_delete")
+    cursor.execute('''
+        CREATE TRIGGER trg_log_inventario_resumen_delete
+        AFTER DELETE ON log_inventario
+        WHEN (SELECT activo FROM control_archivado WHERE id = 1) = 0
+        BEGIN
+            UPDATE log_resumen SET num_movimientos = num_movimientos - 1 WHERE equipo_placa = OLD.equipo_placa;
+            DELETE FROM log_resumen WHERE equipo_placa = OLD.equipo_placa AND num_movimientos <= 0;
+            UPDATE log_resumen SET (ultimo_id, ultima_fecha, ultimo_usuario, ultima_accion, ultimos_detalles) = (
+                SELECT id, fecha, usuario, accion, detalles FROM log_inventario
+                WHERE equipo_placa = OLD.equipo_placa ORDER BY fecha DESC, id DESC LIMIT 1
+            )
+            WHERE equipo_placa = OLD.equipo_placa AND ultimo_id = OLD.id;
+        END
+    ''')
+    # El archivado recorre log_sistema por fecha, igual que log_inventario.
+    _crear_indices(cursor, {
+        "idx_log_sistema_fecha": ("log_sistema", "fecha"),
+    })
+
+def _migracion_indices_cobertura(cursor: sqlite3.Cursor):
+    """
+    Índices de cobertura para los listados: (estado, placa, tipo, marca, asignado_a) sustituye a
+    (estado, placa) y contiene todas las columnas de las vistas 'lista' y 'asignacion'; con
+    (equipo_placa, num_movimientos) el cruce con log_resumen tampoco lee la tabla. El conteo por
+    estado también recorre este índice, más ancho que uno solo por estado pero sin otro que mantener.
+    """
+    _crear_indices(cursor, {
+        "idx_equipos_estado_lista": ("equipos", "estado, placa, tipo, marca, asignado_a"),
+        "idx_log_resumen_placa_movimientos": ("log_resumen", "equipo_placa, num_movimientos"),
+    })
+    cursor.execute("DROP INDEX IF EXISTS idx_equipos_estado_placa")
+
+# Tablas cuya versión mantienen los triggers de versiones_datos; las cachés en memoria
+# (equipos, parámetros, sesión) comparan esta versión en lugar de cualquier escritura en la base.
+TABLAS_VERSIONADAS = ["equipos", "parametros", "usuarios"]
+
+def _migracion_versiones_datos(cursor: sqlite3.Cursor):
+    """
+    Versión por tabla que los triggers incrementan en cada cambio, venga de donde venga. Los logs
+    no la mueven, así que escribir un log no invalida las cachés de equipos, parámetros o sesión.
+    """
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS versiones_datos (
+            tabla TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    for tabla in TABLAS_VERSIONADAS:
+        cursor.execute("INSERT OR IGNORE INTO versiones_datos (tabla, version) VALUES (?, 0)", (tabla,))
+        for evento in ("INSERT", "UPDATE", "DELETE"):
+            cursor.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS trg_{tabla}_version_{evento.lower()} AFTER {evento} ON {tabla}
+                BEGIN
+                    UPDATE versiones_datos SET version = version + 1 WHERE tabla = '{tabla}';
+                END
+            ''')
+
+# Lista ordenada de migraciones: (versión, descripción, función). La versión aplicada
+# se guarda en PRAGMA user_version.
+MIGRACIONES: List[Tuple[int, str, Callable[[sqlite3.Cursor], None]]] = [
+    (1, "Esquema base", _migracion_esquema_base),
+    (2, "Índices de log_inventario y equipos", _migracion_indices_log),
+    (3, "Resumen de movimientos por equipo (log_resumen)", _migracion_log_resumen),
+    (4, "Índices de equipos por tipo y marca", _migracion_indices_tipo_marca),
+    (5, "Índice de equipos por estado y placa", _migracion_indice_estado_placa),
+    (6, "Fechas de vencimiento en formato ISO", _migracion_fechas_iso),
+    (7, "Búsqueda de texto completo (FTS5)", _migracion_busqueda_texto),
+    (8, "Registro de cambios de equipos para el índice de búsqueda", _migracion_cambios_equipos),
+    (9, "Versión de fila en equipos", _migracion_version_equipos),
+    (10, "Archivo anual de logs", _migracion_archivo_logs),
+    (11, "Índices de cobertura para los listados", _migracion_indices_cobertura),
+    (12, "Versión de los datos por tabla", _migracion_versiones_datos),
+]
+
+VERSION_ESQUEMA = MIGRACIONES[-1][0]
+
+# --- MOTOR DE MIGRACIONES ---
+def obtener_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+def migraciones_pendientes(conn: sqlite3.Connection) -> List[Tuple[int, str, Callable]]:
+    version_actual = obtener_version(conn)
+    return [m for m in MIGRACIONES if m[0] > version_actual]
+
+def aplicar_migraciones(conn: sqlite3.Connection, dry_run: bool = False, verbose: bool = True) -> List[Tuple[int, str, float]]:
+    """
+    Aplica las migraciones pendientes, cada una en su propia transacción.
+    En modo dry_run se ejecutan dentro de una transacción que se revierte al final.
+    Devuelve la lista de (versión, descripción, duración en ms) ejecutadas.
+    """
+    pendientes = migraciones_pendientes(conn)
+    if not pendientes:
+        return []
+
+    ejecutadas = []
+    cursor = conn.cursor()
+    if dry_run:
+        cursor.execute("BEGIN")
+    try:
+        for version, descripcion, funcion in pendientes:
+            inicio = time.perf_counter()
+            if not dry_run:
+                cursor.execute("BEGIN")
+            try:
+                funcion(cursor)
+                cursor.execute(f"PRAGMA user_version = {int(version)}")
+                if not dry_run:
+                    conn.commit()
+            except sqlite3.Error as e:
+                conn.rollback()
+                print(Fore.RED + f"❌ Error en la migración {version} ({descripcion}): {e}" + Style.RESET_ALL)
+                raise
+            duracion_ms = (time.perf_counter() - inicio) * 1000
+            ejecutadas.append((version, descripcion, duracion_ms))
+            if verbose:
+                etiqueta = "simulada" if dry_run else "aplicada"
+                print(Fore.GREEN + f"✅ Migración {version} ({descripcion}) {etiqueta} en {duracion_ms:.1f} ms" + Style.RESET_ALL)
+    finally:
+        if dry_run and conn.in_transaction:
+            conn.rollback()
+    return ejecutadas
+
+if __name__ == "__main__":
+    # Uso: python migraciones.py [--dry-run] [ruta_db]
+    argumentos = [a for a in sys.argv[1:] if not a.startswith("--")]
+    es_dry_run = "--dry-run" in sys.argv
+    conexion = sqlite3.connect(argumentos[0] if argumentos else DB_NAME)
+    print(f"Versión del esquema: {obtener_version(conexion)} (última disponible: {VERSION_ESQUEMA})")
+    if not aplicar_migraciones(conexion, dry_run=es_dry_run):
+        print(Fore.GREEN + "La base de datos ya está actualizada." + Style.RESET_ALL)
+    conexion.close()
@@ -0,0 +1,85 @@
+# perfil_arranque.py
+import builtins
+import sys
+import time
+from contextlib import contextmanager
+from typing import List, Optional, Tuple
+
+OPCION_PERFIL = "--startup-profile"
+# Importaciones más rápidas que esto no se listan (sí cuentan en los totales).
+UMBRAL_IMPORTACION_MS = 1.0
+# Niveles de anidamiento que se muestran: los módulos que importa main.py y los que importan estos.
+PROFUNDIDAD_INFORME = 2
+
+class PerfilArranque:
+    """
+    Desglose del arranque para --startup-profile: cuánto tarda cada importación (incluidos los
+    módulos que arrastra) y cada paso de inicialización hasta el menú principal.
+    """
+
+    def __init__(self):
+        self.activo = False
+        self.importaciones: List[Optional[Tuple[int, str, float]]] = []
+        self.pasos: List[Tuple[str, float]] = []
+        self._profundidad = 0
+        self._import_original = None
+
+    def activar(self):
+        """Empieza a medir las importaciones; debe llamarse antes de importar los módulos de la aplicación."""
+        self.activo = True
+        self._import_original = builtins.__import__
+        builtins.__import__ = self._importar
+
+    def terminar_importaciones(self):
+        if self._import_original is not None:
+            builtins.__import__ = self._import_original
+            self._import_original = None
+
+    def _importar(self, name, globals=None, locals=None, fromlist=(), level=0):
+        # Solo se mide la primera carga de cada módulo; las siguientes son una consulta a sys.modules.
+        if level or name in sys.modules:
+            return self._import_original(name, globals, locals, fromlist, level)
+        posicion = len(self.importaciones)
+        self.importaciones.append(None)
+        profundidad = self._profundidad
+        self._profundidad += 1
+        inicio = time.perf_counter()
+        try:
+            return self._import_original(name, globals, locals, fromlist, level)
+        finally:
+            self._profundidad = profundidad
+            self.importaciones[posicion] = (profundidad, name, time.perf_counter() - inicio)
+
+    @contextmanager
+    def medir(self, paso: str):
+        if not self.activo:
+            yield
+            return
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.pasos.append((paso, time.perf_counter() - inicio))
+
+    def mostrar_informe(self):
+        # colorama se importa aquí para que su carga aparezca en el informe como la de main.py.
+        from colorama import Fore, Style
+
+        total_importaciones = sum(duracion for profundidad, _, duracion in self.importaciones if profundidad == 0)
+        total_pasos = sum(duracion for _, duracion in self.pasos)
+
+        print(Fore.CYAN + "\n--- Perfil de arranque ---" + Style.RESET_ALL)
+        print(Fore.CYAN + "Importaciones (ms, incluye los módulos que importa cada uno):" + Style.RESET_ALL)
+        for profundidad, nombre, duracion in self.importaciones:
+            if profundidad < PROFUNDIDAD_INFORME and duracion * 1000 >= UMBRAL_IMPORTACION_MS:
+                print(f"  {'  ' * profundidad}{nombre.ljust(40 - 2 * profundidad)} {duracion * 1000:8.1f}")
+        print(f"  {'Total importaciones'.ljust(40)} {total_importaciones * 1000:8.1f}")
+
+        print(Fore.CYAN + "\nInicialización (ms):" + Style.RESET_ALL)
+        for paso, duracion in self.pasos:
+            print(f"  {paso.ljust(40)} {duracion * 1000:8.1f}")
+        print(f"  {'Total inicialización'.ljust(40)} {total_pasos * 1000:8.1f}")
+
+        print(Style.BRIGHT + f"\nTotal (sin la espera del login): {(total_importaciones + total_pasos) * 1000:.1f} ms" + Style.RESET_ALL)
+
+perfil_arranque = PerfilArranque()
@@ -0,0 +1,34 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import DatabaseManager, Equipo
+
+
+@pytest.fixture
+def crear_gestor(tmp_path, monkeypatch):
+    """Abre DatabaseManager sobre una base nueva en tmp_path; admite el modo de escritura de logs."""
+    monkeypatch.chdir(tmp_path)
+    gestores = []
+
+    def crear(modo_logs: str = "sincrono", nombre: str = "inventario.db") -> DatabaseManager:
+        monkeypatch.setenv("LOG_MODO_ESCRITURA", modo_logs)
+        gestor = DatabaseManager(str(tmp_path / nombre))
+        gestores.append(gestor)
+        return gestor
+
+    yield crear
+    for gestor in gestores:
+        gestor.close()
+
+
+@pytest.fixture
+def db(crear_gestor) -> DatabaseManager:
+    return crear_gestor()
+
+
+def nuevo_equipo(placa: str, **campos) -> Equipo:
+    return Equipo(placa, campos.pop("tipo", "Laptop"), campos.pop("marca", "Lenovo"), "T14", f"S-{placa}", **campos)
@@ -0,0 +1,58 @@
+import os
+
+from database import LogInventario
+from conftest import nuevo_equipo
+
+
+def registrar_historial(db, placa: str, fechas):
+    db.insert_equipo(nuevo_equipo(placa))
+    for i, fecha in enumerate(fechas):
+        db.insert_log_inventario(LogInventario(placa, "Registro" if i == 0 else "Asignación", f"mov {i}", "admin", fecha))
+
+
+def test_historial_archivado_se_lee_con_los_vivos(db):
+    registrar_historial(db, "PL0001", ["2020-01-01 10:00:00", "2020-06-01 10:00:00", "2030-01-01 10:00:00"])
+
+    movidas = db.archivar_logs("2021-01-01", tablas=["log_inventario"])
+
+    assert movidas == {"log_inventario": 2}
+    assert os.path.exists(db.ruta_archivo_log(2020))
+    assert db.execute_query("SELECT COUNT(*) FROM log_inventario").fetchone()[0] == 1
+    assert [log.detalles for log in db.get_log_by_placa("PL0001")] == ["mov 2", "mov 1", "mov 0"]
+    assert db.count_movimientos_by_placa("PL0001") == 3
+
+
+def test_eliminar_y_volver_a_registrar_no_hereda_el_historial_archivado(db):
+    registrar_historial(db, "PL0003", ["2020-01-01 10:00:00", "2020-03-01 10:00:00", "2020-05-01 10:00:00"])
+    registrar_historial(db, "PL0004", ["2020-02-01 10:00:00", "2020-04-01 10:00:00"])
+    db.archivar_logs("2021-01-01", tablas=["log_inventario"])
+
+    with db.transaction():
+        db.delete_equipo("PL0003")
+
+    assert db.execute_query("SELECT COUNT(*) FROM log_resumen WHERE equipo_placa = 'PL0003'").fetchone()[0] == 0
+    archivo = db.get_archivos_log()[0]
+    assert archivo["filas_log_inventario"] == 2
+
+    registrar_historial(db, "PL0003", ["2030-01-01 10:00:00"])
+
+    assert [log.detalles for log in db.get_log_by_placa("PL0003")] == ["mov 0"]
+    assert db.count_movimientos_by_placa("PL0003") == 1
+    assert [e.placa for e in db.get_new_equipos()] == ["PL0003"]
+    # El otro equipo archivado conserva su historial.
+    assert [log.detalles for log in db.get_log_by_placa("PL0004")] == ["mov 1", "mov 0"]
+
+
+def test_eliminacion_revertida_conserva_el_historial_archivado(db):
+    registrar_historial(db, "PL0005", ["2020-01-01 10:00:00", "2020-02-01 10:00:00"])
+    db.archivar_logs("2021-01-01", tablas=["log_inventario"])
+
+    try:
+        with db.transaction():
+            db.delete_equipo("PL0005")
+            raise RuntimeError("cancelado")
+    except RuntimeError:
+        pass
+
+    assert db.get_equipo_by_placa("PL0005") is not None
+    assert len(db.get_log_by_placa("PL0005")) == 2
@@ -0,0 +1,66 @@
+import pytest
+
+from database import ConflictoEdicion
+from conftest import nuevo_equipo
+
+
+def test_segundo_editor_recibe_conflicto_con_la_fila_vigente(db, crear_gestor):
+    db.insert_equipo(nuevo_equipo("PL0001"))
+    otro = crear_gestor()
+
+    mio = db.get_equipo_by_placa("PL0001")
+    suyo = otro.get_equipo_by_placa("PL0001")
+
+    suyo.asignado_a = "Ana"
+    otro.update_equipo(suyo)
+
+    mio.asignado_a = "Luis"
+    with pytest.raises(ConflictoEdicion) as error:
+        db.update_equipo(mio)
+
+    assert error.value.actual.asignado_a == "Ana"
+    assert error.value.actual.version == 2
+    assert db.get_equipo_by_placa("PL0001").asignado_a == "Ana"
+
+
+def test_conflicto_en_transaccion_restaura_la_version_en_memoria(db, crear_gestor):
+    db.insert_equipo(nuevo_equipo("PL0001"))
+    db.insert_equipo(nuevo_equipo("PL0002"))
+    otro = crear_gestor()
+
+    primero = db.get_equipo_by_placa("PL0001")
+    segundo = db.get_equipo_by_placa("PL0002")
+    ajeno = otro.get_equipo_by_placa("PL0002")
+    ajeno.observaciones = "cambio ajeno"
+    otro.update_equipo(ajeno)
+
+    primero.estado = "Renovación"
+    segundo.estado = "Renovación"
+    with pytest.raises(ConflictoEdicion):
+        with db.transaction():
+            db.update_equipo(primero)
+            db.update_equipo(segundo)
+
+    # El rollback deshizo el primer UPDATE, así que su objeto vuelve a la versión guardada.
+    assert primero.version == 1
+    assert db.get_equipo_by_placa("PL0001").estado == "Disponible"
+
+    segundo = db.get_equipo_by_placa("PL0002")
+    segundo.estado = "Renovación"
+    with db.transaction():
+        db.update_equipo(primero)
+        db.update_equipo(segundo)
+    assert primero.version == 2
+    assert db.get_equipo_by_placa("PL0001").estado == "Renovación"
+
+
+def test_dos_actualizaciones_del_mismo_objeto_en_una_transaccion(db):
+    db.insert_equipo(nuevo_equipo("PL0001"))
+    equipo = db.get_equipo_by_placa("PL0001")
+    with db.transaction():
+        equipo.estado = "Asignado"
+        db.update_equipo(equipo)
+        equipo.asignado_a = "Ana"
+        db.update_equipo(equipo)
+    assert equipo.version == 3
+    assert db.get_equipo_by_placa("PL0001").version == 3
@@ -0,0 +1,88 @@
+import sqlite3
+import time
+
+from database import LogInventario, LogSistema
+from conftest import nuevo_equipo
+
+
+def contar(db, tabla: str, condicion: str = "1 = 1") -> int:
+    return db.execute_query(f"SELECT COUNT(*) FROM {tabla} WHERE {condicion}").fetchone()[0]
+
+
+def test_esperar_logs_guarda_lo_encolado(crear_gestor):
+    db = crear_gestor("asincrono")
+    db.insert_equipo(nuevo_equipo("PL0001"))
+    for i in range(50):
+        db.insert_log_inventario(LogInventario("PL0001", "Asignación", f"mov {i}", "admin"))
+
+    assert len(db.get_log_by_placa("PL0001")) == 50
+    assert db.escritor_logs.pendientes == 0
+
+
+def test_transaccion_ve_el_lote_que_el_escritor_tiene_en_curso(crear_gestor, monkeypatch):
+    # Con un lote grande y una espera larga, el hilo escritor retiene los logs sin guardarlos.
+    monkeypatch.setenv("LOG_LOTE_FILAS", "1000")
+    monkeypatch.setenv("LOG_LOTE_MS", "5000")
+    db = crear_gestor("asincrono")
+    db.insert_equipo(nuevo_equipo("PL0001"))
+    for i in range(3):
+        db.insert_log_inventario(LogInventario("PL0001", "Asignación", f"mov {i}", "admin"))
+    time.sleep(0.2)
+    assert db.escritor_logs._cola.empty()
+
+    inicio = time.monotonic()
+    with db.transaction():
+        assert len(db.get_log_by_placa("PL0001")) == 3
+        assert db.count_movimientos_by_placa("PL0001") == 3
+    assert time.monotonic() - inicio < 4
+
+
+def test_vaciado_dentro_de_transaccion_no_duplica_y_anota_rechazados(crear_gestor):
+    db = crear_gestor("asincrono")
+    db.insert_equipo(nuevo_equipo("PL0001"))
+    with db.transaction():
+        # Encolados directamente, como los de otro hilo que llegan con la transacción ya abierta.
+        db.escritor_logs.pendientes += 2
+        db.escritor_logs._cola.put(LogInventario("PL0001", "Asignación", "válido", "admin"))
+        db.escritor_logs._cola.put(LogInventario("NO-EXISTE", "Asignación", "rechazado", "admin"))
+        db.esperar_logs()
+        assert contar(db, "log_inventario") == 1
+
+    db.esperar_logs()
+    assert contar(db, "log_inventario") == 1
+    assert db.count_movimientos_by_placa("PL0001") == 1
+    assert contar(db, "log_sistema", "accion = 'Log no guardado' AND detalles LIKE '%NO-EXISTE%'") == 1
+
+
+def test_lote_fallido_se_devuelve_y_se_reintenta(crear_gestor, monkeypatch):
+    db = crear_gestor("asincrono")
+    escritor = db.escritor_logs
+    original = escritor.guardar_lote
+    fallos = []
+
+    def guardar_con_fallo(lote):
+        if not fallos:
+            fallos.append(len(lote))
+            raise sqlite3.OperationalError("database is locked")
+        original(lote)
+
+    monkeypatch.setattr(escritor, "guardar_lote", guardar_con_fallo)
+    db.insert_log_sistema(LogSistema("Prueba", "primer intento", "admin"))
+    escritor.vaciar()
+    assert fallos == [1]
+    assert escritor.fallidos
+
+    db.esperar_logs()
+    assert not escritor.fallidos
+    assert contar(db, "log_sistema", "accion = 'Prueba'") == 1
+
+
+def test_cerrar_guarda_los_logs_en_cola(crear_gestor, monkeypatch):
+    monkeypatch.setenv("LOG_LOTE_MS", "5000")
+    db = crear_gestor("asincrono")
+    for i in range(10):
+        db.insert_log_sistema(LogSistema("Prueba", f"log {i}", "admin"))
+    db.close()
+
+    reabierta = crear_gestor("sincrono")
+    assert contar(reabierta, "log_sistema", "accion = 'Prueba'") == 10
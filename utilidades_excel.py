@@ -0,0 +1,33 @@
+# utilidades_excel.py
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from openpyxl.styles import Font, Border, PatternFill
+
+# Los reportes usan libros en modo write_only: cada fila se vuelca al archivo según llega del
+# cursor, de modo que la memoria no crece con el tamaño de la tabla.
+# openpyxl se importa al generar el reporte: cargarlo cuesta más que el resto del arranque y
+# la mayoría de las sesiones no generan ningún Excel.
+def fila_encabezados(ws, encabezados: list, fill: "PatternFill", font: "Font", border: "Border") -> list:
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Alignment
+
+    celdas = []
+    for encabezado in encabezados:
+        celda = WriteOnlyCell(ws, value=encabezado)
+        celda.fill = fill
+        celda.font = font
+        celda.alignment = Alignment(horizontal='center')
+        celda.border = border
+        celdas.append(celda)
+    return celdas
+
+def fila_datos(ws, valores: list, border: "Border") -> list:
+    from openpyxl.cell import WriteOnlyCell
+
+    celdas = []
+    for valor in valores:
+        celda = WriteOnlyCell(ws, value=valor)
+        celda.border = border
+        celdas.append(celda)
+    return celdas